@@ -5,12 +5,14 @@ import shutil
 import zipfile
 import subprocess
 import platform
-import fnmatch
 import hashlib
 import tempfile
 import xml.etree.ElementTree as ET
+import multiprocessing
+import contextlib
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Set
 
 from lib.projectNameFormatter import ProjectNameFormatter
 
@@ -32,7 +34,73 @@ except ImportError:
         def connect(self, func): pass
         def emit(self, *args, **kwargs): pass
 
-from lib.pyinstaller_embedded import get_pyinstaller, ensure_pyinstaller
+from lib.pyinstaller_embedded import DEFAULT_EXCLUDES, get_pyinstaller, ensure_pyinstaller
+from lib.artifact_store import ArtifactStore, write_delta_package, write_manifest
+from lib.build_cache import BuildCache, ProjectWorkpath
+from lib.cancellation import BuildCancelled, CancellationToken
+from lib.build_profiler import (
+    BuildProfiler, format_summary_table, load_trace, profiled, summary_rows_from_trace, trace_path_for,
+)
+from lib.gitignore import GitignoreMatcher
+from lib.iflapp_writer import DEFAULT_COMPRESSION_LEVEL, IflappWriter
+from lib.import_graph import (
+    ImportAnalysis, ImportGraph, compute_auto_excludes, get_parse_cache, project_search_roots,
+)
+
+# "spawn": el pool se crea desde el QThread de la GUI, donde fork() no es seguro.
+_CTX = multiprocessing.get_context("spawn")
+
+
+@dataclass
+class PackagePlan:
+    """Contenido planificado de un paquete: archivos por ruta relativa y carpetas."""
+
+    files: Dict[str, Path] = field(default_factory=dict)
+    directories: List[str] = field(default_factory=list)
+    executables: Set[str] = field(default_factory=set)
+
+
+def _tree_size(path: Path) -> int:
+    """Suma el tamaño de todos los archivos bajo *path*."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += (Path(root) / name).stat().st_size
+            except OSError:
+                pass
+    return total
+
+
+def _format_size(size: int) -> str:
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+def _compile_script_in_worker(task):
+    """Compila un único script en un proceso hijo.
+
+    Cada proceso tiene su propio ``sys.argv``/``cwd`` para PyInstaller y su
+    propio ``build_dir``/``dist`` temporal, por lo que varios scripts del mismo
+    proyecto pueden compilarse a la vez. Los logs y las fases del perfil se
+    devuelven al proceso padre para que los fusione con los suyos.
+    """
+    repo_path, output_path, metadata, script, windowed, options = task
+    logs: List[str] = []
+    compiler = FlangCompiler(repo_path, output_path)
+    compiler.log_callback = logs.append
+    compiler.use_build_cache = options.get('use_build_cache', True)
+    compiler.reuse_workpath = options.get('reuse_workpath', True)
+    compiler.auto_excludes = options.get('auto_excludes', True)
+    compiler.pyinstaller_backend = options.get('pyinstaller_backend', compiler.pyinstaller_backend)
+    compiler.metadata = dict(metadata)
+    compiler.platform_type = metadata.get('platform')
+    try:
+        ok = compiler._compile_binary(script, windowed=windowed)
+    except Exception as e:
+        compiler.last_error = str(e)
+        ok = False
+    return script['name'], ok, logs, compiler.last_error, compiler.profiler.export_records()
+
 
 class FlangCompiler:
     """Compilador principal unificado para el ecosistema Fluthin (Version Robusta)."""
@@ -48,6 +116,44 @@ class FlangCompiler:
         self.current_platform = platform.system()
         self.scripts_to_compile = None
         self.last_error = ""
+        # Número de procesos para compilar scripts en paralelo (1 = secuencial).
+        self.jobs = 1
+        # Reutilizar ejecutables de la caché persistente cuando nada cambió.
+        self.use_build_cache = True
+        self._build_cache = None
+        # Conservar el workpath de PyInstaller entre scripts y compilaciones.
+        self.reuse_workpath = True
+        self._environment_fingerprint = None
+        # "onefile": un ejecutable autocontenido por script.
+        # "shared": todos los scripts comparten un único runtime onedir (_internal).
+        self.bundle_mode = "onefile"
+        self._onefile_baseline_bytes = 0
+        self._import_analyses: Dict[Path, ImportAnalysis] = {}
+        # Excluir paquetes pesados instalados que el proyecto no alcanza.
+        self.auto_excludes = True
+        # Nivel DEFLATE (0-9) para los miembros comprimibles del .iflapp.
+        self.compression_level = DEFAULT_COMPRESSION_LEVEL
+        # Escribir el paquete directamente en el .iflapp, sin carpeta intermedia.
+        self.direct_archive = False
+        # Tiempos, CPU, E/S y memoria por fase; se guarda junto al .iflapp.
+        self.profiler = BuildProfiler()
+        self.profile_path: Optional[Path] = None
+        # "embedded": PyInstaller en este proceso; "subprocess": proceso hijo
+        # aislado y cancelable, con límite de memoria opcional (la GUI lo usa
+        # por defecto; ver PACKAGEMAKER_PYI_MEMORY_MB).
+        self.pyinstaller_backend = os.environ.get("PACKAGEMAKER_PYI_BACKEND", "embedded")
+        self._pyinstaller_instance = None
+        self._pyinstaller_backend_used = None
+        # Se consulta entre scripts, entre archivos copiados y al escribir el .iflapp.
+        self.cancel_token = CancellationToken()
+        # Reutilizar miembros ya comprimidos en builds anteriores (por contenido).
+        # En un build en frío cuesta una lectura extra por miembro y una copia
+        # de lo comprimido en la caché; --no-artifact-store lo desactiva.
+        self.use_artifact_store = True
+        # .iflapp de una versión anterior: si se indica, se genera además un
+        # paquete delta con solo los miembros que cambiaron respecto a él.
+        self.delta_base: Optional[Path] = None
+        self.delta_path: Optional[Path] = None
 
         self.output_path.mkdir(parents=True, exist_ok=True)
         self.log(f"[FlangCompiler IT] Inicializado en: {self.repo_path}")
@@ -57,10 +163,25 @@ class FlangCompiler:
         if self.log_callback:
             self.log_callback(msg)
 
+    def cancel(self) -> None:
+        """Pide detener el build; es seguro llamarlo desde otro hilo."""
+        self.cancel_token.cancel()
+
+    def _checkpoint(self) -> None:
+        self.cancel_token.raise_if_cancelled()
+
+    def _pyinstaller(self):
+        # El backend de subproceso guarda el estado de un build: uno propio por compilador.
+        if self._pyinstaller_instance is None or self._pyinstaller_backend_used != self.pyinstaller_backend:
+            self._pyinstaller_instance = get_pyinstaller(self.pyinstaller_backend)
+            self._pyinstaller_backend_used = self.pyinstaller_backend
+        return self._pyinstaller_instance
+
     def _check_pyinstaller_installed(self) -> bool:
-        pyi = get_pyinstaller()
+        pyi = self._pyinstaller()
         if pyi.is_available():
-            self.log(f"[INFO] PyInstaller embebido: {pyi.get_version()}")
+            mode = "en subproceso" if self.pyinstaller_backend == "subprocess" else "embebido"
+            self.log(f"[INFO] PyInstaller {mode}: {pyi.get_version()}")
             return True
         return False
 
@@ -69,11 +190,14 @@ class FlangCompiler:
             return True
         self.log("[INFO] PyInstaller no encontrado. Iniciando instalación automática...")
         if ensure_pyinstaller(log_callback=self.log):
+            # La instancia guardada se creó sin PyInstaller: pedir una nueva.
+            self._pyinstaller_instance = None
             return True
         self.last_error = "No se pudo instalar PyInstaller automáticamente."
         self.log("[ERROR] No se pudo instalar PyInstaller automáticamente")
         return False
 
+    @profiled("parse_details_xml")
     def parse_details_xml(self) -> bool:
         if not self.details_xml_path.exists():
             self.log(f"[ERROR] No details.xml found in {self.repo_path}")
@@ -110,20 +234,69 @@ class FlangCompiler:
                 return default_icon
         return None
 
+    def _analyze_imports(self, script_path: Path) -> ImportAnalysis:
+        """Grafo de imports del script (memoizado durante la compilación)."""
+        key = Path(script_path).resolve()
+        if key not in self._import_analyses:
+            graph = ImportGraph(project_search_roots(self.repo_path), cache=get_parse_cache())
+            self._import_analyses[key] = graph.analyze(key)
+        return self._import_analyses[key]
+
     def _detect_hidden_imports(self, script_path: Path) -> list:
-        hidden_imports = []
-        try:
-            content = script_path.read_text(encoding="utf-8")
-            if "PyQt6" in content:
-                hidden_imports.append("PyQt6")
-            if "leviathan_ui" in content:
-                hidden_imports.append("leviathan_ui")
-            if "requests" in content:
-                hidden_imports.append("requests")
-        except OSError:
-            pass
+        hidden_imports = self._analyze_imports(script_path).hidden_imports()
+        if hidden_imports:
+            self.log(f"[DEBUG] Hidden imports para {Path(script_path).name}: {hidden_imports}")
         return hidden_imports
 
+    def _auto_exclude_packages(self, analysis: ImportAnalysis) -> list:
+        if not self.auto_excludes:
+            return []
+        reached = analysis.external | analysis.dynamic
+        roots = project_search_roots(self.repo_path)
+        try:
+            candidates = compute_auto_excludes(reached)
+        except Exception as e:
+            self.log(f"[WARN] No se pudo inspeccionar los paquetes instalados: {e}")
+            return []
+        # Un módulo local con el mismo nombre que un paquete instalado nunca se excluye.
+        return [
+            package for package in candidates
+            if not any((root / package.name).exists() or (root / f"{package.name}.py").exists() for root in roots)
+        ]
+
+    def _detect_excludes(self, script_path: Path) -> list:
+        """Excluye los paquetes pesados que el script no alcanza en su grafo de imports."""
+        analysis = self._analyze_imports(script_path)
+        excludes = set(analysis.excludes(DEFAULT_EXCLUDES))
+        excludes.update(package.name for package in self._auto_exclude_packages(analysis))
+        return sorted(excludes)
+
+    def _report_auto_excludes(self) -> None:
+        """Informa los paquetes excluidos en todos los scripts y el ahorro estimado."""
+        if not self.auto_excludes or not self.scripts:
+            return
+        per_script = [
+            {package.name: package for package in self._auto_exclude_packages(self._analyze_imports(script["path"]))}
+            for script in self.scripts
+        ]
+        common = set(per_script[0]).intersection(*per_script[1:])
+        if not common:
+            self.log("[INFO] Exclusión automática: ningún paquete pesado sin usar en el intérprete.")
+            return
+        packages = sorted((per_script[0][name] for name in common), key=lambda package: package.size, reverse=True)
+        total_size = sum(package.size for package in packages)
+        total_seconds = sum(package.estimated_analysis_seconds for package in packages)
+        self.log(
+            f"[INFO] Exclusión automática: {len(packages)} paquetes sin usar "
+            f"(≈ {_format_size(total_size)} y ≈ {total_seconds:.1f}s de análisis por script)"
+        )
+        for package in packages:
+            self.log(
+                f"[INFO]   - {package.name}: {_format_size(package.size)}, "
+                f"{package.modules} módulos (≈ {package.estimated_analysis_seconds:.1f}s)"
+            )
+
+    @profiled("find_scripts")
     def find_scripts(self) -> bool:
         if self.scripts_to_compile:
             self.scripts = []
@@ -194,6 +367,7 @@ class FlangCompiler:
             return target_platform == "Linux"
         return False
 
+    @profiled("compile_binaries")
     def compile_binaries(self, target_platform: str) -> bool:
         if not self.should_compile_for_platform(target_platform):
             self.last_error = (
@@ -220,7 +394,13 @@ class FlangCompiler:
             return False
         self.log("--- / --- - WORKING FOR SQUAREROOM - --- / ---")
         self.log(f"[INFO] Iniciando compilación para {target_platform}...")
+        self._report_auto_excludes()
+        if self.bundle_mode == "shared":
+            return self._compile_shared_runtime(target_platform)
+        if self.jobs > 1 and len(self.scripts) > 1:
+            return self._compile_binaries_parallel(target_platform)
         for script in self.scripts:
+            self._checkpoint()
             self.log(f"[INFO] Compilando script: {script['name']}...")
             if target_platform == "Windows":
                 if not self._compile_windows_binary(script):
@@ -230,6 +410,62 @@ class FlangCompiler:
                     return False
         return True
 
+    def _compile_binaries_parallel(self, target_platform: str) -> bool:
+        """Compila cada script en su propio proceso y aborta ante el primer fallo."""
+        windowed = target_platform == "Windows"
+        workers = min(self.jobs, len(self.scripts))
+        # Crear los directorios de datos una sola vez evita carreras entre workers.
+        self._prepare_pyinstaller_data_dirs()
+        (self.repo_path / "dist").mkdir(exist_ok=True)
+        self.log(f"[INFO] Compilación paralela: {len(self.scripts)} scripts con {workers} procesos")
+
+        options = {
+            'use_build_cache': self.use_build_cache,
+            'reuse_workpath': self.reuse_workpath,
+            'auto_excludes': self.auto_excludes,
+            # Cada worker ya es un proceso aislado; con PyInstaller embebido,
+            # pool.terminate() al cancelar detiene también la compilación.
+            'pyinstaller_backend': 'embedded',
+        }
+        tasks = [
+            (str(self.repo_path), str(self.output_path), self.metadata, script, windowed, options)
+            for script in self.scripts
+        ]
+        for script in self.scripts:
+            self.log(f"[INFO] Compilando script: {script['name']}...")
+
+        pool = _CTX.Pool(processes=workers)
+        try:
+            results = pool.imap_unordered(_compile_script_in_worker, tasks)
+            while True:
+                try:
+                    name, ok, logs, error, profile = results.next(timeout=0.25)
+                except multiprocessing.TimeoutError:
+                    if self.cancel_token.cancelled:
+                        pool.terminate()
+                        self._checkpoint()
+                    continue
+                except StopIteration:
+                    break
+                for line in logs:
+                    self.log(f"[{name}] {line}")
+                self.profiler.merge(profile[1], origin=profile[0], depth=self.profiler.depth)
+                if not ok:
+                    self.last_error = error or f"Falló la compilación de {name}"
+                    self.log(f"[ERROR] Compilación de {name} fallida; cancelando el resto del build.")
+                    # terminate() mata los workers en curso en lugar de esperar a PyInstaller.
+                    pool.terminate()
+                    return False
+            pool.close()
+            return True
+        except Exception as e:
+            pool.terminate()
+            self.last_error = str(e)
+            self.log(f"[ERROR] Excepción en compilación paralela: {e}")
+            return False
+        finally:
+            pool.join()
+
     def _prepare_pyinstaller_data_dirs(self):
         assets_dir = self.repo_path / "assets"
         app_dir = self.repo_path / "app"
@@ -239,24 +475,215 @@ class FlangCompiler:
         (app_dir / ".app-container").touch(exist_ok=True)
         return assets_dir, app_dir
 
+    def _get_build_cache(self) -> Optional[BuildCache]:
+        if not self.use_build_cache:
+            return None
+        if self._build_cache is None:
+            self._build_cache = BuildCache()
+        return self._build_cache
+
+    def _build_cache_key(self, script: Dict, add_data, hidden_imports, windowed: bool) -> Optional[str]:
+        cache = self._get_build_cache()
+        if cache is None:
+            return None
+        analysis = self._analyze_imports(script["path"])
+        try:
+            return cache.compute_key(
+                script["path"],
+                local_imports=analysis.local_modules,
+                extra_files=[self.details_xml_path, script["icon"]],
+                data_dirs=add_data,
+                hidden_imports=hidden_imports,
+                options=[
+                    f"windowed={windowed}",
+                    "onefile=True",
+                    "excludes=" + ",".join(self._detect_excludes(script["path"])),
+                ],
+                pyinstaller_version=self._pyinstaller().get_version(),
+            )
+        except OSError as e:
+            self.log(f"[WARN] No se pudo calcular la clave de caché: {e}")
+            return None
+
+    def _get_environment_fingerprint(self) -> str:
+        """Huella de los paquetes instalados en el intérprete de compilación."""
+        if self._environment_fingerprint is None:
+            digest = hashlib.sha256()
+            digest.update(f"{sys.executable}|{sys.version}|{self._pyinstaller().get_version()}".encode("utf-8"))
+            try:
+                from importlib import metadata as importlib_metadata
+                dists = sorted(
+                    f"{dist.metadata['Name']}=={dist.version}"
+                    for dist in importlib_metadata.distributions()
+                    if dist.metadata['Name']
+                )
+                digest.update("\n".join(dists).encode("utf-8"))
+            except Exception:
+                pass
+            self._environment_fingerprint = digest.hexdigest()
+        return self._environment_fingerprint
+
+    def _workpath_fingerprint(self, script: Dict, hidden_imports, windowed: bool) -> str:
+        digest = hashlib.sha256(self._get_environment_fingerprint().encode("utf-8"))
+        for module in self._analyze_imports(script["path"]).local_modules:
+            digest.update(str(module).encode("utf-8"))
+        for name in sorted(set(hidden_imports)):
+            digest.update(f"hidden:{name}".encode("utf-8"))
+        requirements = self.repo_path / "lib" / "requirements.txt"
+        if requirements.is_file():
+            digest.update(requirements.read_bytes())
+        digest.update(f"windowed={windowed}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def _store_binary(self, exe_path: Path, dist_dir: Path, windowed: bool) -> Path:
+        accumulated_exe = dist_dir / Path(exe_path).name
+        shutil.copy2(exe_path, accumulated_exe)
+        if not windowed:
+            try:
+                os.chmod(accumulated_exe, 0o755)
+            except OSError:
+                pass
+        return accumulated_exe
+
+    def _prepare_icon(self, script: Dict) -> Optional[Path]:
+        """Devuelve el icono del script, convertido a PNG en Linux si es necesario."""
+        icon_to_use = script["icon"]
+        if icon_to_use and sys.platform.startswith("linux") and str(icon_to_use).endswith(".ico"):
+            try:
+                from lib.linux_icon_handler import convert_ico_to_png
+                png_icon = str(icon_to_use).replace(".ico", ".png")
+                if convert_ico_to_png(str(icon_to_use), png_icon):
+                    icon_to_use = Path(png_icon)
+                    self.log(f"[INFO] Icono convertido a PNG: {png_icon}")
+            except Exception as e:
+                self.log(f"[WARNING] Error al convertir icono a PNG: {e}")
+        return icon_to_use
+
+    def _data_files_for_build(self) -> List:
+        assets_dir, app_dir = self._prepare_pyinstaller_data_dirs()
+        add_data = [(str(assets_dir), "assets"), (str(app_dir), "app")]
+        # cliHandler y otros módulos cargan details.xml relativo a la raíz del bundle.
+        # Incluirlo explícitamente es necesario para ejecutables onefile/frozen.
+        if self.details_xml_path.is_file():
+            add_data.append((str(self.details_xml_path), "."))
+        return add_data
+
+    def _write_shared_spec(self, spec_path: Path, windowed: bool) -> None:
+        """Genera un .spec con un Analysis por script y un único COLLECT compartido.
+
+        COLLECT deduplica binarios y datos por destino, por lo que Python, PyQt6
+        y el resto de librerías se empaquetan una sola vez en ``_internal``.
+        """
+        add_data = [(os.path.abspath(src), dst) for src, dst in self._data_files_for_build()]
+        lines = ["# -*- mode: python ; coding: utf-8 -*-", "# Generado por FlangCompiler (modo runtime compartido)", ""]
+        collect_args = []
+        for index, script in enumerate(self.scripts):
+            icon = self._prepare_icon(script)
+            lines.extend([
+                f"a{index} = Analysis(",
+                f"    [{str(script['path'])!r}],",
+                f"    pathex=[{str(self.repo_path)!r}],",
+                f"    datas={add_data!r},",
+                f"    hiddenimports={self._detect_hidden_imports(script['path'])!r},",
+                f"    excludes={self._detect_excludes(script['path'])!r},",
+                ")",
+                f"pyz{index} = PYZ(a{index}.pure)",
+                f"exe{index} = EXE(",
+                f"    pyz{index},",
+                f"    a{index}.scripts,",
+                "    [],",
+                "    exclude_binaries=True,",
+                f"    name={script['name']!r},",
+                f"    console={not windowed!r},",
+                f"    icon={str(icon) if icon else None!r},",
+                ")",
+                "",
+            ])
+            collect_args.extend([f"exe{index}", f"a{index}.binaries", f"a{index}.datas"])
+        lines.append(f"coll = COLLECT({', '.join(collect_args)}, name='runtime')")
+        spec_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    @profiled("compile_shared_runtime")
+    def _compile_shared_runtime(self, target_platform: str) -> bool:
+        """Compila todos los scripts en un onedir con runtime compartido."""
+        windowed = target_platform == "Windows"
+        pyi = self._pyinstaller()
+        if not pyi.is_available():
+            self.last_error = "PyInstaller no disponible"
+            self.log("[ERROR] PyInstaller no disponible")
+            return False
+        self.log(f"[INFO] Modo runtime compartido: {len(self.scripts)} scripts en un único onedir")
+        dist_dir = self.repo_path / "dist"
+        dist_dir.mkdir(exist_ok=True)
+        build_dir = Path(tempfile.mkdtemp(prefix="pyi_shared_"))
+        work_dir = ProjectWorkpath(self.repo_path).path / "shared" if self.reuse_workpath else build_dir / "work"
+        try:
+            spec_path = build_dir / "shared_runtime.spec"
+            self._write_shared_spec(spec_path, windowed)
+            with self._cancel_pyinstaller_on_cancel(pyi):
+                compiled = pyi.compile_spec(str(spec_path), str(build_dir / "dist"), str(work_dir), cwd=str(self.repo_path))
+            if not compiled:
+                self._checkpoint()
+                self.last_error = pyi.get_last_error()
+                self.log(f"[ERROR] {self.last_error}")
+                return False
+            runtime_dir = build_dir / "dist" / "runtime"
+            if not runtime_dir.is_dir():
+                self.last_error = "PyInstaller finalizó pero no se generó el runtime compartido"
+                self.log(f"[ERROR] {self.last_error}")
+                return False
+            for item in runtime_dir.iterdir():
+                destination = dist_dir / item.name
+                if item.is_dir():
+                    shutil.rmtree(destination, ignore_errors=True)
+                    shutil.copytree(item, destination)
+                else:
+                    self._store_binary(item, dist_dir, windowed)
+
+            suffix = ".exe" if target_platform == "Windows" else ""
+            runtime_bytes = _tree_size(runtime_dir)
+            exe_bytes = sum(
+                (runtime_dir / f"{script['name']}{suffix}").stat().st_size
+                for script in self.scripts
+                if (runtime_dir / f"{script['name']}{suffix}").is_file()
+            )
+            shared_bytes = runtime_bytes - exe_bytes
+            # Cada onefile incluiría su propia copia del runtime compartido.
+            self._onefile_baseline_bytes = exe_bytes + shared_bytes * len(self.scripts)
+            self.log(
+                f"[INFO] Runtime compartido: {_format_size(runtime_bytes)} "
+                f"(onefile por script estimado: {_format_size(self._onefile_baseline_bytes)})"
+            )
+            for script in self.scripts:
+                self.log(f"[OK] {script['name']} compilado (runtime compartido).")
+            return True
+        except Exception as e:
+            self.last_error = str(e)
+            self.log(f"[ERROR] Excepción PyInstaller: {e}")
+            return False
+        finally:
+            pyi.cleanup()
+            shutil.rmtree(build_dir, ignore_errors=True)
+
     def _compile_windows_binary(self, script: Dict) -> bool:
         return self._compile_binary(script, windowed=True)
 
     def _compile_linux_binary(self, script: Dict) -> bool:
         return self._compile_binary(script, windowed=False)
 
+    def _cancel_pyinstaller_on_cancel(self, pyi):
+        """Mata el proceso de PyInstaller si el build se cancela durante la llamada."""
+        cancel = getattr(pyi, "cancel", None)
+        return self.cancel_token.on_cancel(cancel) if cancel else contextlib.nullcontext()
+
+    @profiled("compile_binary", script_arg=True)
     def _compile_binary(self, script: Dict, windowed: bool) -> bool:
         script_path = script["path"]
         script_name = script["name"]
-        assets_dir, app_dir = self._prepare_pyinstaller_data_dirs()
-        add_data = [(str(assets_dir), "assets"), (str(app_dir), "app")]
-        # cliHandler y otros módulos cargan details.xml relativo a la raíz del bundle.
-        # Incluirlo explícitamente es necesario para ejecutables onefile/frozen.
-        if self.details_xml_path.is_file():
-            add_data.append((str(self.details_xml_path), "."))
+        add_data = self._data_files_for_build()
         hidden_imports = self._detect_hidden_imports(script_path)
 
-        pyi = get_pyinstaller()
+        pyi = self._pyinstaller()
         if not pyi.is_available():
             self.last_error = "PyInstaller no disponible"
             self.log("[ERROR] PyInstaller no disponible")
@@ -264,50 +691,66 @@ class FlangCompiler:
 
         dist_dir = self.repo_path / "dist"
         dist_dir.mkdir(exist_ok=True)
+        exe_name = script_name + (".exe" if sys.platform == "win32" else "")
+        cache_key = self._build_cache_key(script, add_data, hidden_imports, windowed)
+        if cache_key:
+            cached_exe = self._get_build_cache().get(cache_key, exe_name)
+            if cached_exe:
+                self._store_binary(cached_exe, dist_dir, windowed)
+                self.log(f"[CACHE] {script_name} sin cambios; se reutiliza el ejecutable ({cache_key[:12]}).")
+                return True
+
         build_dir = tempfile.mkdtemp(prefix="pyi_build_")
         # PyInstaller puede limpiar el directorio de salida entre ejecuciones.
         # Cada script se compila en una salida aislada y luego su ejecutable se
         # acumula en el `dist` compartido que consume create_package().
         script_dist_dir = Path(build_dir) / "dist"
         script_dist_dir.mkdir(parents=True, exist_ok=True)
+        # El workpath (análisis, PYZ, PKG) se conserva por proyecto para que las
+        # compilaciones siguientes solo rehagan las fases cuyas entradas cambiaron.
+        workpath = ProjectWorkpath(self.repo_path) if self.reuse_workpath else None
+        fingerprint = ""
+        warm = False
 
         try:
             self.log(f"[DEBUG] Compilando {script_name} con PyInstaller embebido...")
+            if workpath:
+                fingerprint = self._workpath_fingerprint(script, hidden_imports, windowed)
+                warm = workpath.prepare(script_name, fingerprint)
+                state = "reutilizado" if warm else "nuevo"
+                self.log(f"[INFO] Workpath {state} para {script_name}: {workpath.script_dir(script_name)}")
             
-            # Preparar icono: convertir ICO a PNG en Linux si es necesario
-            icon_to_use = script["icon"]
-            if icon_to_use and sys.platform.startswith("linux") and str(icon_to_use).endswith(".ico"):
-                try:
-                    from lib.linux_icon_handler import convert_ico_to_png
-                    png_icon = str(icon_to_use).replace(".ico", ".png")
-                    if convert_ico_to_png(str(icon_to_use), png_icon):
-                        icon_to_use = Path(png_icon)
-                        self.log(f"[INFO] Icono convertido a PNG: {png_icon}")
-                except Exception as e:
-                    self.log(f"[WARNING] Error al convertir icono a PNG: {e}")
-            
-            exe_path = pyi.compile_to_exe(
-                script_path=str(script_path),
-                output_name=script_name,
-                output_dir=str(script_dist_dir),
-                icon_path=str(icon_to_use) if icon_to_use else None,
-                windowed=windowed,
-                onefile=True,
-                add_data=add_data,
-                hidden_imports=hidden_imports,
-                build_dir=build_dir,
-                cwd=str(self.repo_path),
-            )
+            icon_to_use = self._prepare_icon(script)
+
+            started = time.monotonic()
+            with self._cancel_pyinstaller_on_cancel(pyi):
+                exe_path = pyi.compile_to_exe(
+                    script_path=str(script_path),
+                    output_name=script_name,
+                    output_dir=str(script_dist_dir),
+                    icon_path=str(icon_to_use) if icon_to_use else None,
+                    windowed=windowed,
+                    onefile=True,
+                    add_data=add_data,
+                    hidden_imports=hidden_imports,
+                    excludes=self._detect_excludes(script_path),
+                    build_dir=str(workpath.path) if workpath else build_dir,
+                    cwd=str(self.repo_path),
+                )
+            elapsed = time.monotonic() - started
             if exe_path and os.path.exists(exe_path):
-                accumulated_exe = dist_dir / Path(exe_path).name
-                shutil.copy2(exe_path, accumulated_exe)
-                if not windowed:
-                    try:
-                        os.chmod(accumulated_exe, 0o755)
-                    except OSError:
-                        pass
+                self._store_binary(Path(exe_path), dist_dir, windowed)
+                if workpath:
+                    saved = workpath.commit(script_name, fingerprint, elapsed, warm)
+                    if saved is not None:
+                        self.log(f"[INFO] {script_name}: {elapsed:.1f}s con workpath reutilizado (ahorro ≈ {saved:.1f}s)")
+                    else:
+                        self.log(f"[INFO] {script_name}: {elapsed:.1f}s (build en frío)")
+                if cache_key and self._get_build_cache().put(cache_key, Path(exe_path)):
+                    self.log(f"[CACHE] {script_name} guardado en caché ({cache_key[:12]}).")
                 self.log(f"[OK] {script_name} compilado.")
                 return True
+            self._checkpoint()
             self.last_error = pyi.get_last_error()
             self.log(f"[ERROR] {self.last_error}")
             return False
@@ -319,6 +762,7 @@ class FlangCompiler:
             pyi.cleanup()
             shutil.rmtree(build_dir, ignore_errors=True)
 
+    @profiled("create_package")
     def create_package(self, target_platform: str) -> bool:
         if not self.should_compile_for_platform(target_platform):
             self.last_error = (
@@ -366,6 +810,11 @@ class FlangCompiler:
             self.log(f"[ERROR] {self.last_error}")
             shutil.rmtree(package_path, ignore_errors=True)
             return False
+        if self.bundle_mode == "shared" and self._onefile_baseline_bytes:
+            self.log(
+                f"[INFO] Tamaño del paquete: {_format_size(_tree_size(package_path))} "
+                f"(base onefile por script: {_format_size(self._onefile_baseline_bytes)})"
+            )
         return True
 
     def optimize_binaries(self) -> bool:
@@ -383,57 +832,42 @@ class FlangCompiler:
         if gitignore_path.exists():
             try:
                 with open(gitignore_path, "r", encoding="utf-8") as f:
-                    for line in f:
-                        line = line.strip()
-                        if line and not line.startswith("#"):
-                            # Normalizar patrones para fnmatch
-                            p = line
-                            if p.startswith("/"): p = p[1:]
-                            if p.endswith("/"): p = p[:-1]
-                            if p not in patterns:
-                                patterns.append(p)
+                    # Se conservan tal cual: la semántica (anclaje, "/" final,
+                    # "**", "!") la resuelve GitignoreMatcher.
+                    patterns.extend(f.read().splitlines())
                 self.log(f"[INFO] .gitignore cargado ({len(patterns)} patrones)")
             except Exception as e:
                 self.log(f"[WARN] No se pudo leer .gitignore: {e}")
         return patterns
 
-    def _should_exclude(self, name: str, patterns: List[str]) -> bool:
-        """Verifica si un archivo o directorio debe ser excluido."""
-        for p in patterns:
-            if fnmatch.fnmatch(name, p) or fnmatch.fnmatch(name, f"*/{p}"):
-                return True
-            # Manejar directorios recursivos en gitignore
-            if "/" in p:
-                parts = p.split("/")
-                if name == parts[0] or name == parts[-1]:
-                    return True
-        return False
+    def _load_gitignore_matcher(self) -> GitignoreMatcher:
+        """Compila una sola vez los patrones de exclusión del paquete."""
+        return GitignoreMatcher.from_lines(self._load_gitignore_patterns())
 
-    def _copy_package_files(self, package_path: Path, target_platform: str) -> None:
-        exclude_patterns = self._load_gitignore_patterns()
-        
-        def ignore_func(directory, contents):
-            return [c for c in contents if self._should_exclude(c, exclude_patterns)]
+    def _plan_package_members(self, target_platform: str) -> PackagePlan:
+        """Decide qué archivos forman el paquete sin copiar nada.
+
+        Aplica .gitignore, las rutas obligatorias del contrato PackageMaker y los
+        binarios de ``dist``; la usan tanto la copia a carpeta como la escritura
+        directa al ``.iflapp``.
+        """
+        matcher = self._load_gitignore_matcher()
+        plan = PackagePlan()
 
         for item in self.repo_path.iterdir():
-            if self._should_exclude(item.name, exclude_patterns):
+            if matcher.matches(item.name, is_dir=item.is_dir()):
                 continue
-                
-            dest = package_path / item.name
             if item.is_dir():
-                if dest.exists():
-                    shutil.rmtree(dest)
-                try:
-                    shutil.copytree(item, dest, ignore=ignore_func)
-                except Exception as e:
-                    self.log(f"[WARN] Error copiando {item.name}: {e}")
+                plan.directories.append(item.name)
+                # Los directorios excluidos se podan sin recorrer su contenido.
+                for relative_root, dirs, files in matcher.walk(item, prefix=item.name):
+                    plan.directories.extend(f"{relative_root}/{d}" for d in dirs)
+                    for name in files:
+                        plan.files[f"{relative_root}/{name}"] = self.repo_path / relative_root / name
             elif item.is_file():
-                try:
-                    shutil.copy2(item, dest)
-                except:
-                    pass
+                plan.files[item.name] = item
         # Los archivos estructurales de PackageMaker son parte del contrato del paquete.
-        # Se copian explícitamente después de aplicar .gitignore para evitar que un
+        # Se incluyen explícitamente después de aplicar .gitignore para evitar que un
         # proyecto excluya accidentalmente sus propios metadatos MoonFix.
         mandatory_paths = [
             Path(".storedetail"), Path("version.res"), Path("autorun"),
@@ -446,31 +880,165 @@ class FlangCompiler:
             mandatory_paths.append(Path("manifest.res"))
         for relative in mandatory_paths:
             source = self.repo_path / relative
-            destination = package_path / relative
             if source.is_file():
-                destination.parent.mkdir(parents=True, exist_ok=True)
-                shutil.copy2(source, destination)
+                plan.files[relative.as_posix()] = source
+                if len(relative.parts) > 1:
+                    plan.directories.append(relative.parent.as_posix())
             elif source.is_dir():
-                destination.mkdir(parents=True, exist_ok=True)
+                plan.directories.append(relative.as_posix())
 
         dist_dir = self.repo_path / "dist"
         if dist_dir.exists():
+            top_dirs = {d.split("/")[0] for d in plan.directories}
             for binary in dist_dir.iterdir():
+                if binary.is_dir():
+                    # Runtime compartido (`_internal`) del modo bundle_mode="shared".
+                    plan.directories.append(binary.name)
+                    for root, dirs, files in os.walk(binary):
+                        relative_root = Path(root).relative_to(dist_dir)
+                        plan.directories.extend((relative_root / d).as_posix() for d in dirs)
+                        for name in files:
+                            plan.files[(relative_root / name).as_posix()] = Path(root) / name
+                    continue
                 if (target_platform == "Windows" and binary.suffix == ".exe") or (target_platform == "Linux" and binary.suffix == ""):
-                    destination = package_path / binary.name
+                    arcname = binary.name
                     # `app`, `config` y otros nombres pueden coincidir con
                     # carpetas obligatorias del contrato Fluthin.
-                    if destination.exists() and destination.is_dir():
-                        destination = package_path / "bin" / binary.name
-                    destination.parent.mkdir(parents=True, exist_ok=True)
-                    shutil.copy2(binary, destination)
-                    try:
-                        destination.chmod(0o755)
-                    except:
-                        pass
+                    if binary.name in top_dirs:
+                        arcname = f"bin/{binary.name}"
+                        plan.directories.append("bin")
+                    plan.files[arcname] = binary
+                    plan.executables.add(arcname)
+        return plan
 
-    def _update_and_copy_details_xml(self, package_path: Path, platform_suffix: str) -> None:
-        """Actualiza y copia details.xml con formateo correcto."""
+    @profiled("copy_package_files")
+    def _copy_package_files(self, package_path: Path, target_platform: str) -> None:
+        plan = self._plan_package_members(target_platform)
+        for directory in plan.directories:
+            if "/" not in directory:
+                destination = package_path / directory
+                if destination.exists() and destination.is_dir():
+                    shutil.rmtree(destination)
+        for directory in plan.directories:
+            (package_path / directory).mkdir(parents=True, exist_ok=True)
+        for arcname, source in plan.files.items():
+            self._checkpoint()
+            destination = package_path / arcname
+            try:
+                destination.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(source, destination)
+            except OSError as e:
+                self.log(f"[WARN] Error copiando {arcname}: {e}")
+                continue
+            if arcname in plan.executables:
+                try:
+                    destination.chmod(0o755)
+                except OSError:
+                    pass
+
+    def _missing_binaries(self, present: Set[str], target_platform: str) -> List[str]:
+        expected_suffix = ".exe" if target_platform == "Windows" else ""
+        missing = []
+        for script in self.scripts:
+            binary_name = f"{script['name']}{expected_suffix}"
+            if binary_name not in present and f"bin/{binary_name}" not in present:
+                missing.append(binary_name)
+        return missing
+
+    @profiled("package_to_iflapp")
+    def package_to_iflapp(self, target_platform: str, output_file: Path) -> bool:
+        """Escribe el paquete directamente en el ``.iflapp`` sin carpeta intermedia.
+
+        Usa el mismo plan que ``create_package`` (filtros de .gitignore, rutas
+        obligatorias, binarios de ``dist``) y añade ``details.xml`` reescrito
+        desde memoria, así cada byte se lee una vez y se escribe una vez.
+        """
+        if not self.should_compile_for_platform(target_platform):
+            self.last_error = (
+                f"La plataforma del proyecto ({self.platform_type}) no permite "
+                f"crear un paquete para {target_platform}."
+            )
+            self.log(f"[ERROR] {self.last_error}")
+            return False
+        platform_suffix = "Knosthalij" if target_platform == "Windows" else "Danenone"
+        plan = self._plan_package_members(target_platform)
+        plan.files.pop("details.xml", None)
+        missing_binaries = self._missing_binaries(set(plan.files), target_platform)
+        if missing_binaries or not self.scripts:
+            self.log(f"[DEBUG] Binarios faltantes: {missing_binaries}")
+            self.last_error = (
+                f"El paquete para {target_platform} no contiene todos los binarios "
+                "compilados esperados."
+            )
+            self.log(f"[ERROR] {self.last_error}")
+            return False
+        for arcname in plan.executables:
+            # El modo del miembro sale del archivo fuente: el binario de dist
+            # debe ser ejecutable igual que la copia de la carpeta del paquete.
+            try:
+                plan.files[arcname].chmod(0o755)
+            except OSError:
+                pass
+        details_xml = self._render_details_xml(platform_suffix)
+        if details_xml is None:
+            self.last_error = "No se pudo generar details.xml para el paquete."
+            return False
+
+        self.log(f"[INFO] Escribiendo {len(plan.files) + 1} archivos directamente en {output_file.name}")
+        try:
+            with self._open_iflapp_writer(output_file) as writer:
+                writer.write_files((source, arcname) for arcname, source in plan.files.items())
+                writer.write_bytes("details.xml", details_xml)
+                write_manifest(writer, self._manifest_package_info(platform_suffix))
+        except Exception as e:
+            self.last_error = str(e)
+            self.log(f"[ERROR] Zip failed: {e}")
+            return False
+        self._write_delta_package(output_file)
+        return True
+
+    def _open_iflapp_writer(self, output_file: Path) -> IflappWriter:
+        store = ArtifactStore() if self.use_artifact_store else None
+        return IflappWriter(output_file, level=self.compression_level,
+                            cancel_token=self.cancel_token, store=store)
+
+    def _manifest_package_info(self, platform_suffix: str) -> Dict:
+        return {
+            "publisher": self.metadata.get('publisher', ''),
+            "app": self.metadata.get('app', ''),
+            "version": self.metadata.get('version', ''),
+            "platform": platform_suffix,
+        }
+
+    def _package_platform_suffix(self, package_path: Path) -> str:
+        try:
+            return ET.parse(package_path / "details.xml").getroot().findtext("platform") or ""
+        except (OSError, ET.ParseError):
+            return ""
+
+    def _write_delta_package(self, iflapp_path: Path) -> Optional[Path]:
+        """Genera ``<nombre>.delta.iflapp`` frente a ``delta_base`` si se pidió."""
+        if not self.delta_base:
+            return None
+        base = Path(self.delta_base)
+        delta_path = iflapp_path.with_name(f"{iflapp_path.stem}.delta{iflapp_path.suffix}")
+        try:
+            with self.profiler.phase("write_delta_package"):
+                stats = write_delta_package(iflapp_path, base, delta_path, level=self.compression_level)
+        except (OSError, ValueError) as e:
+            # El paquete completo ya es válido; el delta es un extra.
+            self.log(f"[WARN] No se pudo generar el paquete delta frente a {base.name}: {e}")
+            return None
+        self.delta_path = delta_path
+        self.log(
+            f"[INFO] Delta frente a {base.name}: {len(stats.changed)} miembros nuevos o cambiados, "
+            f"{stats.reused} reutilizados, {len(stats.removed)} eliminados "
+            f"({_format_size(stats.delta_bytes)} frente a {_format_size(stats.full_bytes)})"
+        )
+        return delta_path
+
+    def _render_details_xml(self, platform_suffix: str) -> Optional[bytes]:
+        """details.xml del paquete con la plataforma final, formateado."""
         try:
             tree = ET.parse(self.details_xml_path)
             root = tree.getroot()
@@ -478,60 +1046,71 @@ class FlangCompiler:
             if pe is None:
                 pe = ET.SubElement(root, 'platform')
             pe.text = platform_suffix
-            
-            # Formatear y guardar XML
-            self._save_pretty_xml(tree, package_path / "details.xml")
+            return self._pretty_xml(tree).encode("utf-8")
         except Exception as e:
             self.log(f"[ERROR] Updating XML: {e}")
-    
-    def _save_pretty_xml(self, tree, filepath):
-        """Guarda un XML formateado con indentación."""
+            return None
+
+    @profiled("update_details_xml")
+    def _update_and_copy_details_xml(self, package_path: Path, platform_suffix: str) -> None:
+        """Actualiza y copia details.xml con formateo correcto."""
+        content = self._render_details_xml(platform_suffix)
+        if content is not None:
+            (package_path / "details.xml").write_bytes(content)
+
+    def _pretty_xml(self, tree) -> str:
+        """Serializa un XML formateado con indentación."""
         from xml.dom import minidom
-        
+
         root = tree.getroot() if hasattr(tree, 'getroot') else tree
         rough_string = ET.tostring(root, 'utf-8')
         reparsed = minidom.parseString(rough_string)
         pretty = reparsed.toprettyxml(indent="  ")
-        
+
         # Eliminar líneas vacías
         lines = [line for line in pretty.split('\n') if line.strip()]
-        
+        return '\n'.join(lines)
+
+    def _save_pretty_xml(self, tree, filepath):
+        """Guarda un XML formateado con indentación."""
         with open(filepath, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(lines))
+            f.write(self._pretty_xml(tree))
 
+    @profiled("compress_to_iflapp")
     def compress_to_iflapp(self, package_path: Path, output_file: Path) -> bool:
-        self.log(f"[INFO] Creando .iflapp: {output_file.name}")
+        self.log(f"[INFO] Creando .iflapp: {output_file.name} (nivel {self.compression_level})")
         try:
             if not package_path.is_dir():
                 self.last_error = f"No existe la carpeta de paquete: {package_path}"
                 self.log(f"[ERROR] {self.last_error}")
                 return False
 
-            files_added = 0
-            with zipfile.ZipFile(output_file, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for root, dirs, files in os.walk(package_path):
-                    for file in files:
-                        fp = Path(root) / file
-                        arcname = fp.relative_to(package_path)
-                        zipf.write(fp, arcname)
-                        files_added += 1
-
-            if files_added == 0 or not zipfile.is_zipfile(output_file):
-                self.last_error = "El archivo .iflapp generado está vacío o no es un ZIP válido."
-                self.log(f"[ERROR] {self.last_error}")
-                output_file.unlink(missing_ok=True)
-                return False
-            with zipfile.ZipFile(output_file) as zipf:
-                if "details.xml" not in zipf.namelist():
+            members = []
+            for root, dirs, files in os.walk(package_path):
+                for file in files:
+                    fp = Path(root) / file
+                    members.append((fp, fp.relative_to(package_path).as_posix()))
+
+            # El escritor comprime en paralelo, guarda sin recomprimir el contenido
+            # ya comprimido y publica el archivo solo si se completa.
+            with self._open_iflapp_writer(output_file) as writer:
+                writer.write_files(members)
+                if not writer.names:
+                    self.last_error = "El archivo .iflapp generado está vacío o no es un ZIP válido."
+                elif "details.xml" not in writer.names:
                     self.last_error = "El archivo .iflapp no contiene details.xml."
+                if not writer.names or "details.xml" not in writer.names:
+                    writer.abort()
                     self.log(f"[ERROR] {self.last_error}")
-                    output_file.unlink(missing_ok=True)
                     return False
+                write_manifest(writer, self._manifest_package_info(self._package_platform_suffix(package_path)))
+            self._write_delta_package(output_file)
             return True
         except Exception as e:
             self.log(f"[ERROR] Zip failed: {e}")
             return False
 
+    @profiled("cleanup_build_artifacts")
     def _cleanup_build_artifacts(self):
         """Limpia archivos generados por PyInstaller en el proyecto original."""
         self.log("[INFO] Limpiando archivos de compilación...")
@@ -555,6 +1134,7 @@ class FlangCompiler:
             except Exception as e:
                 self.log(f"[WARN] No se pudo eliminar {spec_file.name}: {e}")
 
+    @profiled("cleanup_package_folder")
     def _cleanup_package_folder(self, package_path: Path, iflapp_path: Path):
         """Elimina la carpeta temporal del paquete tras crear el `.iflapp`."""
         if package_path.exists() and package_path.is_dir() and iflapp_path.exists():
@@ -565,6 +1145,37 @@ class FlangCompiler:
             except OSError as exc:
                 self.log(f"[WARN] No se pudo eliminar la carpeta del paquete {package_path.name}: {exc}")
 
+    def handle_cancelled(self, target_platform: Optional[str]) -> None:
+        """Registra la cancelación y borra la carpeta de paquete a medio copiar.
+
+        ``dist/`` y ``build/`` los elimina ``_cleanup_build_artifacts``. El
+        ``.iflapp.part`` lo descarta el propio ``IflappWriter``; solo queda si
+        el proceso murió a mitad de escritura (worker terminado) y se borra aquí.
+        """
+        self.last_error = "Build cancelado por el usuario."
+        self.log(f"[WARN] {self.last_error}")
+        if not target_platform or not self.metadata:
+            return
+        platform_suffix = "Knosthalij" if target_platform == "Windows" else "Danenone"
+        package_path = self.output_path / ProjectNameFormatter.format_package_folder(
+            self.metadata['publisher'],
+            self.metadata['app'],
+            self.metadata['version'],
+            platform_suffix
+        )
+        if package_path.is_dir():
+            shutil.rmtree(package_path, ignore_errors=True)
+            self.log(f"[INFO] Paquete parcial eliminado: {package_path.name}")
+        partial = self.output_path / (ProjectNameFormatter.format_iflapp_filename(
+            self.metadata['publisher'],
+            self.metadata['app'],
+            self.metadata['version'],
+            platform_suffix
+        ) + ".part")
+        if partial.is_file():
+            partial.unlink()
+            self.log(f"[INFO] Paquete parcial eliminado: {partial.name}")
+
     def cleanup_processed_project(self, iflapp_path: Path, allow_delete: bool = False) -> bool:
         """Elimina el proyecto fuente solo cuando el llamador lo autoriza.
 
@@ -591,6 +1202,33 @@ class FlangCompiler:
             self.log(f"[WARN] No se pudo eliminar el proyecto procesado {source_path.name}: {exc}")
             return False
 
+    def write_profile(self, iflapp_path: Path, log_table: bool = True) -> Optional[Path]:
+        """Guarda el perfil del build junto al ``.iflapp`` y registra su resumen.
+
+        Con ``log_table=False`` solo se escribe la traza; lo usa la TUI, que
+        pinta la tabla por su cuenta a partir del JSON.
+        """
+        if not self.profiler.records:
+            return None
+        trace_path = trace_path_for(iflapp_path)
+        try:
+            self.profiler.write(trace_path, metadata={
+                "project": self.repo_path.name,
+                "artifact": Path(iflapp_path).name,
+                "platform": self.current_platform,
+                "jobs": self.jobs,
+                "bundle_mode": self.bundle_mode,
+            })
+        except OSError as e:
+            self.log(f"[WARN] No se pudo guardar el perfil del build: {e}")
+            return None
+        if log_table:
+            self.log("[INFO] Perfil del build por fases:")
+            for line in self.profiler.format_table().splitlines():
+                self.log(f"  {line}")
+        self.log(f"[INFO] Traza guardada en: {trace_path}")
+        return trace_path
+
     def run(self, build_mode="portable") -> Optional[Path]:
         if not self.parse_details_xml():
             return None
@@ -608,13 +1246,29 @@ class FlangCompiler:
             self.log("[WARN] Nothing to compile for this platform/config.")
             return None
         final_iflapp = None
+        platform_name = None
         try:
             for platform_name in platforms_to_compile:
+                self._checkpoint()
                 if not self.compile_binaries(platform_name):
                     return None
+                self._checkpoint()
+                platform_suffix = "Knosthalij" if platform_name == "Windows" else "Danenone"
+                if self.direct_archive:
+                    iflapp_path = self.output_path / ProjectNameFormatter.format_iflapp_filename(
+                        self.metadata['publisher'],
+                        self.metadata['app'],
+                        self.metadata['version'],
+                        platform_suffix
+                    )
+                    if not self.package_to_iflapp(platform_name, iflapp_path):
+                        return None
+                    final_iflapp = iflapp_path
+                    self.log(f"[SUCCESS] Package created: {iflapp_path}")
+                    self.cleanup_processed_project(iflapp_path)
+                    continue
                 if not self.create_package(platform_name):
                     return None
-                platform_suffix = "Knosthalij" if platform_name == "Windows" else "Danenone"
                 
                 # Usar ProjectNameFormatter para formato consistente
                 package_name = ProjectNameFormatter.format_package_folder(
@@ -639,16 +1293,23 @@ class FlangCompiler:
                     # Limpiar la carpeta temporal y el proyecto fuente tras validar el .iflapp.
                     self._cleanup_package_folder(last_package_path, iflapp_path)
                     self.cleanup_processed_project(iflapp_path)
+        except BuildCancelled:
+            self.handle_cancelled(platform_name)
+            return None
         finally:
             # Limpiar siempre al finalizar, sea éxito o error
             self._cleanup_build_artifacts()
             
+        if final_iflapp:
+            self.profile_path = self.write_profile(final_iflapp)
         return final_iflapp
 
 class BuildThread(QThread):
     progress = pyqtSignal(str)
     finished = pyqtSignal(str)
     error = pyqtSignal(str)
+    # Tabla de texto con el perfil por fases del build terminado.
+    profile_ready = pyqtSignal(str)
 
     def __init__(self, empresa, nombre, version, plataforma, parent=None, custom_path=None, base_dir=None, build_mode="portable"):
         super().__init__(parent)
@@ -672,6 +1333,11 @@ class BuildThread(QThread):
             "Sabias que se estima que hay mas de 20 millones de desarrolladores en el mundo?"
         ]
         self._curiosity_timer = None
+        self._cancel_token = CancellationToken()
+
+    def cancel(self):
+        """Cancela el build en curso; el hilo termina emitiendo ``error``."""
+        self._cancel_token.cancel()
 
     def emit_random_curiosity(self):
         import random
@@ -695,14 +1361,46 @@ class BuildThread(QThread):
             if not repo_path.exists():
                 self.error.emit(f"No se encontró la carpeta: {folder}")
                 return
-        compiler = FlangCompiler(repo_path, Path(self.base_dir or Path.cwd()), log_callback=self.handle_compiler_log)
+        output_path = Path(self.base_dir or Path.cwd())
+        if self._run_with_daemon(repo_path, output_path):
+            return
+        compiler = FlangCompiler(repo_path, output_path, log_callback=self.handle_compiler_log)
+        # PyInstaller fuera del proceso de la GUI: su memoria no se acumula build tras build.
+        compiler.pyinstaller_backend = "subprocess"
+        compiler.cancel_token = self._cancel_token
         result = compiler.run(build_mode=self.build_mode)
+        if compiler.profiler.records:
+            self.profile_ready.emit(compiler.profiler.format_table())
         if result:
             self.finished.emit(f"Paquete construido con exito: {result.name}")
         else:
             error_message = compiler.last_error or "Fallo la compilacion. Verifique los logs y los iconos .ico"
             self.error.emit(error_message)
 
+    def _run_with_daemon(self, repo_path: Path, output_path: Path) -> bool:
+        """Delega el build en el daemon local si hay uno activo."""
+        from lib.build_daemon import DaemonClient
+
+        client = DaemonClient.connect()
+        if client is None:
+            return False
+        self.progress.emit("Usando el daemon de build local...")
+        result = client.build(repo_path, output_path, log_callback=self.handle_compiler_log,
+                              cancel_token=self._cancel_token)
+        artifact = Path(result["artifact"]) if result.get("ok") else None
+        trace = trace_path_for(artifact) if artifact else None
+        if trace and trace.exists():
+            try:
+                rows = summary_rows_from_trace(load_trace(trace))
+                self.profile_ready.emit(format_summary_table(rows))
+            except (OSError, ValueError):
+                pass
+        if artifact:
+            self.finished.emit(f"Paquete construido con exito: {artifact.name}")
+        else:
+            self.error.emit(result.get("error") or "Fallo la compilacion. Verifique los logs y los iconos .ico")
+        return True
+
     def handle_compiler_log(self, msg):
         self.progress.emit(msg)
         if not hasattr(self, '_last_phrase_time'):
@@ -711,3 +1409,43 @@ class BuildThread(QThread):
             import random
             self.progress.emit(f"Curiosidad: {random.choice(self.curiosity_phrases)}")
             self._last_phrase_time = time.time()
+
+
+class BatchBuildThread(QThread):
+    """Compila todos los proyectos de ``base_dir`` con ``BatchBuilder``."""
+    progress = pyqtSignal(str)
+    finished = pyqtSignal(bool, str)
+
+    def __init__(self, base_dir, output_dir=None, jobs=None, parent=None):
+        super().__init__(parent)
+        self.base_dir = Path(base_dir)
+        self.output_dir = Path(output_dir or base_dir)
+        self.jobs = jobs or max(1, (os.cpu_count() or 2) // 2)
+        self._cancel_token = CancellationToken()
+
+    def cancel(self):
+        """Cancela el lote; los builds en curso se detienen y el hilo emite ``finished``."""
+        self._cancel_token.cancel()
+
+    def run(self):
+        from lib.batch_builder import BatchBuilder, format_batch_summary
+
+        builder = BatchBuilder(self.base_dir, self.output_dir, jobs=self.jobs, log_callback=self._log,
+                               cancel_token=self._cancel_token)
+        try:
+            results = builder.run()
+        except BuildCancelled:
+            self.finished.emit(False, "Build por lotes cancelado.")
+            return
+        except Exception as e:
+            self.finished.emit(False, str(e))
+            return
+        if not results:
+            self.finished.emit(True, "No hay proyectos que compilar.")
+            return
+        self.finished.emit(all(result.ok for result in results), format_batch_summary(results))
+
+    def _log(self, msg):
+        # Solo se reenvían las líneas de progreso del lote, no los logs por proyecto.
+        if msg.startswith("[INFO]"):
+            self.progress.emit(msg)
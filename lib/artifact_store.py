@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+"""
+Almacén de miembros de ``.iflapp`` direccionado por contenido y paquetes delta.
+
+Cada ``.iflapp`` lleva un manifiesto (``.iflapp-manifest.json``) con el SHA-256
+y el tamaño de cada miembro. Con dos manifiestos se sabe qué cambió entre
+versiones sin descomprimir nada:
+
+* ``ArtifactStore`` guarda el resultado DEFLATE de cada contenido ya comprimido;
+  ``IflappWriter`` lo consulta y los miembros que no cambiaron entre versiones
+  (assets, docs, ``lib/``) se copian del almacén en lugar de recomprimirse.
+* ``write_delta_package`` genera un ``.iflapp`` con solo los miembros nuevos o
+  modificados y una referencia a la versión base; ``apply_delta`` reconstruye
+  el paquete completo a partir de la base y el delta.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import struct
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from lib.build_cache import default_cache_dir
+from lib.iflapp_writer import DEFAULT_COMPRESSION_LEVEL, IflappWriter
+
+MANIFEST_NAME = ".iflapp-manifest.json"
+MANIFEST_FORMAT = 1
+# Tamaño máximo por defecto del almacén (1 GiB).
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+_OBJECT_MAGIC = b"PMA1"
+# magic, método, crc, tamaño original, tamaño comprimido
+_OBJECT_HEADER = struct.Struct("<4sBIQQ")
+
+
+@dataclass
+class StoredMember:
+    path: Path
+    offset: int
+    method: int
+    crc: int
+    file_size: int
+    compress_size: int
+
+
+class ArtifactStore:
+    """Miembros comprimidos por ``(sha256 del contenido, nivel)`` con expulsión LRU."""
+
+    def __init__(self, root: Optional[Path] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root or default_cache_dir()) / "artifacts"
+        self.max_bytes = max_bytes
+
+    def _object_path(self, digest: str, level: int) -> Path:
+        return self.root / digest[:2] / f"{digest}-{level}"
+
+    def get(self, digest: str, level: int) -> Optional[StoredMember]:
+        path = self._object_path(digest, level)
+        try:
+            with open(path, "rb") as handle:
+                header = handle.read(_OBJECT_HEADER.size)
+            magic, method, crc, file_size, compress_size = _OBJECT_HEADER.unpack(header)
+            if magic != _OBJECT_MAGIC or path.stat().st_size != _OBJECT_HEADER.size + compress_size:
+                return None
+            os.utime(path)
+        except (OSError, struct.error):
+            return None
+        return StoredMember(path, _OBJECT_HEADER.size, method, crc, file_size, compress_size)
+
+    def put(self, digest: str, level: int, member) -> None:
+        """Guarda el payload comprimido de *member* (un ``_PreparedMember``)."""
+        path = self._object_path(digest, level)
+        if path.exists() or member.payload is None:
+            return
+        staging = path.with_name(f"{path.name}.tmp-{os.getpid()}-{id(member)}")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(staging, "wb") as handle:
+                handle.write(_OBJECT_HEADER.pack(_OBJECT_MAGIC, member.method, member.crc,
+                                                 member.file_size, member.compress_size))
+                member.payload.seek(0)
+                for chunk in iter(lambda: member.payload.read(1024 * 1024), b""):
+                    handle.write(chunk)
+            os.replace(staging, path)
+        except OSError:
+            try:
+                staging.unlink()
+            except OSError:
+                pass
+
+    def _objects(self) -> List[Tuple[float, int, Path]]:
+        objects = []
+        if not self.root.is_dir():
+            return objects
+        for bucket in self.root.iterdir():
+            if not bucket.is_dir():
+                continue
+            for entry in bucket.iterdir():
+                if ".tmp-" in entry.name:
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                objects.append((stat.st_mtime, stat.st_size, entry))
+        return objects
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self._objects())
+
+    def evict(self) -> List[Path]:
+        """Elimina los objetos menos usados hasta quedar bajo ``max_bytes``."""
+        objects = sorted(self._objects(), key=lambda item: item[0])
+        total = sum(size for _, size, _ in objects)
+        removed = []
+        for _, size, entry in objects:
+            if total <= self.max_bytes:
+                break
+            try:
+                entry.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed.append(entry)
+        return removed
+
+
+# ── Manifiestos ──────────────────────────────────────────────────────────────
+
+
+def build_manifest(digests: Dict[str, Tuple[str, int]], package: Optional[Dict] = None) -> Dict:
+    """Manifiesto determinista: mismo contenido, mismos bytes."""
+    return {
+        "format": MANIFEST_FORMAT,
+        "package": dict(package or {}),
+        "members": {
+            name: {"sha256": digest, "size": size}
+            for name, (digest, size) in sorted(digests.items())
+            if name != MANIFEST_NAME
+        },
+    }
+
+
+def manifest_bytes(manifest: Dict) -> bytes:
+    return json.dumps(manifest, indent=1, sort_keys=True, ensure_ascii=False).encode("utf-8")
+
+
+def write_manifest(writer: IflappWriter, package: Optional[Dict] = None) -> Dict:
+    """Añade el manifiesto de lo ya escrito en *writer* como último miembro."""
+    manifest = build_manifest(writer.digests, package)
+    writer.write_bytes(MANIFEST_NAME, manifest_bytes(manifest))
+    return manifest
+
+
+def parse_manifest(data: bytes) -> Optional[Dict]:
+    """Decodifica un manifiesto o devuelve ``None`` si no es de un formato conocido."""
+    try:
+        manifest = json.loads(data.decode("utf-8"))
+    except ValueError:
+        return None
+    if not isinstance(manifest, dict) or manifest.get("format") != MANIFEST_FORMAT:
+        return None
+    if not isinstance(manifest.get("members"), dict):
+        return None
+    return manifest
+
+
+def read_manifest(iflapp: Path) -> Optional[Dict]:
+    """Manifiesto de un ``.iflapp`` o ``None`` si no tiene (paquetes antiguos)."""
+    try:
+        with zipfile.ZipFile(iflapp) as archive:
+            data = archive.read(MANIFEST_NAME)
+    except (OSError, KeyError, zipfile.BadZipFile):
+        return None
+    return parse_manifest(data)
+
+
+def manifest_id(manifest: Dict) -> str:
+    """Identidad de un paquete completo: hash de su manifiesto sin la sección delta."""
+    core = {key: value for key, value in manifest.items() if key != "delta"}
+    return hashlib.sha256(manifest_bytes(core)).hexdigest()
+
+
+# ── Paquetes delta ───────────────────────────────────────────────────────────
+
+
+@dataclass
+class DeltaStats:
+    changed: List[str]
+    removed: List[str]
+    reused: int
+    full_bytes: int
+    delta_bytes: int
+
+
+# Miembros que un delta lleva siempre, aunque no cambien, para que el
+# instalador pueda leer los metadatos del paquete sin la base.
+_ALWAYS_IN_DELTA = ("details.xml",)
+
+
+def write_delta_package(
+    full_iflapp: Path,
+    base_iflapp: Path,
+    output: Path,
+    level: int = DEFAULT_COMPRESSION_LEVEL,
+) -> DeltaStats:
+    """Escribe en *output* solo los miembros de *full_iflapp* que difieren de *base_iflapp*."""
+    manifest = read_manifest(full_iflapp)
+    base = read_manifest(base_iflapp)
+    if manifest is None:
+        raise ValueError(f"{Path(full_iflapp).name} no tiene manifiesto de miembros")
+    if base is None:
+        raise ValueError(f"{Path(base_iflapp).name} no tiene manifiesto; no puede usarse como base")
+    if "delta" in base:
+        raise ValueError(f"{Path(base_iflapp).name} es un delta; la base debe ser un paquete completo")
+
+    members = manifest["members"]
+    base_members = base["members"]
+    changed = [
+        name for name, entry in members.items()
+        if base_members.get(name, {}).get("sha256") != entry["sha256"] or name in _ALWAYS_IN_DELTA
+    ]
+    removed = sorted(set(base_members) - set(members))
+    delta_manifest = dict(manifest)
+    delta_manifest["delta"] = {
+        "base": {
+            "file": Path(base_iflapp).name,
+            "version": base.get("package", {}).get("version", ""),
+            "manifest_sha256": manifest_id(base),
+        },
+        # Junto con los hashes de "members", permiten parchear una instalación
+        # existente sin reconstruir el paquete completo.
+        "added": sorted(set(members) - set(base_members)),
+        "changed": sorted(
+            name for name in set(members) & set(base_members)
+            if base_members[name].get("sha256") != members[name]["sha256"]
+        ),
+        "removed": removed,
+    }
+    with IflappWriter(output, level=level) as writer:
+        writer.copy_members(full_iflapp, changed, {name: members[name]["sha256"] for name in changed})
+        writer.write_bytes(MANIFEST_NAME, manifest_bytes(delta_manifest))
+    return DeltaStats(
+        changed=changed,
+        removed=removed,
+        reused=len(members) - len(changed),
+        full_bytes=Path(full_iflapp).stat().st_size,
+        delta_bytes=Path(output).stat().st_size,
+    )
+
+
+def is_delta_package(iflapp: Path) -> bool:
+    manifest = read_manifest(iflapp)
+    return bool(manifest and "delta" in manifest)
+
+
+def apply_delta(base_iflapp: Path, delta_iflapp: Path, output: Path) -> Dict:
+    """Reconstruye el paquete completo de *delta_iflapp* sobre *base_iflapp*.
+
+    Los miembros sin cambios se copian de la base sin descomprimir; solo se
+    acepta la base exacta con la que se generó el delta.
+    """
+    manifest = read_manifest(delta_iflapp)
+    if manifest is None or "delta" not in manifest:
+        raise ValueError(f"{Path(delta_iflapp).name} no es un paquete delta")
+    base = read_manifest(base_iflapp)
+    expected = manifest["delta"]["base"]["manifest_sha256"]
+    if base is None or manifest_id(base) != expected:
+        raise ValueError(
+            f"{Path(base_iflapp).name} no es la base del delta "
+            f"({manifest['delta']['base'].get('file')})"
+        )
+    members = manifest["members"]
+    with zipfile.ZipFile(delta_iflapp) as delta_zip:
+        in_delta = set(delta_zip.namelist())
+    from_delta = [name for name in members if name in in_delta]
+    from_base = [name for name in members if name not in in_delta]
+    for name in from_base:
+        if base["members"].get(name, {}).get("sha256") != members[name]["sha256"]:
+            raise ValueError(f"La base no contiene la versión esperada de {name}")
+
+    full = {key: value for key, value in manifest.items() if key != "delta"}
+    digests = {name: entry["sha256"] for name, entry in members.items()}
+    with IflappWriter(output) as writer:
+        writer.copy_members(base_iflapp, from_base, digests)
+        writer.copy_members(delta_iflapp, from_delta, digests)
+        writer.write_bytes(MANIFEST_NAME, manifest_bytes(full))
+    return full
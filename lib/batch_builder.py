@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+"""
+Compilación por lotes de todos los proyectos de BASE_DIR.
+
+Los proyectos se descubren con el mismo escaneo de ``details.xml`` que usa el
+gestor de la GUI y se reparten entre un pool acotado de procesos. Cada worker
+importa PyInstaller una sola vez y compila varios proyectos seguidos, en lugar
+de pagar el arranque del intérprete por cada invocación de ``--buildthis``.
+
+El orden lo decide una cola de prioridad (``heapq``): primero los proyectos que
+cambiaron desde su último build correcto y, dentro de cada grupo, los que más
+tardaron la vez anterior, para que los builds largos no queden al final.
+
+Los workers se crean con ``spawn`` (el lote se lanza desde un QThread de la
+GUI, donde ``fork()`` no es seguro) y un ``CancellationToken`` detiene el lote:
+se termina el pool y se lanza ``BuildCancelled``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import heapq
+import json
+import multiprocessing
+import os
+import queue
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+from lib.build_cache import default_cache_dir
+from lib.cancellation import BuildCancelled, CancellationToken
+from lib.project_scan import scan_project_dirs
+
+# Carpetas generadas que no cuentan para decidir si un proyecto cambió.
+_FINGERPRINT_PRUNE = frozenset({".git", "__pycache__", "build", "dist", ".idea", ".vscode"})
+_CTX = multiprocessing.get_context("spawn")
+
+
+def _is_build_output(relative_root: str, name: str, files: Set[str]) -> bool:
+    """Archivos que el propio build escribe en el proyecto y no cuentan como cambios.
+
+    ``_prepare_pyinstaller_data_dirs`` toca los marcadores ``.<dir>-container``,
+    en Linux el icono ``.ico`` se convierte a un ``.png`` a su lado y
+    ``_cleanup_build_artifacts`` borra los ``.spec`` de la raíz.
+    """
+    if name.startswith(".") and name.endswith("-container"):
+        return True
+    if name.lower().endswith(".png") and name[:-4] + ".ico" in files:
+        return True
+    return relative_root == "." and name.endswith(".spec")
+
+
+def project_fingerprint(project: Path) -> str:
+    """Huella barata del proyecto: ruta, tamaño y mtime de cada archivo fuente."""
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(project):
+        dirs[:] = sorted(d for d in dirs if d not in _FINGERPRINT_PRUNE)
+        relative_root = Path(root).relative_to(project).as_posix()
+        names = set(files)
+        for name in sorted(files):
+            if _is_build_output(relative_root, name, names):
+                continue
+            try:
+                stat = os.stat(os.path.join(root, name))
+            except OSError:
+                continue
+            digest.update(f"{relative_root}/{name}\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode("utf-8"))
+    return digest.hexdigest()
+
+
+@dataclass
+class BatchResult:
+    project: Path
+    ok: bool
+    duration: float
+    artifact: Optional[Path] = None
+    error: str = ""
+    changed: bool = True
+    logs: List[str] = field(default_factory=list)
+
+
+class BatchState:
+    """Huella y duración del último build de cada proyecto (``batch-state.json``)."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or default_cache_dir() / "batch-state.json")
+        try:
+            with open(self.path, "r", encoding="utf-8") as handle:
+                self.entries: Dict[str, Dict] = json.load(handle)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def is_changed(self, project: Path, fingerprint: str) -> bool:
+        entry = self.entries.get(str(project))
+        return not entry or not entry.get("ok") or entry.get("fingerprint") != fingerprint
+
+    def last_duration(self, project: Path) -> float:
+        return float(self.entries.get(str(project), {}).get("duration", 0.0))
+
+    def record(self, result: BatchResult, fingerprint: str) -> None:
+        self.entries[str(result.project)] = {
+            "fingerprint": fingerprint,
+            "ok": result.ok,
+            "duration": round(result.duration, 3),
+            "finished": time.time(),
+        }
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as handle:
+            json.dump(self.entries, handle, indent=1)
+        os.replace(tmp, self.path)
+
+
+def _build_project_in_worker(task, cancel_token: Optional[CancellationToken] = None) -> BatchResult:
+    """Compila un proyecto completo con ``FlangCompiler.run`` en un worker del pool.
+
+    *cancel_token* solo se usa en el modo secuencial, dentro del propio proceso.
+    """
+    project, output_path, options, changed = task
+    # Import diferido: el proceso padre (GUI/CLI) no necesita cargar BuildThread
+    # para planificar, y cada worker lo importa una sola vez.
+    from lib.BuildThread import FlangCompiler
+
+    logs: List[str] = []
+    start = time.perf_counter()
+    compiler = FlangCompiler(project, output_path, log_callback=logs.append)
+    compiler.use_build_cache = options.get("use_build_cache", True)
+    compiler.use_artifact_store = options.get("use_artifact_store", True)
+    compiler.auto_excludes = options.get("auto_excludes", True)
+    compiler.compression_level = options.get("compression_level", compiler.compression_level)
+    compiler.direct_archive = options.get("direct_archive", False)
+    if cancel_token is not None:
+        compiler.cancel_token = cancel_token
+    try:
+        artifact = compiler.run()
+    except Exception as e:
+        compiler.last_error = str(e)
+        artifact = None
+    error = "" if artifact else (compiler.last_error or "Fallo la compilacion")
+    return BatchResult(Path(project), artifact is not None, time.perf_counter() - start,
+                       artifact, error, changed, logs)
+
+
+def _cleanup_interrupted_build(project: Path, output_path: Path, log_callback: Callable[[str], None]) -> None:
+    """Limpia lo que deja en *project* un worker terminado a mitad de build.
+
+    ``pool.terminate()`` mata el proceso sin pasar por el ``finally`` de
+    ``FlangCompiler.run``, así que aquí se repite su limpieza de cancelación.
+    """
+    from lib.BuildThread import FlangCompiler
+
+    compiler = FlangCompiler(project, output_path, log_callback=log_callback)
+    compiler._cleanup_build_artifacts()
+    if compiler.details_xml_path.is_file() and compiler.parse_details_xml():
+        try:
+            compiler.handle_cancelled(compiler.current_platform)
+        except (OSError, ValueError) as e:
+            log_callback(f"[WARN] No se pudo limpiar el paquete parcial: {e}")
+
+
+class BatchBuilder:
+    """Planifica y ejecuta los builds de todos los proyectos de un directorio."""
+
+    def __init__(
+        self,
+        base_dir: Path,
+        output_path: Path,
+        jobs: int = 1,
+        options: Optional[Dict] = None,
+        only_changed: bool = False,
+        state: Optional[BatchState] = None,
+        log_callback: Optional[Callable[[str], None]] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ):
+        self.base_dir = Path(base_dir)
+        self.output_path = Path(output_path)
+        self.jobs = max(1, int(jobs))
+        self.options = dict(options or {})
+        self.only_changed = only_changed
+        self.state = state or BatchState()
+        self.log_callback = log_callback
+        self.cancel_token = cancel_token or CancellationToken()
+
+    def log(self, message: str) -> None:
+        if self.log_callback:
+            self.log_callback(message)
+        else:
+            print(message)
+
+    def discover(self) -> List[Path]:
+        projects = [Path(folder) for folder in scan_project_dirs(self.base_dir)]
+        # No compilar los paquetes ya generados que vivan dentro de BASE_DIR.
+        output = self.output_path.resolve()
+        return [p for p in projects if output not in p.resolve().parents]
+
+    def plan(self, projects: List[Path]):
+        """Cola de prioridad ``(grupo, -duración previa, nombre)`` con sus huellas."""
+        heap = []
+        fingerprints: Dict[Path, str] = {}
+        for project in projects:
+            fingerprint = project_fingerprint(project)
+            fingerprints[project] = fingerprint
+            changed = self.state.is_changed(project, fingerprint)
+            if self.only_changed and not changed:
+                continue
+            priority = (0 if changed else 1, -self.state.last_duration(project), project.name)
+            heapq.heappush(heap, (priority, str(project), changed))
+        return heap, fingerprints
+
+    def run(self, projects: Optional[List[Path]] = None) -> List[BatchResult]:
+        """Compila los proyectos planificados y devuelve sus resultados.
+
+        Si se cancela ``cancel_token`` se lanza ``BuildCancelled``; los
+        proyectos ya terminados quedan registrados en el estado.
+        """
+        projects = self.discover() if projects is None else [Path(p) for p in projects]
+        heap, fingerprints = self.plan(projects)
+        total = len(heap)
+        self.log(f"[INFO] Build por lotes: {total} proyecto(s), {self.jobs} proceso(s)")
+        if not total:
+            return []
+        self.output_path.mkdir(parents=True, exist_ok=True)
+
+        results: List[BatchResult] = []
+
+        def finish(result: BatchResult) -> None:
+            results.append(result)
+            for line in result.logs:
+                self.log(f"[{result.project.name}] {line}")
+            status = "OK" if result.ok else "ERROR"
+            self.log(f"[INFO] [{len(results)}/{total}] {result.project.name}: {status} ({result.duration:.1f}s)")
+            self.state.record(result, fingerprints[result.project])
+            self.state.save()
+
+        def next_task():
+            _, project, changed = heapq.heappop(heap)
+            return (Path(project), self.output_path, self.options, changed)
+
+        if self.jobs == 1 or total == 1:
+            while heap:
+                self.cancel_token.raise_if_cancelled()
+                result = _build_project_in_worker(next_task(), self.cancel_token)
+                # Un build cancelado no es un fallo del proyecto: no se registra.
+                self.cancel_token.raise_if_cancelled()
+                finish(result)
+            return results
+
+        # maxtasksperchild=None: cada worker reutiliza PyInstaller ya importado.
+        # Las tareas se envían de una en una al liberarse un hueco para que el
+        # orden de la cola de prioridad se respete también con varios procesos.
+        done: "queue.Queue" = queue.Queue()
+        pool = _CTX.Pool(processes=min(self.jobs, total))
+        running: List[Path] = []
+        try:
+            in_flight = 0
+            while heap or in_flight:
+                while heap and in_flight < self.jobs:
+                    task = next_task()
+                    pool.apply_async(_build_project_in_worker, (task,),
+                                     callback=done.put, error_callback=done.put)
+                    running.append(task[0])
+                    in_flight += 1
+                try:
+                    item = done.get(timeout=0.25)
+                except queue.Empty:
+                    item = None
+                # terminate() en el except de abajo mata los builds en curso.
+                self.cancel_token.raise_if_cancelled()
+                if item is None:
+                    continue
+                in_flight -= 1
+                if isinstance(item, BaseException):
+                    raise item
+                running.remove(item.project)
+                finish(item)
+            pool.close()
+        except BaseException:
+            pool.terminate()
+            pool.join()
+            for project in running:
+                self.log(f"[WARN] [{project.name}] Build interrumpido; limpiando archivos parciales")
+                _cleanup_interrupted_build(project, self.output_path,
+                                           lambda msg, name=project.name: self.log(f"[{name}] {msg}"))
+            raise
+        finally:
+            pool.join()
+        return results
+
+
+def format_batch_summary(results: List[BatchResult]) -> str:
+    """Matriz de resultados: proyecto, estado, duración y artefacto o error."""
+    header = ("Proyecto", "Estado", "Duración", "Cambió", "Resultado")
+    rows = [
+        (
+            result.project.name,
+            "OK" if result.ok else "ERROR",
+            f"{result.duration:.1f}s",
+            "sí" if result.changed else "no",
+            result.artifact.name if result.artifact else result.error.splitlines()[0] if result.error else "",
+        )
+        for result in results
+    ]
+    widths = [max(len(row[i]) for row in [header] + rows) for i in range(len(header))]
+    lines = ["  ".join(cell.ljust(width) for cell, width in zip(header, widths))]
+    lines.append("  ".join("-" * width for width in widths))
+    lines.extend("  ".join(cell.ljust(width) for cell, width in zip(row, widths)) for row in rows)
+    ok = sum(1 for result in results if result.ok)
+    total_time = sum(result.duration for result in results)
+    lines.append(f"{ok} correctos, {len(results) - ok} fallidos, {total_time:.1f}s de compilación acumulada")
+    return "\n".join(lines)
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""
+Caché persistente de ejecutables PyInstaller direccionada por contenido.
+
+Cada entrada se identifica con un SHA-256 de todo lo que influye en el binario
+(script, imports locales, details.xml, icono, carpetas ``add_data``, hidden
+imports, versión de PyInstaller e intérprete). Si nada cambió, el ejecutable se
+reutiliza sin volver a invocar PyInstaller.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import platform
+import shutil
+import sys
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+# Tamaño máximo por defecto de la caché (2 GiB).
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+_CHUNK_SIZE = 1024 * 1024
+_ENTRY_MARKER = ".last-used"
+
+
+def default_cache_dir() -> Path:
+    """Directorio de caché del usuario, configurable con PACKAGEMAKER_CACHE_DIR."""
+    override = os.environ.get("PACKAGEMAKER_CACHE_DIR")
+    if override:
+        return Path(override).expanduser()
+    if sys.platform.startswith("win"):
+        base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), "AppData", "Local")
+        return Path(base) / "PackageMaker" / "cache"
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "packagemaker"
+
+
+def _hash_file(digest, path: Path) -> None:
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+
+
+class BuildCache:
+    """Almacén de ejecutables con clave de contenido y expulsión LRU por tamaño."""
+
+    def __init__(self, root: Optional[Path] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root or default_cache_dir()) / "builds"
+        self.max_bytes = max_bytes
+
+    def compute_key(
+        self,
+        script_path: Path,
+        local_imports: Sequence[Path] = (),
+        extra_files: Sequence[Optional[Path]] = (),
+        data_dirs: Sequence[Tuple[str, str]] = (),
+        hidden_imports: Sequence[str] = (),
+        options: Sequence[str] = (),
+        pyinstaller_version: str = "",
+    ) -> str:
+        digest = hashlib.sha256()
+
+        def feed(label: str, value: str = "") -> None:
+            digest.update(f"{label}\0{value}\0".encode("utf-8"))
+
+        feed("python", f"{sys.executable}|{sys.version}|{platform.platform()}")
+        feed("pyinstaller", pyinstaller_version)
+        feed("script", Path(script_path).name)
+        _hash_file(digest, Path(script_path))
+        for module in sorted(Path(p) for p in local_imports):
+            feed("import", module.name)
+            _hash_file(digest, module)
+        for extra in extra_files:
+            if extra and Path(extra).is_file():
+                feed("file", Path(extra).name)
+                _hash_file(digest, Path(extra))
+        for src, dst in sorted(data_dirs):
+            source = Path(src)
+            feed("data", dst)
+            if source.is_file():
+                _hash_file(digest, source)
+                continue
+            for dirpath, dirnames, filenames in os.walk(source):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    file_path = Path(dirpath) / filename
+                    feed("member", file_path.relative_to(source).as_posix())
+                    _hash_file(digest, file_path)
+        for name in sorted(set(hidden_imports)):
+            feed("hidden", name)
+        for option in options:
+            feed("option", option)
+        return digest.hexdigest()
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def get(self, key: str, exe_name: str) -> Optional[Path]:
+        """Ruta del ejecutable cacheado o ``None``. Un acierto lo marca como reciente."""
+        entry = self._entry_dir(key)
+        exe_path = entry / exe_name
+        if not exe_path.is_file():
+            return None
+        try:
+            (entry / _ENTRY_MARKER).touch()
+        except OSError:
+            pass
+        return exe_path
+
+    def put(self, key: str, exe_path: Path) -> Optional[Path]:
+        """Guarda *exe_path* bajo *key* de forma atómica y aplica el límite de tamaño."""
+        entry = self._entry_dir(key)
+        if (entry / Path(exe_path).name).is_file():
+            return entry / Path(exe_path).name
+        staging = entry.with_name(f"{key}.tmp-{os.getpid()}")
+        try:
+            staging.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(exe_path, staging / Path(exe_path).name)
+            (staging / _ENTRY_MARKER).touch()
+            try:
+                os.replace(staging, entry)
+            except OSError:
+                # Otro worker publicó la misma entrada primero.
+                shutil.rmtree(staging, ignore_errors=True)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            return None
+        self.evict()
+        return entry / Path(exe_path).name
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        entries = []
+        if not self.root.is_dir():
+            return entries
+        for bucket in self.root.iterdir():
+            if not bucket.is_dir():
+                continue
+            for entry in bucket.iterdir():
+                if not entry.is_dir() or ".tmp-" in entry.name:
+                    continue
+                size = sum(f.stat().st_size for f in entry.iterdir() if f.is_file())
+                marker = entry / _ENTRY_MARKER
+                last_used = marker.stat().st_mtime if marker.exists() else entry.stat().st_mtime
+                entries.append((last_used, size, entry))
+        return entries
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self) -> List[Path]:
+        """Elimina las entradas menos usadas hasta quedar bajo ``max_bytes``."""
+        entries = sorted(self._entries(), key=lambda item: item[0])
+        total = sum(size for _, size, _ in entries)
+        removed = []
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            removed.append(entry)
+        return removed
+
+
+class ProjectWorkpath:
+    """Workpath persistente de PyInstaller compartido por los scripts de un proyecto.
+
+    PyInstaller guarda en ``work/<script>`` los TOC de Analysis, PYZ y PKG; si
+    el directorio sobrevive entre compilaciones, solo rehace las fases cuyas
+    entradas cambiaron. Cada script guarda una huella de sus dependencias y el
+    directorio se descarta cuando esa huella cambia.
+    """
+
+    _FINGERPRINT_FILE = ".pm-fingerprint"
+    _COLD_TIME_FILE = ".pm-cold-seconds"
+
+    def __init__(self, repo_path: Path, root: Optional[Path] = None):
+        project_id = hashlib.sha256(str(Path(repo_path).resolve()).encode("utf-8")).hexdigest()[:16]
+        self.path = Path(root or default_cache_dir()) / "workpaths" / project_id
+
+    def script_dir(self, script_name: str) -> Path:
+        return self.path / "work" / script_name
+
+    def prepare(self, script_name: str, fingerprint: str) -> bool:
+        """Prepara el workpath; devuelve ``True`` si se reutiliza un análisis previo."""
+        self.path.mkdir(parents=True, exist_ok=True)
+        work = self.script_dir(script_name)
+        stamp = work / self._FINGERPRINT_FILE
+        try:
+            if stamp.read_text(encoding="utf-8") == fingerprint:
+                return True
+        except OSError:
+            pass
+        shutil.rmtree(work, ignore_errors=True)
+        return False
+
+    def commit(self, script_name: str, fingerprint: str, elapsed: float, warm: bool) -> Optional[float]:
+        """Registra una compilación correcta y devuelve los segundos ahorrados, si se conocen."""
+        work = self.script_dir(script_name)
+        work.mkdir(parents=True, exist_ok=True)
+        (work / self._FINGERPRINT_FILE).write_text(fingerprint, encoding="utf-8")
+        cold_file = work / self._COLD_TIME_FILE
+        if not warm:
+            cold_file.write_text(f"{elapsed:.3f}", encoding="utf-8")
+            return None
+        try:
+            cold = float(cold_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return cold - elapsed
+
+    def invalidate(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
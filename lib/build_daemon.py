@@ -0,0 +1,413 @@
+# -*- coding: utf-8 -*-
+"""
+Servidor de builds local y persistente.
+
+Mantiene procesos worker "calientes" que ya importaron ``lib.BuildThread`` y
+PyInstaller, de modo que builds cortos y repetidos no pagan el arranque en
+frío. Cada worker atiende un build a la vez: ``EmbeddedPyInstaller`` cambia
+``sys.argv`` y el directorio actual, así que la concurrencia se obtiene con
+procesos, nunca con hilos dentro del mismo proceso.
+
+El transporte es ``multiprocessing.connection`` (socket Unix en POSIX, named
+pipe en Windows) autenticado con una clave aleatoria que se guarda en
+``daemon.json`` dentro del directorio de caché, con permisos solo para el
+usuario. Los clientes (CLI, TUI, GUI) envían un trabajo y reciben los logs en
+streaming hasta el mensaje final con el resultado.
+"""
+
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import queue
+import secrets
+import signal
+import sys
+import threading
+from multiprocessing.connection import Client, Connection, Listener
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from lib.build_cache import default_cache_dir
+
+DEFAULT_WORKERS = 2
+# Reciclar un worker tras N builds acota fugas de memoria de PyInstaller/hooks.
+MAX_JOBS_PER_WORKER = 50
+_PROTOCOL = 1
+# "spawn": los workers se reponen desde hilos del servidor, donde fork() no es seguro.
+_CTX = multiprocessing.get_context("spawn")
+
+
+def daemon_info_path() -> Path:
+    return default_cache_dir() / "daemon.json"
+
+
+def _default_address() -> str:
+    if sys.platform == "win32":
+        user = os.environ.get("USERNAME", "user")
+        return rf"\\.\pipe\packagemaker-build-{user}"
+    return str(default_cache_dir() / "daemon.sock")
+
+
+def _apply_options(compiler, options: Dict) -> None:
+    compiler.jobs = max(1, int(options.get("jobs") or 1))
+    compiler.use_build_cache = options.get("use_build_cache", True)
+    compiler.use_artifact_store = options.get("use_artifact_store", True)
+    compiler.bundle_mode = options.get("bundle_mode") or "onefile"
+    compiler.auto_excludes = options.get("auto_excludes", True)
+    compiler.compression_level = options.get("compression_level", compiler.compression_level)
+    compiler.direct_archive = options.get("direct_archive", False)
+    compiler.delta_base = options.get("delta_base")
+
+
+def _worker_main(conn: Connection) -> None:
+    """Bucle de un worker: importa una vez y compila trabajos hasta recibir ``None``."""
+    # Ctrl+C lo gestiona el servidor, que detiene los workers ordenadamente.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from lib.BuildThread import FlangCompiler
+
+    try:
+        # Precalentar PyInstaller y su maquinaria de hooks.
+        import PyInstaller.__main__  # noqa: F401
+        import PyInstaller.building.build_main  # noqa: F401
+    except Exception:
+        pass
+    home = os.getcwd()
+    argv = sys.argv[:]
+    conn.send(("ready", os.getpid()))
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        if not isinstance(job, dict):
+            # Cancelación que llegó cuando el build ya había terminado.
+            continue
+        done = threading.Event()
+        watcher = None
+        try:
+            compiler = FlangCompiler(job["project"], job["output"],
+                                     log_callback=lambda line: conn.send(("log", line)))
+            _apply_options(compiler, job.get("options", {}))
+            watcher = threading.Thread(target=_watch_cancel, args=(conn, compiler, done), daemon=True)
+            watcher.start()
+            artifact = compiler.run()
+            error = "" if artifact else (compiler.last_error or "Fallo la compilacion")
+            result = {"ok": artifact is not None,
+                      "artifact": str(artifact) if artifact else None,
+                      "error": error}
+        except Exception as e:
+            result = {"ok": False, "artifact": None, "error": str(e)}
+        finally:
+            # El vigilante debe soltar la conexión antes de enviar el resultado:
+            # el siguiente trabajo lo tiene que leer este bucle, no él.
+            done.set()
+            if watcher is not None:
+                watcher.join()
+            os.chdir(home)
+            sys.argv = argv[:]
+        conn.send(("result", result))
+
+
+def _watch_cancel(conn: Connection, compiler, done: threading.Event) -> None:
+    """Durante un build, atiende el ``("cancel", None)`` que envía el servidor."""
+    while not done.is_set():
+        try:
+            if conn.poll(0.25) and not done.is_set():
+                message = conn.recv()
+                if isinstance(message, tuple) and message[0] == "cancel":
+                    compiler.cancel()
+                    return
+        except (EOFError, OSError):
+            return
+
+
+class _Worker:
+    def __init__(self):
+        self.conn, child = _CTX.Pipe()
+        # daemon=False: FlangCompiler puede abrir su propio Pool con --jobs.
+        self.process = _CTX.Process(target=_worker_main, args=(child,), daemon=False)
+        self.process.start()
+        child.close()
+        self.jobs = 0
+        self.conn.recv()  # ("ready", pid): importaciones en caliente completadas
+
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(5)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+
+
+class BuildDaemon:
+    """Acepta trabajos de build y los reparte entre workers precalentados."""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, address: Optional[str] = None, log_callback=None):
+        self.workers = max(1, int(workers))
+        self.address = address or _default_address()
+        self.authkey = secrets.token_bytes(32)
+        self.log_callback = log_callback or print
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._all: List[_Worker] = []
+        self._stopping = threading.Event()
+        self._active = 0
+        self._lock = threading.Lock()
+        self._listener: Optional[Listener] = None
+
+    def log(self, message: str) -> None:
+        self.log_callback(message)
+
+    # ── Workers ──────────────────────────────────────────────────────────────
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker()
+        with self._lock:
+            self._all.append(worker)
+        return worker
+
+    def _retire(self, worker: _Worker) -> None:
+        with self._lock:
+            if worker in self._all:
+                self._all.remove(worker)
+        worker.stop()
+
+    def _release(self, worker: _Worker) -> None:
+        if self._stopping.is_set():
+            self._retire(worker)
+        elif not worker.alive() or worker.jobs >= MAX_JOBS_PER_WORKER:
+            self._retire(worker)
+            self._idle.put(self._spawn())
+        else:
+            self._idle.put(worker)
+
+    # ── Conexiones ───────────────────────────────────────────────────────────
+
+    def _run_job(self, conn: Connection, job: Dict) -> None:
+        worker = self._idle.get()
+        with self._lock:
+            self._active += 1
+        self.log(f"[INFO] Build de {Path(job['project']).name} en worker {worker.process.pid}")
+        worker.jobs += 1
+        result = {"ok": False, "artifact": None, "error": "El worker terminó inesperadamente"}
+        client_alive = True
+        cancel_sent = False
+        try:
+            worker.conn.send(job)
+            while True:
+                if not worker.conn.poll(0.25):
+                    # Cancelación explícita del cliente o cliente desconectado.
+                    if not cancel_sent and self._client_wants_cancel(conn):
+                        client_alive = client_alive and not conn.closed
+                        worker.conn.send(("cancel", None))
+                        cancel_sent = True
+                    continue
+                kind, payload = worker.conn.recv()
+                if kind == "result":
+                    result = payload
+                    break
+                if kind == "log" and client_alive:
+                    try:
+                        conn.send({"type": "log", "line": payload})
+                    except OSError:
+                        # El cliente se fue: se cancela el build y se sigue
+                        # leyendo hasta el resultado para que el worker vuelva
+                        # limpio al pool.
+                        client_alive = False
+                        if not cancel_sent:
+                            worker.conn.send(("cancel", None))
+                            cancel_sent = True
+        except (EOFError, OSError):
+            # Worker caído a mitad de build: se recicla en _release().
+            worker.jobs = MAX_JOBS_PER_WORKER
+        finally:
+            with self._lock:
+                self._active -= 1
+            self._release(worker)
+        if client_alive:
+            try:
+                conn.send(dict(result, type="result"))
+            except OSError:
+                pass
+
+    @staticmethod
+    def _client_wants_cancel(conn: Connection) -> bool:
+        try:
+            if not conn.poll():
+                return False
+            message = conn.recv()
+        except (EOFError, OSError):
+            conn.close()
+            return True
+        return isinstance(message, dict) and message.get("op") == "cancel"
+
+    def _handle(self, conn: Connection) -> None:
+        try:
+            request = conn.recv()
+            op = request.get("op")
+            if op == "ping":
+                conn.send({"type": "pong", "protocol": _PROTOCOL, "pid": os.getpid()})
+            elif op == "status":
+                with self._lock:
+                    conn.send({"type": "status", "workers": len(self._all),
+                               "idle": self._idle.qsize(), "active": self._active})
+            elif op == "build":
+                self._run_job(conn, request)
+            elif op == "shutdown":
+                conn.send({"type": "bye"})
+                self.stop()
+            else:
+                conn.send({"type": "error", "error": f"Operación desconocida: {op}"})
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def _write_info(self) -> None:
+        info = daemon_info_path()
+        info.parent.mkdir(parents=True, exist_ok=True)
+        tmp = info.with_name(info.name + ".tmp")
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump({"address": self.address, "authkey": self.authkey.hex(),
+                       "pid": os.getpid(), "protocol": _PROTOCOL}, handle)
+        os.replace(tmp, info)
+
+    def serve_forever(self) -> None:
+        if sys.platform != "win32":
+            if os.path.exists(self.address):
+                # Socket huérfano de un daemon anterior que no terminó limpiamente.
+                os.unlink(self.address)
+            Path(self.address).parent.mkdir(parents=True, exist_ok=True)
+        self._listener = Listener(self.address, authkey=self.authkey)
+        self.log(f"[INFO] Arrancando {self.workers} worker(s) de build...")
+        for _ in range(self.workers):
+            self._idle.put(self._spawn())
+        self._write_info()
+        self.log(f"[INFO] Daemon de build escuchando en {self.address}")
+        try:
+            while not self._stopping.is_set():
+                try:
+                    conn = self._listener.accept()
+                except (OSError, EOFError):
+                    if self._stopping.is_set():
+                        break
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            self._shutdown()
+
+    def stop(self) -> None:
+        if self._stopping.is_set():
+            return
+        self._stopping.set()
+        # Despertar a accept() con una conexión local vacía.
+        try:
+            Client(self.address, authkey=self.authkey).close()
+        except OSError:
+            pass
+
+    def _shutdown(self) -> None:
+        if self._listener is not None:
+            self._listener.close()
+        for worker in list(self._all):
+            self._retire(worker)
+        try:
+            info = json.loads(daemon_info_path().read_text(encoding="utf-8"))
+            if info.get("pid") == os.getpid():
+                daemon_info_path().unlink()
+        except (OSError, ValueError):
+            pass
+        self.log("[INFO] Daemon de build detenido.")
+
+
+class DaemonClient:
+    """Cliente del daemon; ``connect()`` devuelve ``None`` si no hay daemon activo."""
+
+    def __init__(self, address: str, authkey: bytes):
+        self.address = address
+        self.authkey = authkey
+
+    @classmethod
+    def connect(cls) -> Optional["DaemonClient"]:
+        if os.environ.get("PACKAGEMAKER_NO_DAEMON"):
+            return None
+        try:
+            info = json.loads(daemon_info_path().read_text(encoding="utf-8"))
+            client = cls(info["address"], bytes.fromhex(info["authkey"]))
+        except (OSError, ValueError, KeyError):
+            return None
+        return client if client.ping() else None
+
+    def _request(self, payload: Dict) -> Connection:
+        conn = Client(self.address, authkey=self.authkey)
+        conn.send(payload)
+        return conn
+
+    def ping(self) -> bool:
+        try:
+            with self._request({"op": "ping"}) as conn:
+                reply = conn.recv()
+        except (OSError, EOFError, multiprocessing.AuthenticationError):
+            return False
+        return reply.get("type") == "pong" and reply.get("protocol") == _PROTOCOL
+
+    def status(self) -> Dict:
+        with self._request({"op": "status"}) as conn:
+            return conn.recv()
+
+    def shutdown(self) -> None:
+        with self._request({"op": "shutdown"}) as conn:
+            conn.recv()
+
+    def build(
+        self,
+        project: Path,
+        output: Path,
+        options: Optional[Dict] = None,
+        log_callback: Optional[Callable[[str], None]] = None,
+        cancel_token=None,
+    ) -> Dict:
+        """Envía un build y reenvía sus logs; devuelve ``{"ok", "artifact", "error"}``.
+
+        Si *cancel_token* se cancela, se pide al daemon que detenga el build y
+        se sigue esperando su resultado (que llegará como fallido).
+        """
+        job = {"op": "build", "project": str(Path(project).resolve()),
+               "output": str(Path(output).resolve()), "options": dict(options or {})}
+        cancel_sent = False
+        with self._request(job) as conn:
+            while True:
+                try:
+                    if not conn.poll(0.25):
+                        if cancel_token is not None and cancel_token.cancelled and not cancel_sent:
+                            conn.send({"op": "cancel"})
+                            cancel_sent = True
+                        continue
+                    message = conn.recv()
+                except EOFError:
+                    return {"ok": False, "artifact": None, "error": "Conexión con el daemon perdida"}
+                if message.get("type") == "log":
+                    if log_callback:
+                        log_callback(message["line"])
+                elif message.get("type") == "result":
+                    return message
+
+
+def run_daemon(workers: int = DEFAULT_WORKERS) -> None:
+    """Punto de entrada de ``packagemaker daemon start`` (primer plano)."""
+    daemon = BuildDaemon(workers=workers)
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        # serve_forever() ya detuvo los workers en su bloque finally.
+        pass
@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+"""
+Perfilado por fases de FlangCompiler.
+
+Cada fase registra tiempo de pared, tiempo de CPU (proceso e hijos), bytes
+leídos/escritos y pico de memoria residente. El resultado se guarda como JSON
+en formato Chrome Trace (``chrome://tracing`` / Perfetto) junto al ``.iflapp``
+y se resume en una tabla de texto para la GUI, la TUI y la CLI.
+
+Solo usa la stdlib: ``/proc/self/io`` y ``resource`` en Linux/macOS y
+``GetProcessIoCounters``/``GetProcessMemoryInfo`` vía ctypes en Windows. Si un
+contador no está disponible en la plataforma se informa como ``None``.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+TRACE_SUFFIX = ".trace.json"
+
+
+def _read_io_bytes() -> Tuple[Optional[int], Optional[int]]:
+    """Bytes leídos y escritos por el proceso (incluye hijos ya recogidos)."""
+    if sys.platform.startswith("linux"):
+        try:
+            values = {}
+            with open("/proc/self/io", "r", encoding="ascii") as handle:
+                for line in handle:
+                    key, _, value = line.partition(":")
+                    values[key] = int(value)
+            return values.get("rchar"), values.get("wchar")
+        except (OSError, ValueError):
+            return None, None
+    if sys.platform == "win32":
+        try:
+            import ctypes
+            from ctypes import wintypes
+
+            class IO_COUNTERS(ctypes.Structure):
+                _fields_ = [(name, ctypes.c_ulonglong) for name in (
+                    "ReadOperationCount", "WriteOperationCount", "OtherOperationCount",
+                    "ReadTransferCount", "WriteTransferCount", "OtherTransferCount",
+                )]
+
+            counters = IO_COUNTERS()
+            kernel32 = ctypes.windll.kernel32
+            kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+            if kernel32.GetProcessIoCounters(kernel32.GetCurrentProcess(), ctypes.byref(counters)):
+                return counters.ReadTransferCount, counters.WriteTransferCount
+        except Exception:
+            pass
+    return None, None
+
+
+def _peak_rss_bytes() -> Optional[int]:
+    """Pico de memoria residente del proceso y de sus hijos terminados."""
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None:
+        # ru_maxrss está en KiB en Linux y en bytes en macOS.
+        scale = 1 if sys.platform == "darwin" else 1024
+        own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        return max(own, children) * scale
+    if sys.platform == "win32":
+        try:
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                    (name, ctypes.c_size_t) for name in (
+                        "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage",
+                        "QuotaPagedPoolUsage", "QuotaPeakNonPagedPoolUsage",
+                        "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage",
+                    )
+                ]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            kernel32 = ctypes.windll.kernel32
+            kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+            if ctypes.windll.psapi.GetProcessMemoryInfo(
+                kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb
+            ):
+                return counters.PeakWorkingSetSize
+        except Exception:
+            pass
+    return None
+
+
+def _cpu_seconds() -> float:
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+@dataclass
+class PhaseRecord:
+    name: str
+    start: float
+    wall: float
+    cpu: float
+    read_bytes: Optional[int]
+    write_bytes: Optional[int]
+    peak_rss: Optional[int]
+    depth: int = 0
+    pid: int = 0
+    tid: int = 0
+    args: Dict[str, Any] = field(default_factory=dict)
+
+
+class BuildProfiler:
+    """Registra fases anidadas de un build y las exporta como Chrome Trace."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.records: List[PhaseRecord] = []
+        self._origin = time.time()
+        self._local = threading.local()
+
+    @contextmanager
+    def phase(self, name: str, **args) -> Iterator[Dict[str, Any]]:
+        """Mide el bloque; el diccionario devuelto permite añadir ``args`` al final."""
+        if not self.enabled:
+            yield args
+            return
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        start = time.time()
+        wall_start = time.perf_counter()
+        cpu_start = _cpu_seconds()
+        read_start, write_start = _read_io_bytes()
+        try:
+            yield args
+        finally:
+            self._local.depth = depth
+            read_end, write_end = _read_io_bytes()
+            self.records.append(PhaseRecord(
+                name=name,
+                start=start - self._origin,
+                wall=time.perf_counter() - wall_start,
+                cpu=_cpu_seconds() - cpu_start,
+                read_bytes=None if read_start is None or read_end is None else read_end - read_start,
+                write_bytes=None if write_start is None or write_end is None else write_end - write_start,
+                peak_rss=_peak_rss_bytes(),
+                depth=depth,
+                pid=os.getpid(),
+                tid=threading.get_ident(),
+                args=dict(args),
+            ))
+
+    @property
+    def depth(self) -> int:
+        return getattr(self._local, "depth", 0)
+
+    def merge(self, records: List[Dict[str, Any]], origin: float, depth: int = 0) -> None:
+        """Incorpora fases registradas en otro proceso (p. ej. workers de compilación)."""
+        for data in records:
+            record = PhaseRecord(**data)
+            record.start += origin - self._origin
+            record.depth += depth
+            self.records.append(record)
+
+    def export_records(self) -> Tuple[float, List[Dict[str, Any]]]:
+        """Fases serializables para enviarlas entre procesos."""
+        return self._origin, [asdict(record) for record in self.records]
+
+    def to_chrome_trace(self, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        events = []
+        for record in sorted(self.records, key=lambda r: (r.start, r.depth)):
+            args = {
+                "cpu_s": round(record.cpu, 3),
+                "read_bytes": record.read_bytes,
+                "write_bytes": record.write_bytes,
+                "peak_rss_bytes": record.peak_rss,
+                "depth": record.depth,
+            }
+            args.update(record.args)
+            events.append({
+                "name": record.name,
+                "cat": "build",
+                "ph": "X",
+                "ts": int(record.start * 1_000_000),
+                "dur": int(record.wall * 1_000_000),
+                "pid": record.pid,
+                "tid": record.tid,
+                "args": args,
+            })
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": dict(metadata or {}, started=self._origin),
+        }
+
+    def write(self, path: Path, metadata: Optional[Dict[str, Any]] = None) -> Path:
+        path = Path(path)
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(self.to_chrome_trace(metadata), handle, indent=1)
+        return path
+
+    def summary_rows(self) -> List[Tuple[str, float, float, Optional[int], Optional[int], Optional[int]]]:
+        """Filas (fase, pared, CPU, leído, escrito, pico RSS) en orden cronológico."""
+        return summary_rows_from_trace(self.to_chrome_trace())
+
+    def format_table(self) -> str:
+        return format_summary_table(self.summary_rows())
+
+
+def trace_path_for(iflapp_path: Path) -> Path:
+    """Ruta del perfil junto al ``.iflapp``: ``<nombre>.trace.json``."""
+    iflapp_path = Path(iflapp_path)
+    return iflapp_path.with_name(iflapp_path.stem + TRACE_SUFFIX)
+
+
+def load_trace(path: Path) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def summary_rows_from_trace(trace: Dict[str, Any]) -> List[Tuple[str, float, float, Optional[int], Optional[int], Optional[int]]]:
+    rows = []
+    for event in trace.get("traceEvents", []):
+        if event.get("ph") != "X":
+            continue
+        args = event.get("args", {})
+        label = "  " * int(args.get("depth") or 0) + event["name"]
+        if args.get("script"):
+            label = f"{label} [{args['script']}]"
+        rows.append((
+            label,
+            event.get("dur", 0) / 1_000_000,
+            float(args.get("cpu_s") or 0.0),
+            args.get("read_bytes"),
+            args.get("write_bytes"),
+            args.get("peak_rss_bytes"),
+        ))
+    return rows
+
+
+def _format_bytes(value: Optional[int]) -> str:
+    if value is None:
+        return "-"
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(value) < 1024 or unit == "GB":
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return "-"
+
+
+def format_summary_table(rows) -> str:
+    """Tabla de texto de ancho fijo con el resumen por fase."""
+    header = ("Fase", "Pared", "CPU", "Leído", "Escrito", "Pico RSS")
+    body = [
+        (name, f"{wall:.2f}s", f"{cpu:.2f}s", _format_bytes(read), _format_bytes(written), _format_bytes(rss))
+        for name, wall, cpu, read, written, rss in rows
+    ]
+    widths = [max(len(row[i]) for row in [header] + body) for i in range(len(header))]
+    lines = []
+    for index, row in enumerate([header] + body):
+        cells = [row[0].ljust(widths[0])] + [cell.rjust(width) for cell, width in zip(row[1:], widths[1:])]
+        lines.append("  ".join(cells))
+        if index == 0:
+            lines.append("  ".join("-" * width for width in widths))
+    return "\n".join(lines)
+
+
+def profiled(name: str, script_arg: bool = False):
+    """Decorador para métodos de FlangCompiler: mide el método como una fase.
+
+    Con ``script_arg`` el primer argumento (dict de script) aporta su nombre
+    a los ``args`` de la fase.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            extra = {}
+            if script_arg and args and isinstance(args[0], dict):
+                extra["script"] = args[0].get("name")
+            with self.profiler.phase(name, **extra) as phase_args:
+                result = method(self, *args, **kwargs)
+                if isinstance(result, bool):
+                    phase_args["ok"] = result
+                return result
+        return wrapper
+    return decorator
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Cancelación cooperativa de builds.
+
+Un ``CancellationToken`` se comparte entre quien pide parar (GUI, TUI, SIGINT)
+y el build, que lo consulta en puntos seguros: entre scripts, entre archivos
+copiados y dentro del escritor del ``.iflapp``. Las tareas bloqueantes que no
+pueden consultar el token (un PyInstaller en otro proceso, un pool de workers)
+registran un callback con ``on_cancel`` para que se las detenga al instante.
+"""
+
+from __future__ import annotations
+
+import signal
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, List
+
+
+class BuildCancelled(BaseException):
+    """El build se canceló a petición del usuario.
+
+    Hereda de ``BaseException`` (como ``KeyboardInterrupt``) para atravesar los
+    ``except Exception`` que convierten errores de una fase en un ``False``.
+    """
+
+
+class CancellationToken:
+    """Bandera de cancelación segura entre hilos, con callbacks al cancelar."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        # Reentrante: cancel() puede llegar desde un manejador de SIGINT que
+        # interrumpe al hilo principal mientras este tiene el lock.
+        self._lock = threading.RLock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise BuildCancelled()
+
+    def wait(self, timeout: float) -> bool:
+        return self._event.wait(timeout)
+
+    @contextmanager
+    def on_cancel(self, callback: Callable[[], None]) -> Iterator[None]:
+        """Ejecuta *callback* si se cancela mientras dura el bloque ``with``."""
+        with self._lock:
+            already = self._event.is_set()
+            if not already:
+                self._callbacks.append(callback)
+        if already:
+            callback()
+        try:
+            yield
+        finally:
+            with self._lock:
+                if callback in self._callbacks:
+                    self._callbacks.remove(callback)
+
+
+@contextmanager
+def cancel_on_sigint(token: CancellationToken, log_callback=print) -> Iterator[None]:
+    """Primer Ctrl+C: cancelación ordenada. Segundo Ctrl+C: interrupción inmediata."""
+    if threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def handler(signum, frame):
+        if token.cancelled:
+            raise KeyboardInterrupt
+        log_callback("[WARN] Cancelando el build (Ctrl+C de nuevo para forzar)...")
+        token.cancel()
+
+    previous = signal.signal(signal.SIGINT, handler)
+    try:
+        yield
+    finally:
+        signal.signal(signal.SIGINT, previous)
@@ -9,6 +9,7 @@ import os
 import sys
 import argparse
 import re
+import shutil
 from pathlib import Path
 
 # Constantes
@@ -75,8 +76,9 @@ LEGACY_COMMAND_MAP = {
 class CLIHandler:
     """Maneja los argumentos de línea de comandos."""
 
-    def __init__(self, base_dir=None):
+    def __init__(self, base_dir=None, apps_dir=None):
         self.base_dir = base_dir or os.path.join(os.path.expanduser("~"), "Documents", "Packagemaker Projects")
+        self.apps_dir = apps_dir or os.path.join(os.path.expanduser("~"), "Documents", "Fluthin Apps")
         self.parser = argparse.ArgumentParser(
             description=f'\033[94mInfluent Package Maker - Sistema de gestión de paquetes Fluthin\033[0m',
             epilog=f"""
@@ -133,6 +135,24 @@ class CLIHandler:
         repair_parser.add_argument('--publisher', help='Publisher o empresa del proyecto (ej: "Tesla-Inc")')
         repair_parser.add_argument('--version', default='1.0.0', help='Versión del proyecto (ej: "1.0")')
 
+        build_all_parser = subparsers.add_parser('build-all', help='Compilar todos los proyectos de la ruta predeterminada')
+        build_all_parser.add_argument('--base', metavar='PATH', help='Carpeta de proyectos a escanear (por defecto la ruta predeterminada)')
+        build_all_parser.add_argument('--output', metavar='PATH', help='Directorio para los artefactos `.iflapp`')
+        build_all_parser.add_argument('--jobs', type=int, default=max(1, (os.cpu_count() or 2) // 2), metavar='N', help='Proyectos a compilar a la vez')
+        build_all_parser.add_argument('--only-changed', action='store_true', help='Compilar solo los proyectos que cambiaron desde su último build correcto')
+        build_all_parser.add_argument('--no-cache', action='store_true', help='Ignorar la caché de ejecutables')
+        build_all_parser.add_argument('--no-artifact-store', action='store_true', help='No reutilizar ni guardar miembros comprimidos del .iflapp entre builds')
+        build_all_parser.add_argument('--direct-archive', action='store_true', help='Escribir cada .iflapp sin carpeta intermedia')
+
+        check_updates_parser = subparsers.add_parser('check-updates', help='Comprobar si hay versiones nuevas de todas las apps instaladas')
+        check_updates_parser.add_argument('--apps', metavar='PATH', help='Carpeta de apps instaladas (por defecto Fluthin Apps)')
+        check_updates_parser.add_argument('--refresh', action='store_true', help='Consultar la red aunque haya resultados recientes en caché')
+        check_updates_parser.add_argument('--jobs', type=int, default=8, metavar='N', help='Consultas simultáneas (por defecto 8)')
+
+        daemon_parser = subparsers.add_parser('daemon', help='Servidor local de builds con workers PyInstaller precalentados')
+        daemon_parser.add_argument('daemon_action', choices=['start', 'stop', 'status'], help='start (primer plano), stop o status')
+        daemon_parser.add_argument('--workers', type=int, default=2, metavar='N', help='Workers de build simultáneos (por defecto 2)')
+
         # === Shell Integration ===
         shell_group = self.parser.add_argument_group('Integración con Shell')
         shell_group.add_argument('--shellpatch', metavar='ACTION', choices=['install', 'remove', 'shortcuts'], help='Gestión de integración shell: install, remove, shortcuts')
@@ -149,6 +169,16 @@ class CLIHandler:
         buildthis_group.add_argument('--buildthis', nargs='?', const='.', metavar='PATH', help='Compilar el proyecto en la carpeta actual o en la ruta especificada')
         buildthis_group.add_argument('--output', metavar='PATH', help='Directorio externo para el artefacto `.iflapp`')
         buildthis_group.add_argument('--platform', choices=['Linux', 'Windows'], help='Plataforma objetivo; por defecto se detecta el sistema actual')
+        buildthis_group.add_argument('--no-cache', action='store_true', help='Ignorar la caché de ejecutables y recompilar todos los scripts')
+        buildthis_group.add_argument('--no-artifact-store', action='store_true', help='No reutilizar ni guardar miembros comprimidos del .iflapp entre builds (build en frío más rápido)')
+        buildthis_group.add_argument('--no-auto-excludes', action='store_true', help='No excluir automáticamente paquetes pesados que el proyecto no importa')
+        buildthis_group.add_argument('--bundle-mode', choices=['onefile', 'shared'], default='onefile', help='onefile: un ejecutable por script; shared: todos los scripts comparten un runtime onedir')
+        buildthis_group.add_argument('--compression-level', type=int, choices=range(0, 10), default=6, metavar='0-9', help='Nivel DEFLATE del .iflapp (0 = sin compresión, por defecto 6)')
+        buildthis_group.add_argument('--direct-archive', action='store_true', help='Escribir el .iflapp directamente, sin crear la carpeta intermedia del paquete')
+        buildthis_group.add_argument('--delta-from', metavar='IFLAPP', help='Generar además un .delta.iflapp con solo los miembros que cambiaron respecto a este paquete')
+        buildthis_group.add_argument('--profile-file', type=str, metavar='RUTA', help='Copiar también la traza de perfilado del build (JSON/Chrome Trace) a RUTA')
+        buildthis_group.add_argument('--no-daemon', action='store_true', help='Compilar en este proceso aunque haya un daemon de build activo')
+        buildthis_group.add_argument('--jobs', type=int, default=1, metavar='N', help='Compilar hasta N scripts del proyecto en paralelo (por defecto 1)')
 
     def parse(self):
         return self.parser.parse_args()
@@ -258,6 +288,41 @@ class CLIHandler:
                 },
             )
         
+        elif getattr(args, 'command', None) == 'daemon':
+            return (
+                'build_daemon',
+                {'action': getattr(args, 'daemon_action', 'status')},
+                {'compact': False, 'shell_mode': False, 'headless': True, 'workers': getattr(args, 'workers', 2)},
+            )
+        elif getattr(args, 'command', None) == 'check-updates':
+            return (
+                'check_updates',
+                {'path': getattr(args, 'apps', None) or self.apps_dir},
+                {
+                    'compact': False,
+                    'shell_mode': False,
+                    'headless': True,
+                    'refresh': getattr(args, 'refresh', False),
+                    'jobs': getattr(args, 'jobs', 8),
+                },
+            )
+        elif getattr(args, 'command', None) == 'build-all':
+            return (
+                'build_all',
+                {'path': getattr(args, 'base', None) or self.base_dir},
+                {
+                    'compact': False,
+                    'shell_mode': False,
+                    'headless': True,
+                    'output': getattr(args, 'output', None),
+                    'jobs': getattr(args, 'jobs', 1),
+                    'only_changed': getattr(args, 'only_changed', False),
+                    'no_cache': getattr(args, 'no_cache', False),
+                    'no_artifact_store': getattr(args, 'no_artifact_store', False),
+                    'direct_archive': getattr(args, 'direct_archive', False),
+                },
+            )
+        
         # === Shell Integration (con --shellpatch) ===
         elif getattr(args, 'shellpatch', None) == 'install':
             return ('shellpatch_install', None, shell_options)
@@ -285,6 +350,16 @@ class CLIHandler:
                     'headless': True,
                     'output': getattr(args, 'output', None),
                     'platform': getattr(args, 'platform', None),
+                    'jobs': getattr(args, 'jobs', 1),
+                    'no_cache': getattr(args, 'no_cache', False),
+                    'no_artifact_store': getattr(args, 'no_artifact_store', False),
+                    'bundle_mode': getattr(args, 'bundle_mode', 'onefile'),
+                    'auto_excludes': not getattr(args, 'no_auto_excludes', False),
+                    'compression_level': getattr(args, 'compression_level', 6),
+                    'direct_archive': getattr(args, 'direct_archive', False),
+                    'delta_from': getattr(args, 'delta_from', None),
+                    'profile_file': getattr(args, 'profile_file', None),
+                    'no_daemon': getattr(args, 'no_daemon', False),
                 }
             )
 
@@ -303,6 +378,16 @@ class CLIHandler:
                     'headless': True,
                     'output': getattr(args, 'output', None),
                     'platform': getattr(args, 'platform', None),
+                    'jobs': getattr(args, 'jobs', 1),
+                    'no_cache': getattr(args, 'no_cache', False),
+                    'no_artifact_store': getattr(args, 'no_artifact_store', False),
+                    'bundle_mode': getattr(args, 'bundle_mode', 'onefile'),
+                    'auto_excludes': not getattr(args, 'no_auto_excludes', False),
+                    'compression_level': getattr(args, 'compression_level', 6),
+                    'direct_archive': getattr(args, 'direct_archive', False),
+                    'delta_from': getattr(args, 'delta_from', None),
+                    'profile_file': getattr(args, 'profile_file', None),
+                    'no_daemon': getattr(args, 'no_daemon', False),
                 }
             )
         
@@ -560,6 +645,7 @@ def handle_cli_action(action, data, gui_class, compact=False, shell_mode=False,
     
     elif action == 'compile_project' and kwargs.get('headless'):
         from lib.BuildThread import FlangCompiler
+        from lib.cancellation import BuildCancelled, cancel_on_sigint
         
         project_source = data if isinstance(data, dict) else {'path': data}
         base_path = Path(project_source.get('path')).resolve()
@@ -608,43 +694,50 @@ def handle_cli_action(action, data, gui_class, compact=False, shell_mode=False,
         if not compiler.find_scripts():
             sys.exit(1)
         try:
-            if not compiler.compile_binaries(target_platform):
-                sys.exit(1)
-            if not compiler.create_package(target_platform):
-                sys.exit(1)
-
-            publisher = compiler.metadata['publisher']
-            app = compiler.metadata['app']
-            version = compiler.metadata['version']
-            platform_suffix = "Knosthalij" if target_platform == "Windows" else "Danenone"
+            with cancel_on_sigint(compiler.cancel_token):
+                if not compiler.compile_binaries(target_platform):
+                    sys.exit(1)
+
+                publisher = compiler.metadata['publisher']
+                app = compiler.metadata['app']
+                version = compiler.metadata['version']
+                platform_suffix = "Knosthalij" if target_platform == "Windows" else "Danenone"
             
-            # Usar ProjectNameFormatter para formato consistente
-            package_name = ProjectNameFormatter.format_package_folder(publisher, app, version, platform_suffix)
-            package_path = output_path / package_name
-            iflapp_file = output_path / ProjectNameFormatter.format_iflapp_filename(publisher, app, version, platform_suffix)
+                # Usar ProjectNameFormatter para formato consistente
+                package_name = ProjectNameFormatter.format_package_folder(publisher, app, version, platform_suffix)
+                package_path = output_path / package_name
+                iflapp_file = output_path / ProjectNameFormatter.format_iflapp_filename(publisher, app, version, platform_suffix)
 
-            if not compiler.compress_to_iflapp(package_path, iflapp_file):
-                sys.exit(1)
+                if compiler.direct_archive:
+                    if not compiler.package_to_iflapp(target_platform, iflapp_file):
+                        sys.exit(1)
+                else:
+                    if not compiler.create_package(target_platform):
+                        sys.exit(1)
+                    if not compiler.compress_to_iflapp(package_path, iflapp_file):
+                        sys.exit(1)
 
-            if optimize:
-                print(f"[INFO] Optimizando binarios...")
-                if not compiler.optimize_binaries():
-                    sys.exit(1)
+                if optimize:
+                    print(f"[INFO] Optimizando binarios...")
+                    if not compiler.optimize_binaries():
+                        sys.exit(1)
 
-            print(f"[OK] Compilación completada exitosamente")
-            print(f"[INFO] Paquete generado: {iflapp_file}")
+                print(f"[OK] Compilación completada exitosamente")
+                print(f"[INFO] Paquete generado: {iflapp_file}")
             
-            # El artefacto ya existe; limpiar paquete temporal y proyecto fuente.
-            compiler._cleanup_package_folder(package_path, iflapp_file)
-            compiler.cleanup_processed_project(iflapp_file)
+                # El artefacto ya existe; limpiar paquete temporal y proyecto fuente.
+                compiler._cleanup_package_folder(package_path, iflapp_file)
+                compiler.cleanup_processed_project(iflapp_file)
+        except BuildCancelled:
+            compiler.handle_cancelled(target_platform)
+            sys.exit(130)
         finally:
             if hasattr(compiler, '_cleanup_build_artifacts'):
                 compiler._cleanup_build_artifacts()
+        compiler.write_profile(iflapp_file)
         return None
     
     elif action == 'buildthis' and kwargs.get('headless'):
-        from lib.BuildThread import FlangCompiler
-        
         project_source = data if isinstance(data, dict) else {'path': data}
         project_path = Path(project_source.get('path')).resolve()
         
@@ -674,10 +767,61 @@ def handle_cli_action(action, data, gui_class, compact=False, shell_mode=False,
 
         print(f"[INFO] Iniciando compilación del proyecto actual...")
 
+        build_options = {
+            'jobs': max(1, int(kwargs.get('jobs') or 1)),
+            'use_build_cache': not kwargs.get('no_cache'),
+            'use_artifact_store': not kwargs.get('no_artifact_store'),
+            'bundle_mode': kwargs.get('bundle_mode') or 'onefile',
+            'auto_excludes': kwargs.get('auto_excludes', True),
+            'compression_level': kwargs.get('compression_level', 6),
+            'direct_archive': kwargs.get('direct_archive', False),
+            'delta_base': str(Path(kwargs['delta_from']).expanduser().resolve()) if kwargs.get('delta_from') else None,
+        }
+        # Con un daemon activo el build se delega en un worker ya caliente;
+        # el daemon solo compila para la plataforma en la que corre.
+        host_platform = 'Windows' if sys.platform.startswith('win') else 'Linux'
+        if not kwargs.get('no_daemon') and target_platform == host_platform:
+            from lib.build_daemon import DaemonClient
+            client = DaemonClient.connect()
+            if client:
+                from lib.build_profiler import trace_path_for
+                from lib.cancellation import CancellationToken, cancel_on_sigint
+
+                print(f"[INFO] Usando daemon de build en {client.address}")
+                token = CancellationToken()
+                with cancel_on_sigint(token):
+                    result = client.build(project_path, output_path, build_options,
+                                          log_callback=print, cancel_token=token)
+                if token.cancelled:
+                    print("[WARN] Build cancelado por el usuario.")
+                    sys.exit(130)
+                if not result.get('ok'):
+                    print(f"[ERROR] {result.get('error')}")
+                    sys.exit(1)
+                iflapp_file = Path(result['artifact'])
+                print(f"[OK] Compilación completada exitosamente")
+                print(f"[INFO] Paquete generado: {iflapp_file}")
+                profile_file = kwargs.get('profile_file') or os.environ.get('PACKAGEMAKER_PROFILE_FILE')
+                trace_path = trace_path_for(iflapp_file)
+                if profile_file and trace_path.exists():
+                    shutil.copyfile(trace_path, Path(profile_file).expanduser())
+                return None
+
+        from lib.BuildThread import FlangCompiler
+        from lib.cancellation import BuildCancelled, cancel_on_sigint
+
         print(f"[INFO] Proyecto: {project_path}")
         print(f"[INFO] Salida: {output_path}")
         print(f"[INFO] Plataforma objetivo (detectada): {target_platform}")
         compiler = FlangCompiler(project_path, output_path, log_callback=print)
+        compiler.jobs = build_options['jobs']
+        compiler.use_build_cache = build_options['use_build_cache']
+        compiler.use_artifact_store = build_options['use_artifact_store']
+        compiler.bundle_mode = build_options['bundle_mode']
+        compiler.auto_excludes = build_options['auto_excludes']
+        compiler.compression_level = build_options['compression_level']
+        compiler.direct_archive = build_options['direct_archive']
+        compiler.delta_base = build_options['delta_base']
 
         if not compiler.parse_details_xml():
             sys.exit(1)
@@ -685,35 +829,127 @@ def handle_cli_action(action, data, gui_class, compact=False, shell_mode=False,
         if not compiler.find_scripts():
             sys.exit(1)
         try:
-            if not compiler.compile_binaries(target_platform):
-                sys.exit(1)
-            if not compiler.create_package(target_platform):
-                sys.exit(1)
-
-            publisher = compiler.metadata['publisher']
-            app = compiler.metadata['app']
-            version = compiler.metadata['version']
-            platform_suffix = "Knosthalij" if target_platform == "Windows" else "Danenone"
+            with cancel_on_sigint(compiler.cancel_token):
+                if not compiler.compile_binaries(target_platform):
+                    sys.exit(1)
+
+                publisher = compiler.metadata['publisher']
+                app = compiler.metadata['app']
+                version = compiler.metadata['version']
+                platform_suffix = "Knosthalij" if target_platform == "Windows" else "Danenone"
             
-            # Usar ProjectNameFormatter para formato consistente
-            package_name = ProjectNameFormatter.format_package_folder(publisher, app, version, platform_suffix)
-            package_path = output_path / package_name
-            iflapp_file = output_path / ProjectNameFormatter.format_iflapp_filename(publisher, app, version, platform_suffix)
+                # Usar ProjectNameFormatter para formato consistente
+                package_name = ProjectNameFormatter.format_package_folder(publisher, app, version, platform_suffix)
+                package_path = output_path / package_name
+                iflapp_file = output_path / ProjectNameFormatter.format_iflapp_filename(publisher, app, version, platform_suffix)
 
-            if not compiler.compress_to_iflapp(package_path, iflapp_file):
-                sys.exit(1)
+                if compiler.direct_archive:
+                    if not compiler.package_to_iflapp(target_platform, iflapp_file):
+                        sys.exit(1)
+                else:
+                    if not compiler.create_package(target_platform):
+                        sys.exit(1)
+                    if not compiler.compress_to_iflapp(package_path, iflapp_file):
+                        sys.exit(1)
 
-            print(f"[OK] Compilación completada exitosamente")
-            print(f"[INFO] Paquete generado: {iflapp_file}")
+                print(f"[OK] Compilación completada exitosamente")
+                print(f"[INFO] Paquete generado: {iflapp_file}")
+                if compiler.delta_path:
+                    print(f"[INFO] Paquete delta: {compiler.delta_path}")
             
-            # El artefacto ya existe; limpiar paquete temporal y proyecto fuente.
-            compiler._cleanup_package_folder(package_path, iflapp_file)
-            compiler.cleanup_processed_project(iflapp_file)
+                # El artefacto ya existe; limpiar paquete temporal y proyecto fuente.
+                compiler._cleanup_package_folder(package_path, iflapp_file)
+                compiler.cleanup_processed_project(iflapp_file)
+        except BuildCancelled:
+            compiler.handle_cancelled(target_platform)
+            sys.exit(130)
         finally:
             if hasattr(compiler, '_cleanup_build_artifacts'):
                 compiler._cleanup_build_artifacts()
+        # La TUI pide la traza por variable de entorno para no alterar el comando.
+        profile_file = kwargs.get('profile_file') or os.environ.get('PACKAGEMAKER_PROFILE_FILE')
+        trace_path = compiler.write_profile(iflapp_file, log_table=not profile_file)
+        if profile_file and trace_path:
+            shutil.copyfile(trace_path, Path(profile_file).expanduser())
         return None
     
+    elif action == 'build_daemon' and kwargs.get('headless'):
+        from lib.build_daemon import DaemonClient, run_daemon
+
+        daemon_action = (data or {}).get('action', 'status')
+        client = DaemonClient.connect()
+        if daemon_action == 'start':
+            if client:
+                print(f"[INFO] Ya hay un daemon de build activo en {client.address}")
+                return True
+            run_daemon(workers=kwargs.get('workers') or 2)
+            return True
+        if not client:
+            print("[INFO] No hay ningún daemon de build activo.")
+            return daemon_action == 'status'
+        if daemon_action == 'stop':
+            client.shutdown()
+            print("[OK] Daemon de build detenido.")
+        else:
+            status = client.status()
+            print(f"[INFO] Daemon activo en {client.address}: {status['workers']} worker(s), "
+                  f"{status['active']} build(s) en curso, {status['idle']} libre(s)")
+        return True
+
+    elif action == 'build_all' and kwargs.get('headless'):
+        from lib.batch_builder import BatchBuilder, format_batch_summary
+        from lib.cancellation import BuildCancelled, cancel_on_sigint
+
+        project_source = data if isinstance(data, dict) else {'path': data}
+        base_path = Path(project_source.get('path')).expanduser().resolve()
+        output_arg = kwargs.get('output')
+        if output_arg:
+            output_path = Path(output_arg).expanduser().resolve()
+        else:
+            output_path = Path(os.path.expanduser("~")).resolve() / "Documents" / "Packagemaker Projects" / "Compiled"
+
+        print(f"[INFO] Buscando proyectos en: {base_path}")
+        print(f"[INFO] Salida: {output_path}")
+        builder = BatchBuilder(
+            base_path,
+            output_path,
+            jobs=kwargs.get('jobs') or 1,
+            options={
+                'use_build_cache': not kwargs.get('no_cache'),
+                'use_artifact_store': not kwargs.get('no_artifact_store'),
+                'direct_archive': kwargs.get('direct_archive', False),
+            },
+            only_changed=kwargs.get('only_changed', False),
+            log_callback=print,
+        )
+        try:
+            with cancel_on_sigint(builder.cancel_token):
+                results = builder.run()
+        except BuildCancelled:
+            print("[WARN] Build por lotes cancelado.")
+            sys.exit(130)
+        if not results:
+            print("[INFO] No hay proyectos que compilar.")
+            return True
+        print()
+        print(format_batch_summary(results))
+        return all(result.ok for result in results)
+    
+    elif action == 'check_updates' and kwargs.get('headless'):
+        from lib.coreUpdater.update_check import UpdateChecker, format_update_summary, scan_installed_apps
+
+        project_source = data if isinstance(data, dict) else {'path': data}
+        apps_path = Path(project_source.get('path')).expanduser()
+        print(f"[INFO] Buscando apps instaladas en: {apps_path}")
+        apps = scan_installed_apps(apps_path)
+        if not apps:
+            print("[INFO] No hay apps instaladas.")
+            return True
+        checker = UpdateChecker(workers=kwargs.get('jobs') or 1)
+        results = checker.check(apps, force=kwargs.get('refresh', False))
+        print(format_update_summary(results))
+        return not any(result.error for result in results)
+    
     elif action == 'repair_project' and kwargs.get('headless'):
         from lib.template_engine import normalize_platform, repair_project_from_templates
         from xml.etree import ElementTree as ET
@@ -16,6 +16,7 @@ from .core import (
     _fR_exe,
     cache_get,
     cache_set,
+    cache_staging_path,
     cache_clear,
     KillerLogic,
     XML_PATH,
@@ -47,6 +48,7 @@ try:
         InstallerWorker,
         IFLAPPInstallerWorker,
         EXEInstallerWorker,
+        UpdateCheckThread,
     )
 except ImportError:
     # PyQt6 not available - provide dummy classes
@@ -58,6 +60,7 @@ except ImportError:
         def run(self): pass
     IFLAPPInstallerWorker = InstallerWorker
     EXEInstallerWorker = InstallerWorker
+    UpdateCheckThread = None
 
 # Windows - safe import with fallback
 try:
@@ -108,6 +111,7 @@ __all__ = [
     '_fR_exe',
     'cache_get',
     'cache_set',
+    'cache_staging_path',
     'cache_clear',
     'KillerLogic',
     'XML_PATH',
@@ -124,6 +128,7 @@ __all__ = [
     'InstallerWorker',
     'IFLAPPInstallerWorker',
     'EXEInstallerWorker',
+    'UpdateCheckThread',
     # Windows
     'ModernUpdaterWindow',
     'IFLAPPInstallerWindow',
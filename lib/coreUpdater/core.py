@@ -5,6 +5,7 @@ Core utilities and logic for the updater system.
 """
 import sys
 import os
+import re
 import subprocess
 import xml.etree.ElementTree as ET
 from datetime import datetime
@@ -21,8 +22,11 @@ LOG_PATH = "updater_log.txt"
 CHECK_INTERVAL = 60
 GITHUB_API = "https://api.github.com"
 
-# --- CACHE EN MEMORIA ---
-_memory_cache = {}
+# --- CACHE DE DESCARGAS (en disco, LRU con límite de tamaño) ---
+# Se consulta en cada llamada para respetar PACKAGEMAKER_CACHE_DIR.
+def _download_cache():
+    from lib.download_cache import DownloadCache
+    return DownloadCache()
 
 def log(msg):
     ts = datetime.now().strftime("[%Y-%m-%d %H:%M:%S]")
@@ -45,8 +49,12 @@ def _rXml(path):
         }
     except: return {}
 
+def remote_details_url(author, app):
+    """URL del details.xml publicado en la rama main del repositorio de la app."""
+    return f"https://raw.githubusercontent.com/{author}/{app}/main/details.xml"
+
 def _rXml_r(author, app):
-    url = f"https://raw.githubusercontent.com/{author}/{app}/main/details.xml"
+    url = remote_details_url(author, app)
     try:
         if requests:
             r = requests.get(url, timeout=10)
@@ -62,27 +70,47 @@ def _rXml_r(author, app):
     except: pass
     return ""
 
+def version_key(version):
+    """Clave numérica ordenable: ``v1.2.3-26.05-20.13`` -> ``((1, 2, 3), (26, 5, 20, 13))``.
+
+    Los ceros finales de la versión base no cuentan (``1.0`` == ``1.0.0``) y
+    el timestamp de build desempata versiones base iguales.
+    """
+    text = str(version or "").strip().lstrip("vV")
+    base, _, stamp = text.partition("-")
+    numbers = [int(n) for n in re.findall(r"\d+", base)]
+    while numbers and numbers[-1] == 0:
+        numbers.pop()
+    return tuple(numbers), tuple(int(n) for n in re.findall(r"\d+", stamp))
+
+def is_newer_version(remote, local):
+    """True si *remote* es estrictamente posterior a *local*."""
+    return version_key(remote) > version_key(local)
+
+_asset_prober = None
+
+def _prober():
+    """AssetProber compartido: HEAD concurrentes, keep-alive y caché con TTL."""
+    global _asset_prober
+    if _asset_prober is None:
+        from .probe import AssetProber
+        _asset_prober = AssetProber()
+    return _asset_prober
+
 def _check_url_exists(url):
-    """Verifica si una URL existe (HEAD request)."""
-    if requests:
-        try:
-            r = requests.head(url, timeout=15, allow_redirects=True)
-            return r.status_code == 200
-        except: pass
-    else:
-        # Fallback usando urllib
-        try:
-            import urllib.request
-            req = urllib.request.Request(url, method='HEAD')
-            with urllib.request.urlopen(req, timeout=15) as response:
-                return response.status == 200
-        except: pass
-    return False
+    """Verifica si una URL existe (HEAD request, resultado cacheado)."""
+    return _prober().exists(url)
 
-def _fR(author, app, version, platform, publisher):
+def _release_url(author, app, version, filename):
+    return f"https://github.com/{author}/{app}/releases/download/{version}/{filename}"
+
+def _iflapp_url(author, app, version, platform, publisher):
     from lib.projectNameFormatter import ProjectNameFormatter
     filename = ProjectNameFormatter.format_iflapp_filename(publisher, app, version, platform)
-    url = f"https://github.com/{author}/{app}/releases/download/{version}/{filename}"
+    return _release_url(author, app, version, filename)
+
+def _fR(author, app, version, platform, publisher):
+    url = _iflapp_url(author, app, version, platform, publisher)
     if _check_url_exists(url):
         return url
     return None
@@ -99,26 +127,34 @@ def _fR_exe(author, app, version, platform, publisher):
         f"{app}-Setup-{version}.exe",
         f"{publisher}.{app}-{version}.exe",
     ]
-    
-    for filename in exe_patterns:
-        url = f"https://github.com/{author}/{app}/releases/download/{version}/{filename}"
-        if _check_url_exists(url):
-            log(f"[EXE] Setup encontrado: {filename}")
-            return url, filename
+    urls = {_release_url(author, app, version, filename): filename for filename in exe_patterns}
+    # Todos los candidatos a la vez; el .iflapp va en el mismo lote para que
+    # el _fR posterior ya lo encuentre resuelto.
+    url = _prober().first_existing(urls, prefetch=[_iflapp_url(author, app, version, platform, publisher)])
+    if url:
+        log(f"[EXE] Setup encontrado: {urls[url]}")
+        return url, urls[url]
     
     return None, None
 
 def cache_get(key):
-    """Obtiene valor de caché en memoria."""
-    return _memory_cache.get(key)
+    """Ruta del archivo guardado en la caché de descargas para *key*, o None."""
+    return _download_cache().get(key)
 
 def cache_set(key, value):
-    """Guarda valor en caché en memoria."""
-    _memory_cache[key] = value
+    """Guarda en la caché de descargas un archivo (se mueve, sin copiarlo) o bytes.
+
+    Devuelve la ruta dentro de la caché, o None si no se pudo guardar.
+    """
+    return _download_cache().put(key, value)
+
+def cache_staging_path(key, filename):
+    """Ruta donde descargar *filename* para que ``cache_set`` lo publique con un rename."""
+    return _download_cache().staging_path(key, filename)
 
 def cache_clear():
-    """Limpia caché en memoria."""
-    _memory_cache.clear()
+    """Vacía la caché de descargas."""
+    _download_cache().clear()
 
 class KillerLogic:
     @staticmethod
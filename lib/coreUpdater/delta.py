@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Delta updates: patch an installed app in place from a ``.delta.iflapp``.
+
+Un paquete delta (ver ``lib.artifact_store.write_delta_package``) lleva solo
+los miembros añadidos o modificados y un manifiesto con el SHA-256 de todos
+los archivos de la versión nueva, la identidad de la versión base y la lista
+de archivos eliminados. Todo se verifica antes de tocar la instalación; si
+algo no cuadra se lanza ``DeltaUpdateError`` y el llamador descarga el paquete
+completo.
+"""
+import hashlib
+import os
+import shutil
+import sys
+import time
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from lib.artifact_store import MANIFEST_NAME, manifest_bytes, manifest_id, parse_manifest, read_manifest
+from lib.downloader import DownloadCancelled, DownloadError, DownloadProgress, download_file
+from lib.safe_zip import UnsafeZipMemberError, resolve_member_path, safe_extract_zip
+from .core import log
+
+DELTA_DOWNLOAD_NAME = "pending_update.delta.zip"
+STAGING_DIR_NAME = ".pm-delta-staging"
+
+
+class DeltaUpdateError(Exception):
+    """El delta no se puede aplicar sobre esta instalación; usar el paquete completo."""
+
+
+def delta_url_for(url: str) -> str:
+    """URL del delta publicado junto al paquete completo (``App.iflapp`` -> ``App.delta.iflapp``)."""
+    base, dot, suffix = url.rpartition(".")
+    if not dot or "/" in suffix:
+        return url + ".delta"
+    return f"{base}.delta.{suffix}"
+
+
+def _sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@dataclass
+class DeltaPlan:
+    """Delta descargado y verificado, listo para aplicarse sobre ``install_dir``."""
+
+    install_dir: Path
+    delta_file: Path
+    staging_dir: Path
+    manifest: Dict
+    files: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+    @property
+    def version(self) -> str:
+        return self.manifest.get("package", {}).get("version", "")
+
+    def apply(self) -> None:
+        """Mueve los archivos verificados a su sitio y borra los eliminados.
+
+        Un archivo bloqueado o en ejecución (``sys.argv[0]``) se aparta a
+        ``<archivo>.old.<ts>`` antes de reemplazarlo. Si ni así se puede, se
+        lanza ``DeltaUpdateError`` sin registrar el manifiesto nuevo: la
+        instalación ya no coincide con él y el llamador instala el paquete
+        completo.
+        """
+        running = os.path.abspath(sys.argv[0]) if sys.argv and sys.argv[0] else None
+        for name in self.files:
+            src = resolve_member_path(self.staging_dir, name)
+            dst = resolve_member_path(self.install_dir, name)
+            try:
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                if running and os.path.abspath(dst) == running:
+                    self._move_aside(dst)
+                try:
+                    os.replace(src, dst)
+                except PermissionError:
+                    # Archivo bloqueado (Windows): apartarlo y reintentar.
+                    self._move_aside(dst)
+                    os.replace(src, dst)
+            except OSError as e:
+                self.discard()
+                raise DeltaUpdateError(f"No se pudo reemplazar {name}: {e}") from e
+        for name in self.removed:
+            target = resolve_member_path(self.install_dir, name)
+            try:
+                target.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                log(f"[DELTA] No se pudo eliminar {name}: {e}")
+        # El manifiesto instalado es el del paquete completo: base del siguiente delta.
+        full = {key: value for key, value in self.manifest.items() if key != "delta"}
+        (self.install_dir / MANIFEST_NAME).write_bytes(manifest_bytes(full))
+        self.discard()
+
+    @staticmethod
+    def _move_aside(path: Path) -> None:
+        if path.exists():
+            os.rename(path, f"{path}.old.{int(time.time())}")
+
+    def discard(self) -> None:
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+        try:
+            self.delta_file.unlink()
+        except OSError:
+            pass
+
+
+def prepare_delta(delta_file: Path, install_dir: Path) -> DeltaPlan:
+    """Verifica *delta_file* contra la instalación y extrae sus archivos a un staging.
+
+    No modifica la instalación. Lanza ``DeltaUpdateError`` si la instalación no
+    es la base del delta, si algún archivo local que el delta reutiliza fue
+    modificado o si el contenido descargado no coincide con su hash.
+    """
+    install_dir = Path(install_dir)
+    manifest = read_manifest(delta_file)
+    if manifest is None or "delta" not in manifest:
+        raise DeltaUpdateError(f"{Path(delta_file).name} no es un paquete delta")
+    try:
+        local = parse_manifest((install_dir / MANIFEST_NAME).read_bytes())
+    except OSError:
+        local = None
+    if local is None:
+        raise DeltaUpdateError("La instalación no tiene manifiesto de archivos")
+    base = manifest["delta"].get("base", {})
+    if manifest_id(local) != base.get("manifest_sha256"):
+        raise DeltaUpdateError(
+            f"La versión instalada ({local.get('package', {}).get('version', '?')}) "
+            f"no es la base del delta ({base.get('version', '?')})"
+        )
+
+    members = manifest["members"]
+    with zipfile.ZipFile(delta_file) as archive:
+        in_delta = [name for name in archive.namelist() if name != MANIFEST_NAME]
+    delta_names = set(in_delta)
+    unknown = [name for name in in_delta if name not in members]
+    if unknown:
+        raise DeltaUpdateError(f"El delta contiene archivos fuera del manifiesto: {unknown[0]}")
+
+    try:
+        for name, entry in members.items():
+            if name in delta_names:
+                continue
+            path = resolve_member_path(install_dir, name)
+            if not path.is_file() or path.stat().st_size != entry["size"] or _sha256_file(path) != entry["sha256"]:
+                raise DeltaUpdateError(f"Archivo local modificado o ausente: {name}")
+        removed = list(manifest["delta"].get("removed", []))
+        for name in removed:
+            resolve_member_path(install_dir, name)
+    except UnsafeZipMemberError as e:
+        raise DeltaUpdateError(str(e)) from e
+
+    staging_dir = install_dir / STAGING_DIR_NAME
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    try:
+        with zipfile.ZipFile(delta_file) as archive:
+            safe_extract_zip(archive, staging_dir)
+        for name in in_delta:
+            if _sha256_file(resolve_member_path(staging_dir, name)) != members[name]["sha256"]:
+                raise DeltaUpdateError(f"Hash incorrecto en el delta: {name}")
+    except (DeltaUpdateError, UnsafeZipMemberError, OSError, zipfile.BadZipFile) as e:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        if isinstance(e, DeltaUpdateError):
+            raise
+        raise DeltaUpdateError(f"Delta corrupto: {e}") from e
+
+    return DeltaPlan(Path(install_dir), Path(delta_file), staging_dir, manifest, in_delta, removed)
+
+
+def fetch_delta(
+    url: str,
+    install_dir: Path = Path("."),
+    progress: Optional[Callable[[DownloadProgress], None]] = None,
+    is_running: Optional[Callable[[], bool]] = None,
+) -> DeltaPlan:
+    """Descarga el delta correspondiente al paquete *url* y lo verifica.
+
+    Si la instalación no tiene manifiesto no se descarga nada.
+    """
+    install_dir = Path(install_dir)
+    if not (install_dir / MANIFEST_NAME).is_file():
+        raise DeltaUpdateError("La instalación no tiene manifiesto de archivos")
+    delta_file = install_dir / DELTA_DOWNLOAD_NAME
+    try:
+        download_file(delta_url_for(url), delta_file, progress=progress, is_running=is_running)
+    except DownloadCancelled:
+        raise
+    except DownloadError as e:
+        raise DeltaUpdateError(f"Delta no disponible: {e}") from e
+    try:
+        return prepare_delta(delta_file, install_dir)
+    except BaseException:
+        try:
+            delta_file.unlink()
+        except OSError:
+            pass
+        raise
@@ -129,12 +129,15 @@ def install_iflapp(iflapp_path, target_dir=None, silent=False):
         # Modo silencioso: sin interfaz
         worker = IFLAPPInstallerWorker(iflapp_path, target_dir or os.path.join(os.getcwd(), "installed_app"))
         
-        # Ejecutar síncronamente
+        # Ejecutar síncronamente; el worker informa del resultado por su señal finished
+        outcome = []
+        worker.finished.connect(lambda ok, msg: outcome.append((ok, msg)))
         try:
             worker.run()
-            return True, "Instalación completada"
         except Exception as e:
             return False, str(e)
+        ok, msg = outcome[-1] if outcome else (False, "El instalador no informó del resultado")
+        return ok, "Instalación completada" if ok else msg
     else:
         # Modo GUI: mostrar ventana
         app = QApplication.instance() or QApplication(sys.argv)
@@ -177,7 +180,7 @@ def update_app(silent=False, accept_license=False, cache_in_memory=True):
     Args:
         silent: Si True, no muestra interfaz gráfica
         accept_license: Si True, acepta términos automáticamente (modo silent)
-        cache_in_memory: Si True, usa caché en memoria para descargas
+        cache_in_memory: Si True, reutiliza la caché de descargas en disco
     
     Returns:
         bool: True si se actualizó correctamente
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Concurrent release asset probing for the updater.
+
+``_fR_exe`` y ``_fR`` prueban varios nombres candidatos de asset con ``HEAD``.
+``AssetProber`` lanza todas las peticiones a la vez en un pool de hilos,
+reutiliza conexiones keep-alive por hilo y host, y devuelve el primer acierto
+en orden de prioridad. Cada resultado (o la petición aún en curso) se guarda
+con un TTL, distinto para aciertos y fallos, así que volver a preguntar por la
+misma URL no genera tráfico.
+"""
+import http.client
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+# requests con fallback a urllib
+try:
+    import requests
+except ImportError:
+    requests = None
+
+PROBE_TIMEOUT = 15
+PROBE_WORKERS = 8
+# Un asset publicado no desaparece; uno ausente puede publicarse en minutos.
+POSITIVE_TTL = 600
+NEGATIVE_TTL = 60
+MAX_REDIRECTS = 5
+USER_AGENT = "PackageMaker-Updater"
+_REDIRECTS = (301, 302, 303, 307, 308)
+
+
+class KeepAliveClient:
+    """HTTP con conexiones keep-alive por hilo y host.
+
+    Usa un ``requests.Session`` por hilo si ``requests`` está instalado y, si
+    no, conexiones ``http.client`` reutilizadas con redirecciones manuales.
+    """
+
+    def __init__(self, timeout=PROBE_TIMEOUT):
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None):
+        """Devuelve ``(status, cabeceras, cuerpo)`` siguiendo redirecciones."""
+        headers = dict(headers or {})
+        headers.setdefault("User-Agent", USER_AGENT)
+        if requests:
+            session = getattr(self._local, "session", None)
+            if session is None:
+                session = self._local.session = requests.Session()
+            r = session.request(method, url, headers=headers, timeout=self.timeout, allow_redirects=True)
+            return r.status_code, r.headers, r.content
+        for _ in range(MAX_REDIRECTS + 1):
+            status, response_headers, body = self._http_request(method, url, headers)
+            location = response_headers.get("Location")
+            if status in _REDIRECTS and location:
+                url = urljoin(url, location)
+                continue
+            return status, response_headers, body
+        return 0, {}, b""
+
+    def _connection(self, scheme: str, netloc: str, fresh: bool = False):
+        connections = getattr(self._local, "connections", None)
+        if connections is None:
+            connections = self._local.connections = {}
+        key = (scheme, netloc)
+        conn = connections.get(key)
+        if conn is None or fresh:
+            if conn is not None:
+                conn.close()
+            cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            conn = connections[key] = cls(netloc, timeout=self.timeout)
+        return conn
+
+    def _http_request(self, method: str, url: str, headers: Dict[str, str]):
+        parts = urlsplit(url)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        for attempt in range(2):
+            conn = self._connection(parts.scheme, parts.netloc, fresh=attempt > 0)
+            try:
+                conn.request(method, path, headers=headers)
+                response = conn.getresponse()
+                body = response.read()
+                return response.status, response.headers, body
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                # El servidor cerró la conexión reutilizada: reintentar con una nueva.
+                if attempt:
+                    raise
+            except Exception:
+                conn.close()
+                raise
+        return 0, {}, b""
+
+
+class AssetProber:
+    """Comprueba la existencia de URLs con ``HEAD`` concurrentes y caché con TTL."""
+
+    def __init__(self, timeout=PROBE_TIMEOUT, max_workers=PROBE_WORKERS,
+                 ttl=POSITIVE_TTL, negative_ttl=NEGATIVE_TTL):
+        self.timeout = timeout
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="asset-probe")
+        self._lock = threading.Lock()
+        # url -> (futuro, instante de caducidad; None mientras está en curso)
+        self._entries: Dict[str, Tuple[Future, Optional[float]]] = {}
+        self._client = KeepAliveClient(timeout)
+
+    # ── caché ────────────────────────────────────────────────────────────────
+
+    def _future(self, url: str) -> Future:
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                future, expires = entry
+                if expires is None or time.monotonic() < expires:
+                    return future
+            future = self._pool.submit(self._head, url)
+            self._entries[url] = (future, None)
+        future.add_done_callback(lambda f, url=url: self._settle(url, f))
+        return future
+
+    def _settle(self, url: str, future: Future) -> None:
+        ttl = self.ttl if future.result() else self.negative_ttl
+        with self._lock:
+            if self._entries.get(url, (None,))[0] is future:
+                self._entries[url] = (future, time.monotonic() + ttl)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    # ── API ──────────────────────────────────────────────────────────────────
+
+    def exists(self, url: str) -> bool:
+        return self._future(url).result()
+
+    def first_existing(self, urls: Iterable[str], prefetch: Iterable[str] = ()) -> Optional[str]:
+        """Primera URL de *urls* que existe, respetando el orden de prioridad.
+
+        Todas se consultan a la vez; solo se espera a las de mayor prioridad
+        que el acierto. Las URLs de *prefetch* se lanzan en el mismo lote para
+        que una consulta posterior las encuentre en caché.
+        """
+        urls: List[str] = list(urls)
+        futures = [self._future(url) for url in urls]
+        for url in prefetch:
+            self._future(url)
+        for url, future in zip(urls, futures):
+            if future.result():
+                return url
+        return None
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _head(self, url: str) -> bool:
+        try:
+            status, _, _ = self._client.request("HEAD", url)
+        except Exception:
+            return False
+        return status == 200
@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Batched update checks for every app installed in Fluthin Apps.
+
+Las apps se descubren con el mismo escaneo de ``details.xml`` que usa el
+gestor (``lib.project_scan``). Los ``details.xml`` remotos se consultan a la vez sobre conexiones
+keep-alive con peticiones condicionales (``If-None-Match`` /
+``If-Modified-Since``): si el archivo no cambió, el servidor responde 304 sin
+cuerpo. Cada resultado se guarda en ``update-checks.json`` dentro de la caché
+de PackageMaker; durante ``max_age`` segundos ni siquiera se consulta la red.
+"""
+import json
+import os
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from lib.build_cache import default_cache_dir
+from lib.project_scan import scan_project_dirs
+from .core import _rXml, is_newer_version, remote_details_url
+from .probe import KeepAliveClient
+
+DEFAULT_MAX_AGE = 15 * 60
+CHECK_WORKERS = 8
+CHECK_TIMEOUT = 10
+
+
+@dataclass
+class InstalledApp:
+    folder: str
+    app: str
+    version: str
+    author: str = ""
+    publisher: str = ""
+    platform: str = ""
+
+
+@dataclass
+class UpdateStatus:
+    app: InstalledApp
+    remote_version: str = ""
+    error: str = ""
+    # "network" (200), "not-modified" (304) o "cache" (sin consultar la red)
+    source: str = "network"
+
+    @property
+    def outdated(self) -> bool:
+        # Solo si la remota es posterior: una versión local más nueva (build
+        # propio, rama de pruebas) no es una actualización pendiente.
+        return bool(self.remote_version) and is_newer_version(self.remote_version, self.app.version)
+
+
+def scan_installed_apps(base) -> List[InstalledApp]:
+    """Apps instaladas bajo *base* con los datos de su ``details.xml``."""
+    apps = []
+    for folder in scan_project_dirs(base):
+        data = _rXml(os.path.join(folder, "details.xml"))
+        if not data.get("app"):
+            continue
+        apps.append(InstalledApp(
+            folder=folder,
+            app=data["app"],
+            version=data["version"],
+            author=data["author"],
+            publisher=data["publisher"],
+            platform=data["platform"],
+        ))
+    return apps
+
+
+class UpdateChecker:
+    """Consulta concurrente de versiones remotas con caché en disco."""
+
+    def __init__(
+        self,
+        cache_path: Optional[Path] = None,
+        max_age: float = DEFAULT_MAX_AGE,
+        workers: int = CHECK_WORKERS,
+        timeout: float = CHECK_TIMEOUT,
+        url_for: Callable[[str, str], str] = remote_details_url,
+    ):
+        self.cache_path = Path(cache_path or default_cache_dir() / "update-checks.json")
+        self.max_age = max_age
+        self.workers = workers
+        self.url_for = url_for
+        self._client = KeepAliveClient(timeout)
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as handle:
+                entries = json.load(handle)
+        except (OSError, ValueError):
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def _save(self, entries: Dict[str, Dict]) -> None:
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_path.with_name(f"{self.cache_path.name}.tmp-{os.getpid()}")
+            with open(tmp, "w", encoding="utf-8") as handle:
+                json.dump(entries, handle, indent=1)
+            os.replace(tmp, self.cache_path)
+        except OSError:
+            pass
+
+    def check(
+        self,
+        apps: List[InstalledApp],
+        force: bool = False,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> List[UpdateStatus]:
+        """Estado de cada app de *apps*, en el mismo orden.
+
+        Con *force* se ignora ``max_age`` (la petición sigue siendo condicional).
+        """
+        entries = self._load()
+        results: List[Optional[UpdateStatus]] = [None] * len(apps)
+        with ThreadPoolExecutor(max_workers=max(1, self.workers), thread_name_prefix="update-check") as pool:
+            futures = {}
+            for index, app in enumerate(apps):
+                url = self.url_for(app.author, app.app) if app.author else ""
+                futures[pool.submit(self._check_one, app, url, entries.get(url), force)] = (index, url)
+            for done, future in enumerate(as_completed(futures), 1):
+                index, url = futures[future]
+                status, entry = future.result()
+                results[index] = status
+                if entry is not None:
+                    entries[url] = entry
+                if progress:
+                    progress(done, len(apps))
+        self._save(entries)
+        return results
+
+    def _check_one(self, app: InstalledApp, url: str, entry: Optional[Dict], force: bool):
+        if not url:
+            return UpdateStatus(app, error="details.xml sin autor"), None
+        now = time.time()
+        if entry and not force and now - entry.get("checked_at", 0) < self.max_age:
+            return UpdateStatus(app, entry.get("version", ""), source="cache"), None
+
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        try:
+            status, response_headers, body = self._client.request("GET", url, headers)
+        except Exception as e:
+            return UpdateStatus(app, error=str(e) or type(e).__name__), None
+
+        if status == 304 and entry:
+            entry = dict(entry, checked_at=now)
+            return UpdateStatus(app, entry.get("version", ""), source="not-modified"), entry
+        if status != 200:
+            return UpdateStatus(app, error=f"HTTP {status}"), None
+        try:
+            version = ET.fromstring(body.decode("utf-8")).findtext("version", "").strip()
+        except (ET.ParseError, UnicodeDecodeError):
+            return UpdateStatus(app, error="details.xml remoto inválido"), None
+        entry = {
+            "version": version,
+            "etag": response_headers.get("ETag"),
+            "last_modified": response_headers.get("Last-Modified"),
+            "checked_at": now,
+        }
+        return UpdateStatus(app, version), entry
+
+
+def check_installed_apps(base, force: bool = False, progress=None, **kwargs) -> List[UpdateStatus]:
+    return UpdateChecker(**kwargs).check(scan_installed_apps(base), force=force, progress=progress)
+
+
+def format_update_summary(results: List[UpdateStatus]) -> str:
+    """Tabla de apps: versión instalada, remota y estado."""
+    header = ("App", "Instalada", "Disponible", "Estado")
+    rows = [
+        (
+            f"{result.app.publisher}.{result.app.app}" if result.app.publisher else result.app.app,
+            result.app.version,
+            result.remote_version or "-",
+            "ERROR: " + result.error if result.error else "ACTUALIZAR" if result.outdated else "al día",
+        )
+        for result in results
+    ]
+    widths = [max(len(row[i]) for row in [header] + rows) for i in range(len(header))]
+    lines = ["  ".join(cell.ljust(width) for cell, width in zip(header, widths))]
+    lines.append("  ".join("-" * width for width in widths))
+    lines.extend("  ".join(cell.ljust(width) for cell, width in zip(row, widths)) for row in rows)
+    outdated = sum(1 for result in results if result.outdated)
+    errors = sum(1 for result in results if result.error)
+    lines.append(f"{outdated} con actualización, {len(results) - outdated - errors} al día, {errors} sin comprobar")
+    return "\n".join(lines)
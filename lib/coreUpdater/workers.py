@@ -3,6 +3,7 @@
 """
 Worker classes for background installation tasks.
 """
+import hashlib
 import os
 import sys
 import shutil
@@ -10,56 +11,80 @@ import zipfile
 import time
 import traceback
 from io import BytesIO
+from pathlib import Path
 from PyQt6.QtCore import QObject, QThread, pyqtSignal
-from .core import log, KillerLogic, cache_get, cache_set
-from lib.safe_zip import safe_extract_zip
-
-# requests con fallback a urllib
-try:
-    import requests
-except ImportError:
-    requests = None
+from .core import log, KillerLogic, cache_get, cache_set, cache_staging_path
+from .delta import DeltaUpdateError, fetch_delta
+from lib.downloader import DownloadCancelled, DownloadProgress, download_file, fetch_checksum
+from lib.safe_zip import EXTRACT_WORKERS, ExtractionCancelled, safe_extract_zip
+from lib.staged_install import StagedInstall
 
 class InstallerWorker(QObject):
     finished = pyqtSignal(bool, str)
     progress = pyqtSignal(int)
     status = pyqtSignal(str)
 
-    def __init__(self, url, app_data):
+    def __init__(self, url, app_data, sha256=None):
         super().__init__()
         self.url = url
         self.app = app_data["app"]
+        # SHA-256 esperado del paquete; si no se indica se busca "<url>.sha256".
+        self.sha256 = sha256
         self._running = True
 
+    def _on_download(self, update):
+        if update.total: self.progress.emit(update.percent)
+        self.status.emit(f"Descargando... {update.describe()}")
+
+    def _try_delta(self):
+        """Intenta actualizar solo con el delta; False si hay que usar el paquete completo."""
+        self.status.emit("Buscando actualización incremental...")
+        try:
+            plan = fetch_delta(self.url, ".", self._on_download, lambda: self._running)
+        except DeltaUpdateError as e:
+            log(f"[DELTA] {e}; se usará el paquete completo")
+            return False
+
+        log(f"[DELTA] Verificado: {len(plan.files)} archivos nuevos o modificados, {len(plan.removed)} eliminados")
+        self.status.emit("Cerrando aplicación principal...")
+        KillerLogic.kill_target(self.app)
+        time.sleep(2)
+
+        self.status.emit("Aplicando actualización incremental...")
+        try:
+            plan.apply()
+        except DeltaUpdateError as e:
+            log(f"[DELTA] {e}; se usará el paquete completo")
+            return False
+        return True
+
+    def _sync_templates(self):
+        try:
+            from .installer import sync_templates_to_local
+            self.status.emit("Sincronizando plantillas...")
+            sync_ok, sync_msg, sync_files = sync_templates_to_local()
+            if sync_ok and sync_files:
+                log(f"[UPDATE] Plantillas sincronizadas: {len(sync_files)} archivos")
+            elif not sync_ok:
+                log(f"[UPDATE] Sincronización de plantillas: {sync_msg}")
+        except Exception as sync_err:
+            log(f"[UPDATE] Error sincronizando plantillas: {sync_err}")
+
     def run(self):
         temp_zip = "pending_update.zip"
         ext_dir = "update_temp_extracted"
         try:
+            if self._try_delta():
+                self._sync_templates()
+                self.status.emit("Finalizando...")
+                self.finished.emit(True, "OK")
+                return
+            if not self._running: return
+
             self.status.emit("Conectando con el servidor...")
-            
-            if requests:
-                r = requests.get(self.url, stream=True)
-                total = int(r.headers.get("content-length", 0))
-                down = 0
-                with open(temp_zip, "wb") as f:
-                    for chunk in r.iter_content(8192):
-                        if not self._running: return
-                        f.write(chunk)
-                        down += len(chunk)
-                        if total: self.progress.emit(int(down * 100 / total))
-            else:
-                # Fallback usando urllib
-                import urllib.request
-                with urllib.request.urlopen(self.url, timeout=60) as response:
-                    total = int(response.headers.get("Content-Length", 0))
-                    down = 0
-                    with open(temp_zip, "wb") as f:
-                        while True:
-                            chunk = response.read(8192)
-                            if not chunk or not self._running: break
-                            f.write(chunk)
-                            down += len(chunk)
-                            if total: self.progress.emit(int(down * 100 / total))
+            sha256 = self.sha256 or fetch_checksum(self.url)
+            download_file(self.url, temp_zip, sha256=sha256,
+                          progress=self._on_download, is_running=lambda: self._running)
 
             self.status.emit("Descomprimiendo actualización...")
             if os.path.exists(ext_dir): shutil.rmtree(ext_dir)
@@ -89,16 +114,7 @@ class InstallerWorker(QObject):
                     except: pass
 
             # Sincronizar plantillas antes de borrar
-            try:
-                from .installer import sync_templates_to_local
-                self.status.emit("Sincronizando plantillas...")
-                sync_ok, sync_msg, sync_files = sync_templates_to_local()
-                if sync_ok and sync_files:
-                    log(f"[UPDATE] Plantillas sincronizadas: {len(sync_files)} archivos")
-                elif not sync_ok:
-                    log(f"[UPDATE] Sincronización de plantillas: {sync_msg}")
-            except Exception as sync_err:
-                log(f"[UPDATE] Error sincronizando plantillas: {sync_err}")
+            self._sync_templates()
 
             try: shutil.rmtree(ext_dir)
             except: pass
@@ -108,6 +124,9 @@ class InstallerWorker(QObject):
             self.status.emit("Finalizando...")
             self.finished.emit(True, "OK")
 
+        except DownloadCancelled:
+            # El .part se conserva: la próxima actualización reanuda la descarga.
+            log("[UPDATE] Descarga cancelada")
         except Exception as e:
             log(traceback.format_exc())
             self.finished.emit(False, str(e))
@@ -124,36 +143,49 @@ class IFLAPPInstallerWorker(QObject):
         super().__init__()
         self.iflapp_path = iflapp_path
         self.target_dir = target_dir
-    
+        self._running = True
+
+    def cancel(self):
+        """Pide parar; llamar directamente (no por señal), el hilo del worker está ocupado."""
+        self._running = False
+
+    def _on_extract(self, update):
+        self.progress.emit(update.percent)
+        rate = DownloadProgress(update.bytes_done, update.bytes_total, update.bytes_per_sec, update.eta)
+        self.status.emit(
+            f"Extrayendo {update.members_done}/{update.members_total} archivos... {rate.describe()}"
+        )
+
     def run(self):
+        install = StagedInstall(self.target_dir)
         try:
+            # Se extrae al lado de la instalación actual, que no se toca hasta el final.
             self.status.emit("Extrayendo paquete...")
-            
-            # Crear directorio destino si no existe
-            os.makedirs(self.target_dir, exist_ok=True)
-            
-            # Extraer archivo .iflapp (zip)
-            with zipfile.ZipFile(self.iflapp_path, 'r') as zf:
-                files = safe_extract_zip(zf, self.target_dir)
-                total = len(files)
-                for i, _ in enumerate(files):
-                    self.progress.emit(int((i + 1) * 100 / total) if total else 100)
-            
+            install.stage_archive(
+                self.iflapp_path, progress=self._on_extract, workers=EXTRACT_WORKERS,
+                is_running=lambda: self._running,
+            )
+
+            self.status.emit("Verificando paquete...")
+            app_name = install.verify().findtext("app", "Aplicación")
+            # Último punto en que cancelar no deja rastro: después viene el intercambio.
+            if not self._running:
+                raise ExtractionCancelled("Instalación cancelada")
+
             self.status.emit("Configurando aplicación...")
-            
-            # Verificar details.xml
-            import xml.etree.ElementTree as ET
-            details_path = os.path.join(self.target_dir, "details.xml")
-            if os.path.exists(details_path):
-                tree = ET.parse(details_path)
-                root = tree.getroot()
-                app_name = root.findtext("app", "Aplicación")
-                self.status.emit(f"{app_name} instalado correctamente")
-            
+            result = install.commit()
+            log(f"[IFLAPP] {app_name}: {result.written} archivos escritos, {result.reused} reutilizados")
+            self.status.emit(f"{app_name} instalado correctamente")
+
             self.progress.emit(100)
             self.finished.emit(True, "OK")
-            
+
+        except ExtractionCancelled:
+            install.discard()
+            log("[IFLAPP] Instalación cancelada por el usuario")
+            self.finished.emit(False, "Instalación cancelada")
         except Exception as e:
+            install.discard()
             log(traceback.format_exc())
             self.finished.emit(False, str(e))
 
@@ -165,106 +197,66 @@ class EXEInstallerWorker(QObject):
     progress = pyqtSignal(int)
     status = pyqtSignal(str)
     
-    def __init__(self, url, filename, cache_in_memory=True):
+    def __init__(self, url, filename, cache_in_memory=True, sha256=None):
         super().__init__()
         self.url = url
         self.filename = filename
         self.cache_in_memory = cache_in_memory
+        # SHA-256 esperado del instalador; si no se indica se busca "<url>.sha256".
+        self.sha256 = sha256
         self._running = True
         self.temp_exe_path = None
+
+    def _on_download(self, update):
+        if update.total:
+            self.progress.emit(update.percent // 2)  # 0-50% descarga
+        self.status.emit(f"Descargando instalador... {update.describe()}")
+
+    def _download(self, target):
+        """Descarga el instalador en *target* (reanudable si se interrumpe)."""
+        self.status.emit("Descargando instalador...")
+        sha256 = self.sha256 or fetch_checksum(self.url)
+        return download_file(self.url, target, sha256=sha256,
+                             progress=self._on_download, is_running=lambda: self._running)
+
+    def _installer_path(self):
+        """Ruta del instalador listo para ejecutar, sin copiarlo ni cargarlo en memoria.
+
+        Con caché se ejecuta directamente desde la caché de descargas; sin ella
+        se descarga a un temporal que se borra tras la instalación.
+        """
+        import tempfile
+        cache_key = f"exe_download_{self.url}"
+        if self.cache_in_memory:
+            cached = cache_get(cache_key)
+            if cached:
+                log(f"[CACHE] Usando instalador en caché: {cached}")
+                self.status.emit("Usando instalador en caché...")
+                return cached, False
+            downloaded = self._download(cache_staging_path(cache_key, self.filename))
+            cached = cache_set(cache_key, downloaded)
+            if cached:
+                log(f"[CACHE] Guardado en caché de descargas: {cached}")
+                return cached, False
+            return downloaded, True
+
+        # Directorio estable por URL para poder reanudar la descarga.
+        url_id = hashlib.sha256(self.url.encode("utf-8")).hexdigest()[:16]
+        target = Path(tempfile.gettempdir()) / f"pm-download-{url_id}" / self.filename
+        return self._download(target), True
     
     def run(self):
         import subprocess
-        import tempfile
         
         try:
-            cache_key = f"exe_download_{self.url}"
-            
-            # Verificar caché en memoria
-            if self.cache_in_memory:
-                cached_data = cache_get(cache_key)
-                if cached_data:
-                    log("[CACHE] Usando ejecutable en caché de memoria")
-                    self.status.emit("Usando caché de memoria...")
-                    exe_data = cached_data
-                else:
-                    # Descargar a memoria
-                    self.status.emit("Descargando instalador...")
-                    if requests:
-                        r = requests.get(self.url, stream=True, timeout=60)
-                        total = int(r.headers.get("content-length", 0))
-                        
-                        chunks = []
-                        downloaded = 0
-                        for chunk in r.iter_content(65536):  # 64KB chunks
-                            if not self._running:
-                                return
-                            chunks.append(chunk)
-                            downloaded += len(chunk)
-                            if total:
-                                self.progress.emit(int(downloaded * 50 / total))  # 0-50% descarga
-                        
-                        exe_data = b"".join(chunks)
-                    else:
-                        # Fallback usando urllib
-                        import urllib.request
-                        with urllib.request.urlopen(self.url, timeout=60) as response:
-                            total = int(response.headers.get("Content-Length", 0))
-                            chunks = []
-                            downloaded = 0
-                            while True:
-                                chunk = response.read(65536)
-                                if not chunk or not self._running:
-                                    break
-                                chunks.append(chunk)
-                                downloaded += len(chunk)
-                                if total:
-                                    self.progress.emit(int(downloaded * 50 / total))
-                            exe_data = b"".join(chunks)
-                    
-                    cache_set(cache_key, exe_data)
-                    log(f"[CACHE] Guardado en memoria: {len(exe_data)} bytes")
-            else:
-                # Descarga tradicional a archivo
-                self.status.emit("Descargando instalador...")
-                temp_file = os.path.join(tempfile.gettempdir(), f"download_{os.getpid()}.tmp")
-                
-                if requests:
-                    r = requests.get(self.url, stream=True, timeout=60)
-                    total = int(r.headers.get("content-length", 0))
-                    
-                    downloaded = 0
-                    with open(temp_file, "wb") as f:
-                        for chunk in r.iter_content(65536):
-                            if not self._running:
-                                return
-                            f.write(chunk)
-                            downloaded += len(chunk)
-                            if total:
-                                self.progress.emit(int(downloaded * 50 / total))
-                    with open(temp_file, "rb") as f:
-                        exe_data = f.read()
-                else:
-                    # Fallback usando urllib
-                    import urllib.request
-                    def reporthook(block_num, block_size, total_size):
-                        if total_size > 0:
-                            self.progress.emit(int(block_num * block_size * 50 / total_size))
-                    urllib.request.urlretrieve(self.url, temp_file, reporthook)
-                    with open(temp_file, "rb") as f:
-                        exe_data = f.read()
+            exe_path, temporary = self._installer_path()
+            self.temp_exe_path = str(exe_path) if temporary else None
             
             self.progress.emit(50)
             self.status.emit("Preparando instalación...")
-            
-            # Escribir a archivo temporal
-            temp_dir = tempfile.gettempdir()
-            self.temp_exe_path = os.path.join(temp_dir, self.filename)
-            
-            with open(self.temp_exe_path, "wb") as f:
-                f.write(exe_data)
-            
-            log(f"[EXE] Guardado temporalmente: {self.temp_exe_path}")
+            if sys.platform != "win32":
+                os.chmod(exe_path, os.stat(exe_path).st_mode | 0o111)
+            log(f"[EXE] Instalador: {exe_path}")
             
             self.progress.emit(60)
             self.status.emit("Ejecutando instalador en modo silencioso...")
@@ -272,10 +264,10 @@ class EXEInstallerWorker(QObject):
             # Ejecutar con --silent
             if sys.platform == "win32":
                 # Windows: ejecutar con /SILENT o /VERYSILENT
-                cmd = [self.temp_exe_path, "/SILENT", "/NORESTART", "/CLOSEAPPLICATIONS"]
+                cmd = [str(exe_path), "/SILENT", "/NORESTART", "/CLOSEAPPLICATIONS"]
             else:
                 # Linux/Mac: ejecutar con --silent
-                cmd = [self.temp_exe_path, "--silent"]
+                cmd = [str(exe_path), "--silent"]
             
             # Ejecutar y esperar
             process = subprocess.Popen(
@@ -307,6 +299,30 @@ class EXEInstallerWorker(QObject):
                     log(f"[EXE] Temporal eliminado: {self.temp_exe_path}")
             except: pass
             
+        except DownloadCancelled:
+            log("[EXE] Descarga cancelada")
         except Exception as e:
             log(traceback.format_exc())
             self.finished.emit(False, str(e))
+
+
+class UpdateCheckThread(QThread):
+    """Comprueba en segundo plano si hay versiones nuevas de todas las apps instaladas."""
+
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(list, str)
+
+    def __init__(self, apps_dir, force=False, parent=None):
+        super().__init__(parent)
+        self.apps_dir = apps_dir
+        self.force = force
+
+    def run(self):
+        from .update_check import check_installed_apps
+        try:
+            results = check_installed_apps(self.apps_dir, force=self.force, progress=self.progress.emit)
+        except Exception as e:
+            log(traceback.format_exc())
+            self.finished.emit([], str(e))
+            return
+        self.finished.emit(results, "")
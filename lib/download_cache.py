@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Caché en disco de descargas del actualizador (instaladores ``.exe``, paquetes).
+
+Cada entrada es un directorio ``downloads/aa/<sha256 de la clave>/`` con el
+archivo descargado bajo su nombre original, de modo que el instalador se
+ejecuta directamente desde la caché sin copiarlo ni cargarlo en memoria. Las
+descargas se hacen en ``staging_path`` (mismo sistema de archivos), así que
+publicar una entrada es un ``rename``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from lib.build_cache import default_cache_dir
+
+# Tamaño máximo por defecto de la caché de descargas (1 GiB).
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+_ENTRY_MARKER = ".last-used"
+_STAGING_DIR = ".incoming"
+
+
+def _key_digest(key: str) -> str:
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+class DownloadCache:
+    """Archivos descargados indexados por clave, con expulsión LRU por tamaño."""
+
+    def __init__(self, root: Optional[Path] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root or default_cache_dir()) / "downloads"
+        self.max_bytes = max_bytes
+
+    def _entry_dir(self, key: str) -> Path:
+        digest = _key_digest(key)
+        return self.root / digest[:2] / digest
+
+    def staging_path(self, key: str, filename: str) -> Path:
+        """Ruta donde descargar *filename* antes de publicarlo con ``put``."""
+        path = self.root / _STAGING_DIR / _key_digest(key) / filename
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def get(self, key: str) -> Optional[Path]:
+        """Archivo cacheado para *key* o ``None``. Un acierto lo marca como reciente."""
+        entry = self._entry_dir(key)
+        try:
+            files = [f for f in entry.iterdir() if f.is_file() and f.name != _ENTRY_MARKER]
+        except OSError:
+            return None
+        if len(files) != 1:
+            return None
+        try:
+            (entry / _ENTRY_MARKER).touch()
+        except OSError:
+            pass
+        return files[0]
+
+    def put(self, key: str, source) -> Optional[Path]:
+        """Publica *source* (ruta que se mueve, o ``bytes``) bajo *key*.
+
+        Devuelve la ruta dentro de la caché, o ``None`` si no se pudo guardar;
+        en ese caso *source* queda donde estaba.
+        """
+        entry = self._entry_dir(key)
+        digest = entry.name
+        staging = entry.with_name(f"{digest}.tmp-{os.getpid()}")
+        try:
+            shutil.rmtree(staging, ignore_errors=True)
+            staging.mkdir(parents=True)
+            if isinstance(source, (bytes, bytearray, memoryview)):
+                target = staging / "data"
+                target.write_bytes(source)
+            else:
+                target = staging / Path(source).name
+                # rename si está en el mismo sistema de archivos (staging_path).
+                shutil.move(str(source), target)
+            (staging / _ENTRY_MARKER).touch()
+            shutil.rmtree(entry, ignore_errors=True)
+            os.replace(staging, entry)
+        except OSError:
+            if not isinstance(source, (bytes, bytearray, memoryview)) and not Path(source).exists():
+                try:
+                    shutil.move(str(staging / Path(source).name), source)
+                except OSError:
+                    pass
+            shutil.rmtree(staging, ignore_errors=True)
+            return None
+        staging_dir = self.root / _STAGING_DIR / digest
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        self.evict(keep=entry)
+        return entry / target.name
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        entries = []
+        if not self.root.is_dir():
+            return entries
+        for bucket in self.root.iterdir():
+            if not bucket.is_dir() or bucket.name == _STAGING_DIR:
+                continue
+            for entry in bucket.iterdir():
+                if not entry.is_dir() or ".tmp-" in entry.name:
+                    continue
+                try:
+                    size = sum(f.stat().st_size for f in entry.iterdir() if f.is_file())
+                    marker = entry / _ENTRY_MARKER
+                    last_used = marker.stat().st_mtime if marker.exists() else entry.stat().st_mtime
+                except OSError:
+                    continue
+                entries.append((last_used, size, entry))
+        return entries
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, keep: Optional[Path] = None) -> List[Path]:
+        """Elimina las entradas menos usadas hasta quedar bajo ``max_bytes``.
+
+        *keep* (la entrada recién publicada) nunca se expulsa, aunque por sí
+        sola supere el límite.
+        """
+        entries = sorted(self._entries(), key=lambda item: item[0])
+        total = sum(size for _, size, _ in entries)
+        removed = []
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            if keep is not None and entry == keep:
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            removed.append(entry)
+        return removed
+
+    def clear(self) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+"""
+Motor de descargas compartido por los workers de actualización e instalación.
+
+Descarga a ``<destino>.part`` y, ante un corte, reanuda desde el último byte
+con una petición HTTP ``Range``; si el servidor no admite rangos vuelve a
+empezar. Opcionalmente verifica el SHA-256 esperado antes de mover el archivo
+a su destino final. El progreso se notifica como mucho cada
+``progress_interval`` segundos con la velocidad media y el tiempo restante.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import http.client
+import os
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+# requests con fallback a urllib
+try:
+    import requests
+except ImportError:
+    requests = None
+
+CHUNK_SIZE = 64 * 1024
+DEFAULT_RETRIES = 5
+DEFAULT_BACKOFF = 0.5
+MAX_BACKOFF = 30.0
+PROGRESS_INTERVAL = 0.25
+# Ventana (segundos) sobre la que se calcula la velocidad.
+RATE_WINDOW = 3.0
+USER_AGENT = "PackageMaker-Downloader"
+
+_TRANSIENT_ERRORS = (OSError, http.client.HTTPException)
+if requests:
+    _TRANSIENT_ERRORS += (requests.RequestException,)
+
+_CONTENT_RANGE = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)")
+_UNSATISFIED_RANGE = re.compile(r"bytes\s+\*/(\d+)")
+_SHA256 = re.compile(r"\b([0-9a-fA-F]{64})\b")
+
+
+class DownloadError(Exception):
+    """La descarga no pudo completarse."""
+
+
+class DownloadCancelled(DownloadError):
+    """Se canceló la descarga; el ``.part`` se conserva para reanudarla."""
+
+
+class ChecksumMismatch(DownloadError):
+    """El archivo descargado no coincide con el SHA-256 esperado."""
+
+
+class _Transient(Exception):
+    """Fallo de red recuperable: se reintenta reanudando desde el ``.part``."""
+
+
+@dataclass
+class DownloadProgress:
+    downloaded: int
+    total: int
+    bytes_per_sec: float
+    eta: Optional[float]
+
+    @property
+    def percent(self) -> int:
+        return min(100, int(self.downloaded * 100 / self.total)) if self.total else 0
+
+    def describe(self) -> str:
+        """Texto corto para etiquetas de estado: ``3.1 MB de 12.0 MB · 1.2 MB/s · 8 s``."""
+        parts = [_format_bytes(self.downloaded)]
+        if self.total:
+            parts[0] += f" de {_format_bytes(self.total)}"
+        if self.bytes_per_sec > 0:
+            parts.append(f"{_format_bytes(self.bytes_per_sec)}/s")
+        if self.eta is not None:
+            parts.append(_format_eta(self.eta))
+        return " · ".join(parts)
+
+
+def _format_bytes(size: float) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def _format_eta(seconds: float) -> str:
+    seconds = int(seconds + 0.5)
+    if seconds < 60:
+        return f"{seconds} s restantes"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}:{seconds:02d} restantes"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d} restantes"
+
+
+class _RateMeter:
+    """Velocidad media sobre los últimos ``RATE_WINDOW`` segundos."""
+
+    def __init__(self):
+        self._samples = deque()
+
+    def add(self, now: float, downloaded: int) -> None:
+        self._samples.append((now, downloaded))
+        while len(self._samples) > 2 and now - self._samples[0][0] > RATE_WINDOW:
+            self._samples.popleft()
+
+    def rate(self) -> float:
+        if len(self._samples) < 2:
+            return 0.0
+        (start, first), (end, last) = self._samples[0], self._samples[-1]
+        return (last - first) / (end - start) if end > start else 0.0
+
+
+class _Response:
+    def __init__(self, status: int, headers, chunks: Iterator[bytes], close: Callable[[], None]):
+        self.status = status
+        self.headers = headers
+        self.chunks = chunks
+        self.close = close
+
+
+def _request(url: str, offset: int, timeout: float, chunk_size: int) -> _Response:
+    headers = {"User-Agent": USER_AGENT}
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+    if requests:
+        r = requests.get(url, headers=headers, stream=True, timeout=timeout)
+        return _Response(r.status_code, r.headers, r.iter_content(chunk_size), r.close)
+
+    # Fallback usando urllib
+    import urllib.error
+    import urllib.request
+    try:
+        response = urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=timeout)
+    except urllib.error.HTTPError as e:
+        return _Response(e.code, e.headers, iter(()), e.close)
+    return _Response(response.status, response.headers,
+                     iter(lambda: response.read(chunk_size), b""), response.close)
+
+
+def partial_path(destination: Path) -> Path:
+    return Path(f"{destination}.part")
+
+
+def _hash_prefix(path: Path, size: int):
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        remaining = size
+        while remaining:
+            chunk = handle.read(min(remaining, 1024 * 1024))
+            if not chunk:
+                break
+            digest.update(chunk)
+            remaining -= len(chunk)
+    return digest
+
+
+class Download:
+    """Una descarga reanudable de *url* a *destination*."""
+
+    def __init__(
+        self,
+        url: str,
+        destination: Path,
+        sha256: Optional[str] = None,
+        progress: Optional[Callable[[DownloadProgress], None]] = None,
+        is_running: Optional[Callable[[], bool]] = None,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+        timeout: float = 60,
+        progress_interval: float = PROGRESS_INTERVAL,
+        chunk_size: int = CHUNK_SIZE,
+    ):
+        self.url = url
+        self.destination = Path(destination)
+        self.part = partial_path(self.destination)
+        self.sha256 = sha256.lower() if sha256 else None
+        self.progress = progress
+        self.is_running = is_running
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.progress_interval = progress_interval
+        self.chunk_size = chunk_size
+        self.total = 0
+        self.resumed = 0
+        self._meter = _RateMeter()
+        self._last_emit = 0.0
+        self._digest = None
+
+    def run(self) -> Path:
+        self.destination.parent.mkdir(parents=True, exist_ok=True)
+        failures = 0
+        while True:
+            before = self._part_size()
+            try:
+                if self._fetch():
+                    break
+                raise _Transient(f"descarga incompleta ({self._part_size()} de {self.total} bytes)")
+            except _Transient as e:
+                error = e
+            except _TRANSIENT_ERRORS as e:
+                error = e
+            # Solo cuentan los intentos consecutivos que no avanzaron.
+            failures = 0 if self._part_size() > before else failures + 1
+            if failures > self.retries:
+                raise DownloadError(f"No se pudo descargar {self.url}: {error}")
+            time.sleep(min(MAX_BACKOFF, self.backoff * (2 ** max(0, failures - 1))))
+
+        self._emit(self._part_size(), force=True)
+        if self.sha256 and self._digest.hexdigest() != self.sha256:
+            actual = self._digest.hexdigest()
+            self.part.unlink()
+            raise ChecksumMismatch(f"SHA-256 incorrecto: se esperaba {self.sha256}, se obtuvo {actual}")
+        os.replace(self.part, self.destination)
+        return self.destination
+
+    def _part_size(self) -> int:
+        try:
+            return self.part.stat().st_size
+        except OSError:
+            return 0
+
+    def _check_running(self) -> None:
+        if self.is_running and not self.is_running():
+            raise DownloadCancelled(f"Descarga cancelada: {self.url}")
+
+    def _fetch(self) -> bool:
+        """Un intento. True si el ``.part`` quedó completo."""
+        self._check_running()
+        offset = self._part_size()
+        response = _request(self.url, offset, self.timeout, self.chunk_size)
+        try:
+            status = response.status
+            if status == 416 and offset:
+                match = _UNSATISFIED_RANGE.search(response.headers.get("Content-Range", ""))
+                if match and int(match.group(1)) == offset:
+                    # El .part ya estaba completo.
+                    self.total = offset
+                    self._digest = _hash_prefix(self.part, offset) if self.sha256 else None
+                    return True
+                self.part.unlink()
+                raise _Transient("rango no satisfacible; se reinicia la descarga")
+            if status == 408 or status == 429 or status >= 500:
+                raise _Transient(f"HTTP {status}")
+            if status not in (200, 206):
+                raise DownloadError(f"HTTP {status} al descargar {self.url}")
+
+            if status == 206:
+                match = _CONTENT_RANGE.search(response.headers.get("Content-Range", ""))
+                if not match or int(match.group(1)) != offset:
+                    self.part.unlink()
+                    raise _Transient("respuesta parcial inesperada; se reinicia la descarga")
+                self.total = int(match.group(3)) if match.group(3) != "*" else 0
+                mode = "ab"
+                self.resumed = offset
+            else:
+                # El servidor ignora Range: empezar de cero.
+                offset = 0
+                self.total = int(response.headers.get("Content-Length") or 0)
+                mode = "wb"
+
+            if self.sha256:
+                self._digest = _hash_prefix(self.part, offset) if offset else hashlib.sha256()
+            downloaded = offset
+            with open(self.part, mode) as handle:
+                for chunk in response.chunks:
+                    self._check_running()
+                    if not chunk:
+                        continue
+                    handle.write(chunk)
+                    if self._digest is not None:
+                        self._digest.update(chunk)
+                    downloaded += len(chunk)
+                    self._emit(downloaded)
+            return not self.total or downloaded >= self.total
+        finally:
+            response.close()
+
+    def _emit(self, downloaded: int, force: bool = False) -> None:
+        now = time.monotonic()
+        self._meter.add(now, downloaded)
+        if not self.progress or (not force and now - self._last_emit < self.progress_interval):
+            return
+        self._last_emit = now
+        rate = self._meter.rate()
+        eta = None
+        if self.total and rate > 0:
+            eta = max(0.0, (self.total - downloaded) / rate)
+        self.progress(DownloadProgress(downloaded, self.total, rate, eta))
+
+
+def download_file(url: str, destination: Path, **kwargs) -> Path:
+    """Descarga *url* en *destination* reanudando tras cortes. Ver ``Download``."""
+    return Download(url, destination, **kwargs).run()
+
+
+def fetch_checksum(url: str, timeout: float = 15) -> Optional[str]:
+    """SHA-256 publicado junto a *url* (``<url>.sha256``), o ``None`` si no hay."""
+    try:
+        response = _request(f"{url}.sha256", 0, timeout, 4096)
+        try:
+            if response.status != 200:
+                return None
+            data = next(response.chunks, b"")
+        finally:
+            response.close()
+    except _TRANSIENT_ERRORS:
+        return None
+    match = _SHA256.search(data.decode("ascii", errors="ignore"))
+    return match.group(1).lower() if match else None
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Motor de patrones ``.gitignore`` compilado.
+
+Los patrones se traducen una sola vez a expresiones regulares sobre rutas
+relativas en formato POSIX, con la semántica de git: patrones anclados
+(``/build`` o ``docs/tmp``), solo-directorio (``logs/``), ``**`` y negación
+(``!keep.log``). Gana la última regla que coincide. Los directorios excluidos
+se podan en :meth:`GitignoreMatcher.walk` antes de descender en ellos, igual
+que git, que tampoco reincluye archivos dentro de un directorio ignorado.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Pattern, Tuple
+
+
+@dataclass(frozen=True)
+class GitignoreRule:
+    pattern: str
+    regex: str
+    negated: bool = False
+    dir_only: bool = False
+
+
+def _translate_segment(segment: str) -> str:
+    """Traduce comodines de un tramo sin ``**`` a regex (``*`` y ``?`` no cruzan ``/``)."""
+    out = []
+    i, n = 0, len(segment)
+    while i < n:
+        c = segment[i]
+        if c == "\\" and i + 1 < n:
+            out.append(re.escape(segment[i + 1]))
+            i += 2
+            continue
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = segment.find("]", i + 2 if segment[i + 1:i + 2] in ("!", "^") else i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = segment[i + 1:end]
+                if body[:1] in ("!", "^"):
+                    body = "^" + body[1:]
+                out.append("[" + body.replace("\\", "\\\\") + "]")
+                i = end + 1
+                continue
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+def _translate(pattern: str, anchored: bool) -> str:
+    parts = pattern.split("/")
+    regex = []
+    for index, part in enumerate(parts):
+        last = index == len(parts) - 1
+        if part == "**":
+            if last:
+                # "dir/**": todo lo que hay dentro de dir.
+                regex.append(".*")
+            else:
+                # "**/x" y "a/**/b": cero o más directorios intermedios.
+                regex.append("(?:.*/)?")
+            continue
+        regex.append(_translate_segment(part))
+        if not last:
+            regex.append("/")
+    body = "".join(regex)
+    if not anchored:
+        body = "(?:.*/)?" + body
+    return body
+
+
+def compile_rule(line: str) -> Optional[GitignoreRule]:
+    """Compila una línea de ``.gitignore``; devuelve ``None`` para vacías y comentarios."""
+    text = line.rstrip("\n").rstrip("\r")
+    # Los espacios finales se ignoran salvo que estén escapados.
+    stripped = text.rstrip(" ")
+    if stripped.endswith("\\") and len(stripped) < len(text):
+        stripped += " "
+    text = stripped
+    if not text or text.startswith("#"):
+        return None
+    negated = text.startswith("!")
+    if negated:
+        text = text[1:]
+    elif text.startswith("\\#") or text.startswith("\\!"):
+        text = text[1:]
+    dir_only = text.endswith("/")
+    text = text.rstrip("/")
+    if not text:
+        return None
+    anchored = "/" in text
+    text = text.lstrip("/")
+    if text.startswith("**/"):
+        anchored = True
+    return GitignoreRule(line.strip(), _translate(text, anchored), negated, dir_only)
+
+
+class GitignoreMatcher:
+    """Conjunto de reglas compiladas a dos regex (archivos y directorios)."""
+
+    def __init__(self, rules: Iterable[GitignoreRule] = ()):
+        self.rules: List[GitignoreRule] = list(rules)
+        self._file_regex = self._compile(rule for rule in self.rules if not rule.dir_only)
+        self._dir_regex = self._compile(self.rules)
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[str]) -> "GitignoreMatcher":
+        return cls(rule for rule in map(compile_rule, lines) if rule is not None)
+
+    @staticmethod
+    def _compile(rules: Iterable[GitignoreRule]) -> Optional[Tuple[Pattern[str], List[bool]]]:
+        rules = list(rules)
+        if not rules:
+            return None
+        # Las alternativas se prueban de izquierda a derecha: al invertir el
+        # orden, la primera que coincide es la última regla del archivo.
+        ordered = list(reversed(rules))
+        alternatives = "|".join(f"(?P<r{i}>{rule.regex})" for i, rule in enumerate(ordered))
+        return re.compile(f"(?:{alternatives})\\Z", re.DOTALL), [rule.negated for rule in ordered]
+
+    def matches(self, path: str, is_dir: bool = False) -> bool:
+        """Indica si la entrada *path* (relativa, POSIX) está excluida por sí misma."""
+        compiled = self._dir_regex if is_dir else self._file_regex
+        if compiled is None:
+            return False
+        regex, negated = compiled
+        match = regex.match(path)
+        if match is None:
+            return False
+        return not negated[int(match.lastgroup[1:])]
+
+    def is_excluded(self, path: str, is_dir: bool = False) -> bool:
+        """Como :meth:`matches`, pero también excluye lo que cuelga de un directorio ignorado."""
+        parts = path.split("/")
+        for index in range(1, len(parts)):
+            if self.matches("/".join(parts[:index]), is_dir=True):
+                return True
+        return self.matches(path, is_dir)
+
+    def walk(self, root: Path, prefix: str = "") -> Iterator[Tuple[str, List[str], List[str]]]:
+        """``os.walk`` filtrado: poda directorios excluidos antes de descender.
+
+        Devuelve ``(ruta_relativa, directorios, archivos)`` con rutas POSIX
+        relativas a *root* (precedidas por *prefix*, si se indica).
+        """
+        root = Path(root)
+        for current, dirs, files in os.walk(root):
+            relative = Path(current).relative_to(root).as_posix()
+            base = prefix if relative == "." else f"{prefix}/{relative}" if prefix else relative
+            join = (lambda name: f"{base}/{name}") if base else (lambda name: name)
+            dirs[:] = [d for d in dirs if not self.matches(join(d), is_dir=True)]
+            kept = [f for f in files if not self.matches(join(f))]
+            yield base, list(dirs), kept
@@ -0,0 +1,403 @@
+# -*- coding: utf-8 -*-
+"""
+Escritor de archivos .iflapp (ZIP) con compresión paralela.
+
+Los miembros se comprimen con DEFLATE en un pool de hilos (zlib libera el GIL)
+y se escriben en orden en un único archivo. El contenido que ya está comprimido
+(ejecutables, imágenes, ZIP...) se guarda con ``ZIP_STORED`` sin recomprimirse.
+El formato generado es ZIP estándar (con ZIP64 cuando hace falta) y se lee con
+``zipfile`` o cualquier herramienta habitual.
+
+Cada miembro se resume con SHA-256 (``digests``) para el manifiesto del paquete.
+Con un ``ArtifactStore`` los miembros cuyo contenido ya se comprimió en otro
+build se toman del almacén sin volver a comprimirse, y ``copy_members`` copia
+miembros de otro ``.iflapp`` tal cual, sin descomprimir.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterable, List, Optional, Tuple
+
+from lib.cancellation import BuildCancelled, CancellationToken
+
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+
+DEFAULT_COMPRESSION_LEVEL = 6
+
+# Extensiones cuyo contenido ya está comprimido.
+STORED_SUFFIXES = frozenset({
+    ".exe", ".dll", ".png", ".ico", ".jpg", ".jpeg", ".gif", ".webp",
+    ".zip", ".iflapp", ".gz", ".bz2", ".xz", ".7z", ".whl", ".jar",
+    ".mp3", ".mp4", ".ogg", ".woff", ".woff2",
+})
+# Cabeceras de ejecutables (ELF, PE) y formatos comprimidos sin extensión.
+_STORED_MAGICS = (b"\x7fELF", b"MZ", b"PK\x03\x04", b"\x1f\x8b", b"\x89PNG")
+
+_CHUNK_SIZE = 1024 * 1024
+_SPOOL_MAX = 16 * 1024 * 1024
+_ZIP64_LIMIT = 0xFFFFFFFF
+_ZIP_COUNT_LIMIT = 0xFFFF
+_CREATE_SYSTEM = 0 if sys.platform == "win32" else 3
+
+
+def should_store(path: Path) -> bool:
+    """Indica si *path* debe guardarse sin comprimir."""
+    if path.suffix.lower() in STORED_SUFFIXES:
+        return True
+    try:
+        with open(path, "rb") as handle:
+            head = handle.read(4)
+    except OSError:
+        return False
+    return any(head.startswith(magic) for magic in _STORED_MAGICS)
+
+
+def _dos_datetime(timestamp: float) -> Tuple[int, int]:
+    t = time.localtime(timestamp)
+    year = max(t.tm_year, 1980)
+    dos_date = ((year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+    dos_time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+    return dos_date, dos_time
+
+
+@dataclass
+class _PreparedMember:
+    arcname: str
+    method: int
+    crc: int
+    file_size: int
+    compress_size: int
+    mtime: float
+    mode: int
+    source: Optional[Path] = None
+    payload: Optional[BinaryIO] = None
+    # Posición de los datos dentro de *source* (objeto del almacén u otro ZIP).
+    offset: int = 0
+    digest: str = ""
+
+    def copy_to(self, output: BinaryIO) -> None:
+        if self.payload is not None:
+            self.payload.seek(0)
+            shutil.copyfileobj(self.payload, output, _CHUNK_SIZE)
+            self.payload.close()
+        elif self.source is not None:
+            with open(self.source, "rb") as handle:
+                handle.seek(self.offset)
+                remaining = self.compress_size
+                while remaining:
+                    chunk = handle.read(min(_CHUNK_SIZE, remaining))
+                    if not chunk:
+                        raise OSError(f"Datos truncados en {self.source}")
+                    output.write(chunk)
+                    remaining -= len(chunk)
+
+
+@dataclass
+class _CentralEntry:
+    arcname: bytes
+    flags: int
+    method: int
+    dos_time: int
+    dos_date: int
+    crc: int
+    file_size: int
+    compress_size: int
+    offset: int
+    mode: int
+
+
+class IflappWriter:
+    """Escribe un ZIP comprimiendo miembros en paralelo y publicándolo de forma atómica."""
+
+    def __init__(
+        self,
+        output_file: Path,
+        level: int = DEFAULT_COMPRESSION_LEVEL,
+        workers: Optional[int] = None,
+        progress: Optional[Callable[[str, int], None]] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        store=None,
+    ):
+        self.output_file = Path(output_file)
+        self.level = max(0, min(9, int(level)))
+        self.workers = workers or min(8, os.cpu_count() or 1)
+        self.progress = progress
+        self.cancel_token = cancel_token
+        # ArtifactStore opcional: miembros comprimidos reutilizables entre builds.
+        self.store = store
+        self.names: List[str] = []
+        # Nombre en el archivo -> (sha256, tamaño sin comprimir).
+        self.digests: Dict[str, Tuple[str, int]] = {}
+        self._entries: List[_CentralEntry] = []
+        self._part = self.output_file.with_name(self.output_file.name + ".part")
+        self._fp: Optional[BinaryIO] = None
+
+    def __enter__(self) -> "IflappWriter":
+        self._fp = open(self._part, "wb")
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    # ── Preparación (hilos del pool) ─────────────────────────────────────────
+
+    def _prepare_file(self, source: Path, arcname: str) -> _PreparedMember:
+        stat = source.stat()
+        store = self.level == 0 or should_store(source)
+        crc = 0
+        digest = hashlib.sha256()
+        if store or self.store is not None:
+            # Primera pasada: CRC y huella. Basta para los miembros sin
+            # comprimir y para consultar el almacén antes de comprimir.
+            with open(source, "rb") as handle:
+                for chunk in iter(lambda: handle.read(_CHUNK_SIZE), b""):
+                    crc = zlib.crc32(chunk, crc)
+                    digest.update(chunk)
+            if store:
+                return _PreparedMember(arcname, ZIP_STORED, crc, stat.st_size, stat.st_size,
+                                       stat.st_mtime, stat.st_mode, source=source,
+                                       digest=digest.hexdigest())
+            hit = self.store.get(digest.hexdigest(), self.level)
+            if hit is not None:
+                return _PreparedMember(arcname, hit.method, hit.crc, hit.file_size, hit.compress_size,
+                                       stat.st_mtime, stat.st_mode, source=hit.path,
+                                       offset=hit.offset, digest=digest.hexdigest())
+
+        payload = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX)
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15)
+        hashed = self.store is not None
+        crc = 0
+        size = 0
+        with open(source, "rb") as handle:
+            for chunk in iter(lambda: handle.read(_CHUNK_SIZE), b""):
+                size += len(chunk)
+                crc = zlib.crc32(chunk, crc)
+                if not hashed:
+                    digest.update(chunk)
+                payload.write(compressor.compress(chunk))
+        payload.write(compressor.flush())
+        compress_size = payload.tell()
+        if compress_size >= size:
+            # No compensa comprimir: guardar el original tal cual.
+            payload.close()
+            return _PreparedMember(arcname, ZIP_STORED, crc, size, size,
+                                   stat.st_mtime, stat.st_mode, source=source,
+                                   digest=digest.hexdigest())
+        member = _PreparedMember(arcname, ZIP_DEFLATED, crc, size, compress_size,
+                                 stat.st_mtime, stat.st_mode, payload=payload,
+                                 digest=digest.hexdigest())
+        if self.store is not None:
+            self.store.put(member.digest, self.level, member)
+        return member
+
+    def _prepare_bytes(self, data: bytes, arcname: str) -> _PreparedMember:
+        crc = zlib.crc32(data)
+        payload = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX)
+        if self.level:
+            compressed = zlib.compressobj(self.level, zlib.DEFLATED, -15)
+            payload.write(compressed.compress(data) + compressed.flush())
+        if self.level and payload.tell() < len(data):
+            method, compress_size = ZIP_DEFLATED, payload.tell()
+        else:
+            payload.seek(0)
+            payload.truncate()
+            payload.write(data)
+            method, compress_size = ZIP_STORED, len(data)
+        return _PreparedMember(arcname, method, crc, len(data), compress_size,
+                               time.time(), 0o100644, payload=payload,
+                               digest=hashlib.sha256(data).hexdigest())
+
+    # ── Escritura (hilo llamador) ────────────────────────────────────────────
+
+    def _write_member(self, member: _PreparedMember) -> None:
+        if self.cancel_token is not None and self.cancel_token.cancelled:
+            if member.payload is not None:
+                member.payload.close()
+            raise BuildCancelled()
+        fp = self._fp
+        name = member.arcname.replace(os.sep, "/").encode("utf-8")
+        flags = 0x800 if not member.arcname.isascii() else 0
+        dos_date, dos_time = _dos_datetime(member.mtime)
+        offset = fp.tell()
+        zip64 = member.file_size >= _ZIP64_LIMIT or member.compress_size >= _ZIP64_LIMIT
+        extra = b""
+        if zip64:
+            extra = struct.pack("<HHQQ", 0x0001, 16, member.file_size, member.compress_size)
+        fp.write(struct.pack(
+            "<IHHHHHIIIHH",
+            0x04034B50,
+            45 if zip64 else 20,
+            flags,
+            member.method,
+            dos_time,
+            dos_date,
+            member.crc,
+            _ZIP64_LIMIT if zip64 else member.compress_size,
+            _ZIP64_LIMIT if zip64 else member.file_size,
+            len(name),
+            len(extra),
+        ))
+        fp.write(name)
+        fp.write(extra)
+        member.copy_to(fp)
+        self._entries.append(_CentralEntry(
+            name, flags, member.method, dos_time, dos_date, member.crc,
+            member.file_size, member.compress_size, offset, member.mode,
+        ))
+        self.names.append(member.arcname.replace(os.sep, "/"))
+        if member.digest:
+            self.digests[self.names[-1]] = (member.digest, member.file_size)
+        if self.progress:
+            self.progress(self.names[-1], member.file_size)
+
+    def write_files(self, members: Iterable[Tuple[Path, str]]) -> None:
+        """Comprime *members* (ruta, nombre en el archivo) en paralelo y los escribe en orden."""
+        window = self.workers * 2
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        in_flight = deque()
+        try:
+            for source, arcname in members:
+                in_flight.append(pool.submit(self._prepare_file, Path(source), arcname))
+                if len(in_flight) >= window:
+                    self._write_member(in_flight.popleft().result())
+            while in_flight:
+                self._write_member(in_flight.popleft().result())
+        except BaseException:
+            # Cancelación o error: no seguir comprimiendo lo que queda en cola.
+            pool.shutdown(wait=True, cancel_futures=True)
+            for future in in_flight:
+                if future.done() and not future.cancelled() and future.exception() is None:
+                    payload = future.result().payload
+                    if payload is not None:
+                        payload.close()
+            raise
+        pool.shutdown()
+
+    def write_file(self, source: Path, arcname: str) -> None:
+        self._write_member(self._prepare_file(Path(source), arcname))
+
+    def write_bytes(self, arcname: str, data: bytes) -> None:
+        self._write_member(self._prepare_bytes(data, arcname))
+
+    def copy_members(self, archive: Path, names: Iterable[str], digests: Optional[Dict[str, str]] = None) -> None:
+        """Copia miembros de otro ZIP sin descomprimirlos ni recomprimirlos.
+
+        *digests* aporta el SHA-256 de cada miembro (del manifiesto de origen)
+        para que ``self.digests`` siga completo.
+        """
+        archive = Path(archive)
+        digests = digests or {}
+        with zipfile.ZipFile(archive) as source, open(archive, "rb") as raw:
+            for name in names:
+                info = source.getinfo(name)
+                if info.compress_type not in (ZIP_STORED, ZIP_DEFLATED):
+                    raise ValueError(f"Método de compresión no soportado en {name}: {info.compress_type}")
+                raw.seek(info.header_offset)
+                header = raw.read(30)
+                if header[:4] != b"PK\x03\x04":
+                    raise ValueError(f"Cabecera local inválida para {name} en {archive.name}")
+                name_len, extra_len = struct.unpack("<HH", header[26:30])
+                mtime = time.mktime(info.date_time + (0, 0, -1))
+                self._write_member(_PreparedMember(
+                    name, info.compress_type, info.CRC, info.file_size, info.compress_size,
+                    mtime, (info.external_attr >> 16) or 0o100644, source=archive,
+                    offset=info.header_offset + 30 + name_len + extra_len,
+                    digest=digests.get(name, ""),
+                ))
+
+    def _write_central_directory(self) -> None:
+        fp = self._fp
+        cd_start = fp.tell()
+        for entry in self._entries:
+            zip64_fields = []
+            if entry.file_size >= _ZIP64_LIMIT:
+                zip64_fields.append(entry.file_size)
+            if entry.compress_size >= _ZIP64_LIMIT:
+                zip64_fields.append(entry.compress_size)
+            if entry.offset >= _ZIP64_LIMIT:
+                zip64_fields.append(entry.offset)
+            extra = b""
+            if zip64_fields:
+                extra = struct.pack(f"<HH{len(zip64_fields)}Q", 0x0001, 8 * len(zip64_fields), *zip64_fields)
+            version = 45 if zip64_fields else 20
+            fp.write(struct.pack(
+                "<IHHHHHHIIIHHHHHII",
+                0x02014B50,
+                (_CREATE_SYSTEM << 8) | version,
+                version,
+                entry.flags,
+                entry.method,
+                entry.dos_time,
+                entry.dos_date,
+                entry.crc,
+                min(entry.compress_size, _ZIP64_LIMIT),
+                min(entry.file_size, _ZIP64_LIMIT),
+                len(entry.arcname),
+                len(extra),
+                0,
+                0,
+                0,
+                (entry.mode & 0xFFFF) << 16,
+                min(entry.offset, _ZIP64_LIMIT),
+            ))
+            fp.write(entry.arcname)
+            fp.write(extra)
+        cd_end = fp.tell()
+        count = len(self._entries)
+        cd_size = cd_end - cd_start
+        if count > _ZIP_COUNT_LIMIT or cd_start >= _ZIP64_LIMIT or cd_size >= _ZIP64_LIMIT:
+            fp.write(struct.pack(
+                "<IQHHIIQQQQ", 0x06064B50, 44, 45, 45, 0, 0, count, count, cd_size, cd_start,
+            ))
+            fp.write(struct.pack("<IIQI", 0x07064B50, 0, cd_end, 1))
+        fp.write(struct.pack(
+            "<IHHHHIIH",
+            0x06054B50,
+            0,
+            0,
+            min(count, _ZIP_COUNT_LIMIT),
+            min(count, _ZIP_COUNT_LIMIT),
+            min(cd_size, _ZIP64_LIMIT),
+            min(cd_start, _ZIP64_LIMIT),
+            0,
+        ))
+
+    def close(self) -> None:
+        """Escribe el directorio central y publica el archivo final."""
+        if self._fp is None:
+            return
+        try:
+            self._write_central_directory()
+        finally:
+            self._fp.close()
+            self._fp = None
+        os.replace(self._part, self.output_file)
+        if self.store is not None:
+            self.store.evict()
+
+    def abort(self) -> None:
+        """Descarta el archivo parcial."""
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+        try:
+            self._part.unlink()
+        except OSError:
+            pass
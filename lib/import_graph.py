@@ -0,0 +1,359 @@
+# -*- coding: utf-8 -*-
+"""
+Grafo de imports basado en AST para las compilaciones de FlangCompiler.
+
+Recorre el script principal y sus módulos locales (raíz del proyecto, ``app/``
+y ``lib/``) para saber qué paquetes externos se alcanzan de verdad. Detecta
+también ``importlib.import_module("x")`` y ``__import__("x")`` con literales,
+que PyInstaller no puede ver por sí solo. Los resultados del parseo se cachean
+por archivo usando mtime/tamaño y, si estos cambian, el hash del contenido.
+
+Con el grafo y el inventario de paquetes instalados en el intérprete de
+compilación se calculan también los paquetes pesados que el proyecto nunca
+alcanza, para pasarlos a PyInstaller como ``--exclude-module``.
+"""
+
+from __future__ import annotations
+
+import ast
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+# Módulos que PyInstaller suele necesitar como hidden import cuando se usan.
+KNOWN_HIDDEN_IMPORTS = ("PyQt6", "leviathan_ui", "requests")
+
+# Paquetes que PyInstaller o sus runtime hooks pueden necesitar aunque el
+# proyecto no los importe; nunca se excluyen automáticamente.
+PROTECTED_PACKAGES = frozenset({
+    "PyInstaller", "_pyinstaller_hooks_contrib", "pkg_resources",
+    "setuptools", "_distutils_hack", "pip", "wheel",
+})
+
+# Tamaño mínimo para considerar "pesado" un paquete instalado (2 MB).
+HEAVY_PACKAGE_MIN_BYTES = 2 * 1024 * 1024
+
+# Coste aproximado de analizar un módulo en el grafo de PyInstaller; solo se
+# usa para estimar el ahorro en el informe.
+ANALYSIS_SECONDS_PER_MODULE = 0.01
+
+if hasattr(sys, "stdlib_module_names"):
+    STDLIB_MODULES = frozenset(sys.stdlib_module_names)
+else:  # Python < 3.10
+    from lib.dependency_manager import STDLIB_MODULES as _STDLIB_FALLBACK
+    STDLIB_MODULES = frozenset(_STDLIB_FALLBACK) | frozenset(sys.builtin_module_names)
+
+
+@dataclass
+class ParsedModule:
+    """Imports de un archivo: ``(módulo, nivel relativo, es_dinámico)``."""
+
+    imports: List[Tuple[str, int, bool]]
+
+
+@dataclass
+class ImportAnalysis:
+    """Resultado de recorrer el grafo de imports de un script."""
+
+    script: Path
+    local_modules: List[Path] = field(default_factory=list)
+    external: Set[str] = field(default_factory=set)
+    dynamic: Set[str] = field(default_factory=set)
+
+    def hidden_imports(self) -> List[str]:
+        """``--hidden-import`` necesarios: imports dinámicos y módulos conocidos."""
+        hidden = set(self.dynamic)
+        hidden.update(name for name in KNOWN_HIDDEN_IMPORTS if name in self.external)
+        return sorted(hidden)
+
+    def excludes(self, candidates: Iterable[str]) -> List[str]:
+        """Subconjunto de *candidates* que el script no alcanza."""
+        reached = self.external | {name.split(".")[0] for name in self.dynamic}
+        return sorted(name for name in set(candidates) if name.split(".")[0] not in reached)
+
+
+def _is_string(node: ast.AST) -> bool:
+    return isinstance(node, ast.Constant) and isinstance(node.value, str)
+
+
+def _parse_imports(source: str, filename: str) -> ParsedModule:
+    tree = ast.parse(source, filename=filename)
+    imports: List[Tuple[str, int, bool]] = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.extend((alias.name, 0, False) for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            module = node.module or ""
+            if module:
+                imports.append((module, node.level, False))
+            # `from pkg import sub` puede referirse a un submódulo.
+            for alias in node.names:
+                if alias.name != "*":
+                    name = f"{module}.{alias.name}" if module else alias.name
+                    imports.append((name, node.level, False))
+        elif isinstance(node, ast.Call) and node.args and _is_string(node.args[0]):
+            func = node.func
+            is_import_module = (
+                isinstance(func, ast.Attribute)
+                and func.attr == "import_module"
+                and isinstance(func.value, ast.Name)
+                and func.value.id == "importlib"
+            ) or (isinstance(func, ast.Name) and func.id in ("import_module", "__import__"))
+            if is_import_module:
+                imports.append((node.args[0].value, 0, True))
+    return ParsedModule(imports)
+
+
+class ParseCache:
+    """Caché de imports por archivo validada con mtime/tamaño y hash."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path
+        self._entries: Dict[str, dict] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        if path and path.is_file():
+            try:
+                self._entries = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self._entries = {}
+
+    def parse(self, file_path: Path) -> Optional[ParsedModule]:
+        key = str(file_path)
+        try:
+            stat = file_path.stat()
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            return ParsedModule([tuple(item) for item in entry["imports"]])
+        try:
+            data = file_path.read_bytes()
+        except OSError:
+            return None
+        digest = hashlib.sha256(data).hexdigest()
+        if entry and entry["sha256"] == digest:
+            imports = [tuple(item) for item in entry["imports"]]
+        else:
+            try:
+                imports = _parse_imports(data.decode("utf-8"), key).imports
+            except (SyntaxError, UnicodeDecodeError, ValueError):
+                imports = []
+        with self._lock:
+            self._entries[key] = {
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "sha256": digest,
+                "imports": [list(item) for item in imports],
+            }
+            self._dirty = True
+        return ParsedModule(imports)
+
+    def save(self) -> None:
+        if not self.path or not self._dirty:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            with self._lock:
+                tmp.write_text(json.dumps(self._entries), encoding="utf-8")
+                self._dirty = False
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+
+_parse_caches: Dict[Path, ParseCache] = {}
+
+
+def get_parse_cache() -> ParseCache:
+    """Caché persistente compartida, ubicada en el directorio de caché del usuario."""
+    from lib.build_cache import default_cache_dir
+    path = default_cache_dir() / "imports.json"
+    if path not in _parse_caches:
+        _parse_caches[path] = ParseCache(path)
+    return _parse_caches[path]
+
+
+class ImportGraph:
+    """Recorre imports locales de un proyecto a partir de un script."""
+
+    def __init__(self, search_roots: Sequence[Path], cache: Optional[ParseCache] = None):
+        self.search_roots = [Path(root).resolve() for root in search_roots if Path(root).is_dir()]
+        self.cache = cache if cache is not None else ParseCache()
+
+    def _resolve_local(self, module: str, level: int, current: Path) -> Optional[Path]:
+        if level:
+            base = current.parent
+            for _ in range(level - 1):
+                base = base.parent
+            roots = [base]
+        else:
+            roots = self.search_roots
+        relative = Path(*module.split("."))
+        for root in roots:
+            for candidate in (root / relative.with_suffix(".py"), root / relative / "__init__.py"):
+                if candidate.is_file():
+                    return candidate.resolve()
+        return None
+
+    def _is_local_package(self, top: str) -> bool:
+        # Incluye paquetes sin __init__.py (namespace packages como `lib/`).
+        return any((root / top).is_dir() or (root / f"{top}.py").is_file() for root in self.search_roots)
+
+    def analyze(self, script_path: Path) -> ImportAnalysis:
+        script = Path(script_path).resolve()
+        analysis = ImportAnalysis(script=script)
+        seen: Set[Path] = {script}
+        pending = [script]
+        while pending:
+            current = pending.pop()
+            parsed = self.cache.parse(current)
+            if parsed is None:
+                continue
+            for module, level, dynamic in parsed.imports:
+                local = self._resolve_local(module, level, current)
+                if local is not None:
+                    if dynamic:
+                        analysis.dynamic.add(module)
+                    if local not in seen:
+                        seen.add(local)
+                        analysis.local_modules.append(local)
+                        pending.append(local)
+                    continue
+                if level:
+                    continue
+                top = module.split(".")[0]
+                if top in STDLIB_MODULES or self._is_local_package(top):
+                    continue
+                analysis.external.add(top)
+                if dynamic:
+                    analysis.dynamic.add(module)
+        analysis.local_modules.sort()
+        self.cache.save()
+        return analysis
+
+
+def project_search_roots(repo_path: Path) -> List[Path]:
+    """Raíces donde viven los módulos locales de un proyecto Fluthin."""
+    repo_path = Path(repo_path)
+    return [repo_path, repo_path / "app", repo_path / "lib"]
+
+
+
+@dataclass
+class InstalledPackage:
+    """Paquete de nivel superior instalado en el intérprete de compilación."""
+
+    name: str
+    distribution: str
+    size: int
+    modules: int
+    requires: Tuple[str, ...] = ()
+
+    @property
+    def estimated_analysis_seconds(self) -> float:
+        return self.modules * ANALYSIS_SECONDS_PER_MODULE
+
+
+def _normalize_dist(name: str) -> str:
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def _requirement_names(requires: Optional[Iterable[str]]) -> Tuple[str, ...]:
+    names = []
+    for requirement in requires or ():
+        # Los extras opcionales no se instalan con el paquete base.
+        if "extra ==" in requirement or "extra==" in requirement:
+            continue
+        match = re.match(r"\s*([A-Za-z0-9][A-Za-z0-9._-]*)", requirement)
+        if match:
+            names.append(_normalize_dist(match.group(1)))
+    return tuple(names)
+
+
+@lru_cache(maxsize=1)
+def installed_packages() -> Dict[str, InstalledPackage]:
+    """Inventario de paquetes de nivel superior por nombre de import."""
+    from importlib import metadata as importlib_metadata
+
+    packages: Dict[str, InstalledPackage] = {}
+    for dist in importlib_metadata.distributions():
+        dist_name = dist.metadata["Name"]
+        if not dist_name:
+            continue
+        sizes: Dict[str, int] = {}
+        modules: Dict[str, int] = {}
+        for file in dist.files or ():
+            parts = file.parts
+            if not parts or parts[0] == ".." or parts[0].endswith((".dist-info", ".egg-info", ".data")):
+                continue
+            top = parts[0][:-3] if len(parts) == 1 and parts[0].endswith(".py") else parts[0]
+            if top == "__pycache__" or "." in top:
+                continue
+            sizes[top] = sizes.get(top, 0) + (file.size or 0)
+            if file.suffix == ".py":
+                modules[top] = modules.get(top, 0) + 1
+        requires = _requirement_names(dist.requires)
+        for top, size in sizes.items():
+            if top not in modules and not size:
+                continue
+            packages.setdefault(top, InstalledPackage(
+                name=top,
+                distribution=_normalize_dist(dist_name),
+                size=size,
+                modules=modules.get(top, 0),
+                requires=requires,
+            ))
+    return packages
+
+
+def compute_auto_excludes(
+    reached: Iterable[str],
+    min_size: int = HEAVY_PACKAGE_MIN_BYTES,
+    packages: Optional[Dict[str, InstalledPackage]] = None,
+) -> List[InstalledPackage]:
+    """Paquetes pesados instalados que no se alcanzan desde *reached*.
+
+    Se sigue ``Requires-Dist`` de cada distribución alcanzada, de modo que las
+    dependencias de un paquete usado (p. ej. ``urllib3`` para ``requests``)
+    nunca se excluyen.
+    """
+    packages = installed_packages() if packages is None else packages
+    by_distribution: Dict[str, List[InstalledPackage]] = {}
+    for package in packages.values():
+        by_distribution.setdefault(package.distribution, []).append(package)
+
+    reached_tops = {name.split(".")[0] for name in reached}
+    pending = [packages[top].distribution for top in reached_tops if top in packages]
+    reached_dists: Set[str] = set()
+    while pending:
+        dist = pending.pop()
+        if dist in reached_dists:
+            continue
+        reached_dists.add(dist)
+        for package in by_distribution.get(dist, ()):
+            reached_tops.add(package.name)
+            pending.extend(package.requires)
+
+    return sorted(
+        (
+            package for package in packages.values()
+            if package.name not in reached_tops
+            and package.distribution not in reached_dists
+            and package.name not in PROTECTED_PACKAGES
+            and package.name not in STDLIB_MODULES
+            and not package.name.startswith("_")
+            and package.size >= min_size
+        ),
+        key=lambda package: package.size,
+        reverse=True,
+    )
@@ -503,6 +503,13 @@ class ProjectDetailsDialog(QDialog):
         self.build_thread.error.connect(self.on_compile_error)
         self.build_thread.start()
 
+    def done(self, result):
+        # Cerrar el diálogo cancela el build que se lanzó desde él.
+        thread = getattr(self, "build_thread", None)
+        if thread is not None and thread.isRunning():
+            thread.cancel()
+        super().done(result)
+
     def on_compile_finished(self, msg):
         self.lbl_status.setText(msg)
         self.btn_compile.setEnabled(True)
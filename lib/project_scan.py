@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""
+Descubrimiento de proyectos y apps instaladas por su ``details.xml``.
+
+Lo comparten el gestor de la GUI, el build por lotes y la comprobación de
+actualizaciones de Fluthin Apps.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Iterator
+
+
+def scan_project_dirs(base) -> Iterator[str]:
+    """Carpetas bajo *base* que contienen un ``details.xml`` (escaneo recursivo).
+
+    Se omiten los directorios ocultos (staging y versión anterior de una
+    instalación por etapas, ``.git``...).
+    """
+    if not os.path.exists(base):
+        return
+    for root, dirs, files in os.walk(base):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        if "details.xml" in files:
+            yield root
@@ -1,18 +1,30 @@
 """
 PyInstaller embebido: usa la API de PyInstaller desde el mismo intérprete Python.
 No invoca el ejecutable pyinstaller como subproceso externo.
+
+``SubprocessPyInstaller`` ofrece la misma interfaz pero ejecuta cada build en un
+proceso hijo (``python -m PyInstaller``) con tiempo límite, límite opcional de
+memoria residente y cancelación, para que la memoria de PyInstaller no se
+acumule en la aplicación.
 """
 
+import collections
 import os
+import subprocess
 import sys
 import tempfile
+import threading
+import time
 import shutil
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Callable, List, Optional, Tuple
 
 PYINSTALLER_AVAILABLE = False
 pyi_version = "No disponible"
 
+# Paquetes pesados que se excluyen siempre para acelerar la compilación.
+DEFAULT_EXCLUDES = ["matplotlib", "numpy", "scipy", "pandas", "sklearn", "tf", "keras"]
+
 
 def _refresh_pyinstaller_availability() -> bool:
     global PYINSTALLER_AVAILABLE, pyi_version
@@ -52,7 +64,9 @@ class EmbeddedPyInstaller:
             self._temp_build_dir = tempfile.mkdtemp(prefix="pyi_build_")
             build_dir = self._temp_build_dir
         else:
-            self._temp_build_dir = build_dir
+            # Un build_dir explícito pertenece al llamador (p. ej. un workpath
+            # persistente) y cleanup() no debe borrarlo.
+            self._temp_build_dir = None
         os.makedirs(build_dir, exist_ok=True)
         os.makedirs(os.path.join(build_dir, "spec"), exist_ok=True)
         os.makedirs(os.path.join(build_dir, "work"), exist_ok=True)
@@ -126,18 +140,53 @@ class EmbeddedPyInstaller:
             for imp in hidden_imports:
                 args.extend(["--hidden-import", imp])
         
-        # Agregar excludes por defecto para acelerar compilación
-        default_excludes = ["matplotlib", "numpy", "scipy", "pandas", "sklearn", "tf", "keras"]
+        # Sin lista explícita se usan los excludes por defecto; FlangCompiler
+        # pasa una lista ya filtrada por el grafo de imports del script.
         if excludes is None:
-            excludes = default_excludes
-        else:
-            excludes.extend(default_excludes)
+            excludes = list(DEFAULT_EXCLUDES)
         
         for exc in set(excludes):  # Usar set para evitar duplicados
             args.extend(["--exclude-module", exc])
         
         args.append(script_path)
 
+        if not self._run_pyinstaller(args, cwd):
+            return None
+
+        exe_name = output_name + (".exe" if sys.platform == "win32" else "")
+        final_exe_path = os.path.join(dist_dir, exe_name)
+        if os.path.isfile(final_exe_path):
+            return final_exe_path
+        self._last_error = "PyInstaller finalizó pero no se generó el ejecutable esperado"
+        return None
+
+    def compile_spec(
+        self,
+        spec_path: str,
+        output_dir: str,
+        work_dir: str,
+        cwd: Optional[str] = None,
+    ) -> bool:
+        """Compila un archivo .spec (p. ej. varios EXE con un COLLECT compartido)."""
+        self._last_error = None
+        if not self.available:
+            self._last_error = "PyInstaller no está disponible como librería"
+            return False
+        if not os.path.isfile(spec_path):
+            self._last_error = f"Spec no encontrado: {spec_path}"
+            return False
+        os.makedirs(output_dir, exist_ok=True)
+        args = [
+            "--distpath",
+            os.path.abspath(output_dir),
+            "--workpath",
+            os.path.abspath(work_dir),
+            "--noconfirm",
+            os.path.abspath(spec_path),
+        ]
+        return self._run_pyinstaller(args, cwd)
+
+    def _run_pyinstaller(self, args: List[str], cwd: Optional[str] = None) -> bool:
         old_argv = sys.argv[:]
         old_cwd = os.getcwd()
         try:
@@ -147,32 +196,307 @@ class EmbeddedPyInstaller:
 
             sys.argv = ["pyinstaller"] + args
             pyi_main.run()
+            return True
         except Exception as e:
             import traceback
             self._last_error = f"{str(e)}\n{traceback.format_exc()}"
-            return None
+            return False
         finally:
             sys.argv = old_argv
             os.chdir(old_cwd)
 
-        exe_name = output_name + (".exe" if sys.platform == "win32" else "")
-        final_exe_path = os.path.join(dist_dir, exe_name)
-        if os.path.isfile(final_exe_path):
-            return final_exe_path
-        self._last_error = "PyInstaller finalizó pero no se generó el ejecutable esperado"
-        return None
-
     def cleanup(self):
         if self._temp_build_dir and os.path.isdir(self._temp_build_dir):
             shutil.rmtree(self._temp_build_dir, ignore_errors=True)
             self._temp_build_dir = None
 
 
+# Límite de memoria residente (RSS) del build en MB; 0 (por defecto) lo desactiva.
+# No se usa RLIMIT_AS: limita espacio de direcciones, no memoria real, y
+# PyInstaller/PyQt6 reservan mucho más del que llegan a usar.
+DEFAULT_MEMORY_LIMIT_MB = int(os.environ.get("PACKAGEMAKER_PYI_MEMORY_MB", "0") or 0)
+# Cada cuánto se mide la memoria del árbol de procesos del build (segundos).
+_MEMORY_POLL_INTERVAL = 0.5
+# Líneas finales de stderr que se conservan para el diagnóstico.
+_STDERR_TAIL_LINES = 400
+
+
+class _WindowsJob:
+    """Job object de Windows: límite de memoria y cierre del árbol de procesos."""
+
+    _LIMIT_PROCESS_MEMORY = 0x100
+    _LIMIT_KILL_ON_JOB_CLOSE = 0x2000
+    _EXTENDED_LIMIT_INFORMATION = 9
+
+    def __init__(self, process: subprocess.Popen, memory_limit: int):
+        import ctypes
+        from ctypes import wintypes
+
+        class IO_COUNTERS(ctypes.Structure):
+            _fields_ = [(name, ctypes.c_ulonglong) for name in (
+                "ReadOperationCount", "WriteOperationCount", "OtherOperationCount",
+                "ReadTransferCount", "WriteTransferCount", "OtherTransferCount")]
+
+        class BASIC_LIMIT(ctypes.Structure):
+            _fields_ = [
+                ("PerProcessUserTimeLimit", ctypes.c_longlong),
+                ("PerJobUserTimeLimit", ctypes.c_longlong),
+                ("LimitFlags", wintypes.DWORD),
+                ("MinimumWorkingSetSize", ctypes.c_size_t),
+                ("MaximumWorkingSetSize", ctypes.c_size_t),
+                ("ActiveProcessLimit", wintypes.DWORD),
+                ("Affinity", ctypes.c_size_t),
+                ("PriorityClass", wintypes.DWORD),
+                ("SchedulingClass", wintypes.DWORD),
+            ]
+
+        class EXTENDED_LIMIT(ctypes.Structure):
+            _fields_ = [
+                ("BasicLimitInformation", BASIC_LIMIT),
+                ("IoInfo", IO_COUNTERS),
+                ("ProcessMemoryLimit", ctypes.c_size_t),
+                ("JobMemoryLimit", ctypes.c_size_t),
+                ("PeakProcessMemoryUsed", ctypes.c_size_t),
+                ("PeakJobMemoryUsed", ctypes.c_size_t),
+            ]
+
+        self._kernel32 = ctypes.windll.kernel32
+        self._kernel32.CreateJobObjectW.restype = wintypes.HANDLE
+        self.handle = self._kernel32.CreateJobObjectW(None, None)
+        info = EXTENDED_LIMIT()
+        info.BasicLimitInformation.LimitFlags = self._LIMIT_KILL_ON_JOB_CLOSE
+        if memory_limit:
+            info.BasicLimitInformation.LimitFlags |= self._LIMIT_PROCESS_MEMORY
+            info.ProcessMemoryLimit = memory_limit
+        self._kernel32.SetInformationJobObject(
+            wintypes.HANDLE(self.handle), self._EXTENDED_LIMIT_INFORMATION,
+            ctypes.byref(info), ctypes.sizeof(info),
+        )
+        self._kernel32.AssignProcessToJobObject(wintypes.HANDLE(self.handle), wintypes.HANDLE(process._handle))
+
+    def terminate(self) -> None:
+        self._kernel32.TerminateJobObject(self.handle, 1)
+
+    def close(self) -> None:
+        if self.handle:
+            self._kernel32.CloseHandle(self.handle)
+            self.handle = None
+
+
+class SubprocessPyInstaller(EmbeddedPyInstaller):
+    """Misma interfaz que ``EmbeddedPyInstaller``, pero cada build corre en un proceso hijo.
+
+    El hijo no comparte ``sys.argv``, el directorio actual ni la memoria del
+    llamador: al terminar, todo lo que PyInstaller reservó vuelve al sistema.
+    ``compile_to_exe`` devuelve la ruta del ejecutable y el stderr capturado
+    queda en ``get_last_stderr()``. ``cancel()`` es seguro desde otro hilo.
+    """
+
+    def __init__(
+        self,
+        timeout: Optional[float] = None,
+        memory_limit_mb: int = DEFAULT_MEMORY_LIMIT_MB,
+        log_callback: Optional[Callable[[str], None]] = None,
+    ):
+        super().__init__()
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.log_callback = log_callback
+        self._last_stderr = ""
+        self._process: Optional[subprocess.Popen] = None
+        self._cancelled = threading.Event()
+
+    def get_last_stderr(self) -> str:
+        return self._last_stderr
+
+    def cancel(self) -> None:
+        """Detiene el build en curso (y sus subprocesos) lo antes posible.
+
+        Si llega justo antes de arrancar el proceso hijo, ese build se cancela
+        en cuanto empieza.
+        """
+        self._cancelled.set()
+        process = self._process
+        if process is not None and process.poll() is None:
+            self._kill(process)
+
+    def _command(self, args: List[str]) -> List[str]:
+        return [sys.executable, "-m", "PyInstaller"] + args
+
+    def _child_env(self) -> dict:
+        env = dict(os.environ)
+        # Mismos módulos visibles que con el backend embebido.
+        paths = [p for p in sys.path if p and os.path.isdir(p)]
+        if env.get("PYTHONPATH"):
+            paths.append(env["PYTHONPATH"])
+        env["PYTHONPATH"] = os.pathsep.join(paths)
+        env["PYTHONUNBUFFERED"] = "1"
+        return env
+
+    @staticmethod
+    def _tree_rss(process: subprocess.Popen) -> Optional[int]:
+        """Memoria residente (bytes) del hijo y sus subprocesos; ``None`` si no se puede medir.
+
+        En Linux se suma ``VmRSS`` de los procesos del grupo del hijo (líder de
+        su sesión); en otros sistemas se usa ``psutil`` si está instalado.
+        """
+        if sys.platform.startswith("linux"):
+            total = 0
+            for entry in os.listdir("/proc"):
+                if not entry.isdigit():
+                    continue
+                try:
+                    with open(f"/proc/{entry}/stat", "rb") as handle:
+                        # El nombre del proceso va entre paréntesis y puede contener espacios.
+                        fields = handle.read().rsplit(b")", 1)[1].split()
+                    if int(fields[2]) != process.pid:
+                        continue
+                    with open(f"/proc/{entry}/statm", "rb") as handle:
+                        total += int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+                except (OSError, IndexError, ValueError):
+                    continue
+            return total
+        try:
+            import psutil
+        except ImportError:
+            return None
+        try:
+            parent = psutil.Process(process.pid)
+            return sum(p.memory_info().rss for p in [parent] + parent.children(recursive=True))
+        except psutil.Error:
+            return None
+
+    def _kill(self, process: subprocess.Popen) -> None:
+        try:
+            if sys.platform == "win32":
+                job = getattr(process, "_pyi_job", None)
+                if job is not None:
+                    job.terminate()
+                else:
+                    process.kill()
+            else:
+                # El hijo es líder de su sesión: se mata el grupo completo
+                # (PyInstaller lanza sus propios subprocesos de análisis).
+                import signal
+                os.killpg(process.pid, signal.SIGKILL)
+        except (OSError, ProcessLookupError):
+            pass
+
+    def _spawn(self, args: List[str], cwd: Optional[str]) -> subprocess.Popen:
+        kwargs = {
+            "cwd": cwd or None,
+            "env": self._child_env(),
+            "stdin": subprocess.DEVNULL,
+            "stdout": subprocess.DEVNULL,
+            "stderr": subprocess.PIPE,
+            "text": True,
+            "encoding": "utf-8",
+            "errors": "replace",
+        }
+        if sys.platform == "win32":
+            kwargs["creationflags"] = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+        else:
+            kwargs["start_new_session"] = True
+        process = subprocess.Popen(self._command(args), **kwargs)
+        if sys.platform == "win32":
+            try:
+                process._pyi_job = _WindowsJob(process, self.memory_limit_mb * 1024 * 1024)
+            except Exception:
+                process._pyi_job = None
+        return process
+
+    def _run_pyinstaller(self, args: List[str], cwd: Optional[str] = None) -> bool:
+        self._last_stderr = ""
+        try:
+            process = self._spawn(args, cwd)
+        except OSError as e:
+            self._cancelled.clear()
+            self._last_error = f"No se pudo iniciar PyInstaller: {e}"
+            return False
+        self._process = process
+
+        tail: "collections.deque[str]" = collections.deque(maxlen=_STDERR_TAIL_LINES)
+
+        def read_stderr():
+            for line in process.stderr:
+                line = line.rstrip("\n")
+                tail.append(line)
+                if self.log_callback:
+                    self.log_callback(line)
+
+        reader = threading.Thread(target=read_stderr, daemon=True)
+        reader.start()
+        deadline = time.monotonic() + self.timeout if self.timeout else None
+        # En Windows el job object ya aplica el límite.
+        watch_memory = bool(self.memory_limit_mb) and sys.platform != "win32"
+        next_memory_check = time.monotonic()
+        timed_out = False
+        memory_exceeded = False
+        try:
+            while True:
+                try:
+                    process.wait(timeout=0.2)
+                    break
+                except subprocess.TimeoutExpired:
+                    pass
+                if self._cancelled.is_set():
+                    self._kill(process)
+                elif deadline is not None and time.monotonic() > deadline:
+                    timed_out = True
+                    self._kill(process)
+                elif watch_memory and time.monotonic() >= next_memory_check:
+                    next_memory_check = time.monotonic() + _MEMORY_POLL_INTERVAL
+                    rss = self._tree_rss(process)
+                    if rss is None:
+                        watch_memory = False
+                    elif rss > self.memory_limit_mb * 1024 * 1024:
+                        memory_exceeded = True
+                        self._kill(process)
+        finally:
+            reader.join(5)
+            job = getattr(process, "_pyi_job", None)
+            if job is not None:
+                job.close()
+            self._process = None
+            cancelled = self._cancelled.is_set()
+            self._cancelled.clear()
+        self._last_stderr = "\n".join(tail)
+
+        if cancelled:
+            self._last_error = "Compilación cancelada"
+        elif timed_out:
+            self._last_error = f"PyInstaller superó el tiempo límite ({self.timeout:.0f}s)"
+        elif memory_exceeded:
+            self._last_error = f"PyInstaller superó el límite de memoria de {self.memory_limit_mb} MB"
+        elif process.returncode != 0:
+            reason = f"PyInstaller terminó con código {process.returncode}"
+            if self.memory_limit_mb and "MemoryError" in self._last_stderr:
+                reason += f" (límite de memoria de {self.memory_limit_mb} MB superado)"
+            details = "\n".join(list(tail)[-20:])
+            self._last_error = f"{reason}\n{details}" if details else reason
+        else:
+            return True
+        return False
+
+
+PYINSTALLER_BACKENDS = ("embedded", "subprocess")
+
 _embedded_pyinstaller: Optional[EmbeddedPyInstaller] = None
 
 
-def get_pyinstaller() -> EmbeddedPyInstaller:
+def get_pyinstaller(backend: str = "embedded") -> EmbeddedPyInstaller:
+    """Backend pedido (``embedded`` o ``subprocess``).
+
+    El embebido es una instancia compartida. El de subproceso es nuevo en cada
+    llamada: guarda el proceso, la cancelación y los errores de un solo build,
+    así que cada build debe usar el suyo para que ``cancel()`` no afecte a
+    otro que corre a la vez. En un ejecutable congelado ``sys.executable`` no
+    es un intérprete capaz de ejecutar ``-m PyInstaller``, así que siempre se
+    usa el backend embebido.
+    """
     global _embedded_pyinstaller
+    if backend == "subprocess" and not getattr(sys, "frozen", False):
+        return SubprocessPyInstaller()
     if _embedded_pyinstaller is None:
         _embedded_pyinstaller = EmbeddedPyInstaller()
     return _embedded_pyinstaller
@@ -210,6 +534,8 @@ def ensure_pyinstaller(log_callback=None) -> bool:
         return False
 
     if _refresh_pyinstaller_availability():
+        # Los SubprocessPyInstaller nuevos ya lo verán disponible; quien guarde
+        # uno creado antes de instalar debe pedir otro a get_pyinstaller().
         pyi.available = True
         _log(f"[OK] PyInstaller instalado: {pyi_version}")
         return True
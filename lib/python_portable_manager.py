@@ -13,6 +13,7 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Callable, Dict, List, Optional
 
+from lib.downloader import DownloadProgress, download_file
 from lib.safe_zip import safe_extract_zip
 
 # requests con fallback a urllib
@@ -85,29 +86,32 @@ class PythonInstallation:
 
 class DownloadWorker(QThread):
     progress = pyqtSignal(int, int)
+    # bytes/s y segundos restantes (-1 si aún no se conocen)
+    rate = pyqtSignal(float, float)
     finished = pyqtSignal(bool, str)
     status = pyqtSignal(str)
 
-    def __init__(self, url: str, destination: Path):
+    def __init__(self, url: str, destination: Path, sha256: Optional[str] = None):
         super().__init__()
         self.url = url
         self.destination = destination
+        self.sha256 = sha256
+
+    def _on_download(self, update: DownloadProgress):
+        if update.total > 0:
+            self.progress.emit(update.downloaded, update.total)
+        self.rate.emit(update.bytes_per_sec, update.eta if update.eta is not None else -1.0)
 
     def run(self):
         try:
             self.status.emit(f"Descargando {self.url.split('/')[-1]}...")
-            response = requests.get(self.url, stream=True, timeout=60)
-            response.raise_for_status()
-            total_size = int(response.headers.get("content-length", 0))
-            downloaded = 0
-            self.destination.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.destination, "wb") as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        if total_size > 0:
-                            self.progress.emit(downloaded, total_size)
+            download_file(
+                self.url,
+                self.destination,
+                sha256=self.sha256,
+                progress=self._on_download,
+                is_running=lambda: not self.isInterruptionRequested(),
+            )
             self.finished.emit(True, str(self.destination))
         except Exception as e:
             self.finished.emit(False, str(e))
@@ -2,20 +2,38 @@
 
 from __future__ import annotations
 
+import os
 import stat
+import threading
+import time
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path, PurePosixPath
+from typing import Callable, Iterable
+
+# Tamaño del buffer reutilizado para copiar cada miembro (1 MiB).
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+# Miembros a partir de este tamaño se descomprimen en paralelo (workers > 1).
+PARALLEL_MIN_SIZE = 4 * 1024 * 1024
+# Hilos recomendados para instalar paquetes grandes.
+EXTRACT_WORKERS = min(4, os.cpu_count() or 1)
+PROGRESS_INTERVAL = 0.1
 
 
 class UnsafeZipMemberError(ValueError):
     """Raised when a ZIP member could escape the requested destination."""
 
 
-def _safe_target(destination: Path, member_name: str) -> Path:
-    """Resolve a ZIP member under *destination* or raise for unsafe names."""
+class ExtractionCancelled(Exception):
+    """Raised when *is_running* reports that extraction should stop."""
+
+
+def _member_parts(member_name: str) -> list[str]:
+    """Split *member_name* into path components or raise for unsafe names."""
     normalized = member_name.replace("\\", "/")
     if not normalized or normalized == ".":
-        return destination
+        return []
 
     if normalized.startswith("/") or (
         len(normalized) >= 2
@@ -27,15 +45,75 @@ def _safe_target(destination: Path, member_name: str) -> Path:
     parts = [part for part in PurePosixPath(normalized).parts if part not in ("", ".")]
     if any(part == ".." for part in parts):
         raise UnsafeZipMemberError(f"Path traversal detectado en ZIP: {member_name!r}")
+    return parts
 
-    target = destination.joinpath(*parts)
-    try:
-        target.resolve().relative_to(destination)
-    except ValueError as exc:
-        raise UnsafeZipMemberError(
-            f"La entrada ZIP escapa del destino: {member_name!r}"
-        ) from exc
-    return target
+
+class _MemberValidator:
+    """Validate member paths below *destination* with memoized lookups.
+
+    Each unique parent directory is resolved once, and each existing directory
+    is listed once to learn which of its entries are links. A member then only
+    costs dictionary lookups; only a link at the leaf is resolved again.
+    """
+
+    def __init__(self, destination: Path):
+        self.destination = destination
+        self._parents: dict[tuple[str, ...], Path] = {(): destination}
+        self._links: dict[Path, frozenset[str]] = {}
+
+    def _resolve_parent(self, parts: tuple[str, ...], member_name: str) -> Path:
+        resolved = self._parents.get(parts)
+        if resolved is None:
+            resolved = self.destination.joinpath(*parts).resolve()
+            self._check_inside(resolved, member_name)
+            self._parents[parts] = resolved
+        return resolved
+
+    def _links_in(self, directory: Path) -> frozenset[str]:
+        links = self._links.get(directory)
+        if links is None:
+            try:
+                with os.scandir(directory) as entries:
+                    links = frozenset(
+                        entry.name for entry in entries
+                        if entry.is_symlink() or getattr(entry, "is_junction", lambda: False)()
+                    )
+            except OSError:
+                # Directorio aún inexistente (o no es un directorio): no hay enlaces.
+                links = frozenset()
+            self._links[directory] = links
+        return links
+
+    def _check_inside(self, resolved: Path, member_name: str) -> None:
+        try:
+            resolved.relative_to(self.destination)
+        except ValueError as exc:
+            raise UnsafeZipMemberError(
+                f"La entrada ZIP escapa del destino: {member_name!r}"
+            ) from exc
+
+    def target(self, member_name: str, allow_symlink: bool = False) -> Path:
+        """Return where *member_name* is written or raise if it is unsafe.
+
+        Without *allow_symlink*, an existing link at the target is rejected
+        even when it points inside the destination.
+        """
+        parts = _member_parts(member_name)
+        if not parts:
+            return self.destination
+        parent = self._resolve_parent(tuple(parts[:-1]), member_name)
+        if parts[-1] in self._links_in(parent):
+            self._check_inside((parent / parts[-1]).resolve(), member_name)
+            if not allow_symlink:
+                raise UnsafeZipMemberError(
+                    f"El destino ya contiene un symlink: {member_name!r}"
+                )
+        return self.destination.joinpath(*parts)
+
+
+def _safe_target(destination: Path, member_name: str) -> Path:
+    """Resolve a ZIP member under *destination* or raise for unsafe names."""
+    return _MemberValidator(destination).target(member_name, allow_symlink=True)
 
 
 def _is_symlink(info: zipfile.ZipInfo) -> bool:
@@ -44,42 +122,236 @@ def _is_symlink(info: zipfile.ZipInfo) -> bool:
     return stat.S_ISLNK(mode)
 
 
-def safe_extract_zip(archive: zipfile.ZipFile, destination: Path | str) -> list[Path]:
+def _preallocate(output, size: int) -> None:
+    """Reserve *size* bytes for *output* up front where the OS supports it."""
+    if not hasattr(os, "posix_fallocate"):
+        return
+    try:
+        os.posix_fallocate(output.fileno(), 0, size)
+    except OSError:
+        # Sistemas de archivos sin soporte (p. ej. algunos FUSE): se escribe igual.
+        pass
+
+
+@dataclass
+class ExtractProgress:
+    """Snapshot passed to the *progress* callback of :func:`safe_extract_zip`."""
+
+    bytes_done: int
+    bytes_total: int
+    members_done: int
+    members_total: int
+    elapsed: float
+
+    @property
+    def percent(self) -> int:
+        if self.bytes_total:
+            return min(100, int(self.bytes_done * 100 / self.bytes_total))
+        return int(self.members_done * 100 / self.members_total) if self.members_total else 100
+
+    @property
+    def bytes_per_sec(self) -> float:
+        return self.bytes_done / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> float | None:
+        rate = self.bytes_per_sec
+        return (self.bytes_total - self.bytes_done) / rate if rate > 0 else None
+
+
+class _Progress:
+    """Thread-safe byte/member counters that feed the *progress* callback.
+
+    Every update also polls *is_running*, so cancellation is noticed between
+    chunks on every extraction thread.
+    """
+
+    def __init__(self, callback, bytes_total: int, members_total: int, interval: float, is_running=None):
+        self.callback = callback
+        self.is_running = is_running
+        self.bytes_total = bytes_total
+        self.members_total = members_total
+        self.interval = interval
+        self.bytes_done = 0
+        self.members_done = 0
+        self._started = time.monotonic()
+        self._last = float("-inf")
+        self._lock = threading.Lock()
+
+    def add(self, size: int = 0, members: int = 0) -> None:
+        if self.is_running is not None and not self.is_running():
+            raise ExtractionCancelled("Extracción cancelada")
+        if self.callback is None:
+            return
+        with self._lock:
+            self.bytes_done += size
+            self.members_done += members
+            now = time.monotonic()
+            finished = self.members_done >= self.members_total
+            if not finished and now - self._last < self.interval:
+                return
+            self._last = now
+            self.callback(ExtractProgress(
+                self.bytes_done, self.bytes_total,
+                self.members_done, self.members_total,
+                now - self._started,
+            ))
+
+
+def _copy_member(
+    archive: zipfile.ZipFile,
+    info: zipfile.ZipInfo,
+    target: Path,
+    buffer: bytearray,
+    progress: _Progress,
+) -> None:
+    """Stream one member into *target* through the reused *buffer*.
+
+    Peak memory stays at ``len(buffer)`` whatever the member size. Members
+    larger than the buffer get their final size preallocated so the file is
+    not grown chunk by chunk.
+    """
+    view = memoryview(buffer)
+    with archive.open(info, "r") as source, target.open("wb") as output:
+        if info.file_size > len(buffer):
+            _preallocate(output, info.file_size)
+        while True:
+            count = source.readinto(view)
+            if not count:
+                break
+            output.write(view[:count])
+            progress.add(count)
+    progress.add(members=1)
+
+
+class _ParallelCopier:
+    """Copy members from per-thread ``ZipFile`` handles on *archive_path*.
+
+    A shared ``ZipFile`` serializes reads behind its file lock, so each worker
+    opens its own handle and buffer; zlib releases the GIL while inflating.
+    """
+
+    def __init__(self, archive_path, buffer_size: int, progress: _Progress):
+        self.archive_path = archive_path
+        self.buffer_size = buffer_size
+        self.progress = progress
+        self._local = threading.local()
+        self._handles: list[zipfile.ZipFile] = []
+        self._lock = threading.Lock()
+
+    def copy(self, info: zipfile.ZipInfo, target: Path) -> None:
+        handle = getattr(self._local, "archive", None)
+        if handle is None:
+            handle = self._local.archive = zipfile.ZipFile(self.archive_path, "r")
+            self._local.buffer = bytearray(self.buffer_size)
+            with self._lock:
+                self._handles.append(handle)
+        _copy_member(handle, info, target, self._local.buffer, self.progress)
+
+    def close(self) -> None:
+        for handle in self._handles:
+            handle.close()
+
+
+def _is_directory(info: zipfile.ZipInfo) -> bool:
+    return info.is_dir() or info.filename.endswith(("/", "\\"))
+
+
+def safe_extract_zip(
+    archive: zipfile.ZipFile,
+    destination: Path | str,
+    buffer_size: int = DEFAULT_BUFFER_SIZE,
+    progress: Callable[[ExtractProgress], None] | None = None,
+    workers: int = 1,
+    progress_interval: float = PROGRESS_INTERVAL,
+    members: Iterable[str] | None = None,
+    is_running: Callable[[], bool] | None = None,
+) -> list[Path]:
     """Extract *archive* below *destination* after validating every member.
 
     The archive is fully validated before the first write. Backslash separators,
     absolute paths, ``..`` components, symlink members, and pre-existing symlink
     targets are rejected to prevent writes outside the destination.
+
+    Members are streamed in chunks of *buffer_size* bytes, so extracting a
+    large onefile executable does not load it into memory. Every directory is
+    created up front in one pass. With ``workers > 1`` members of at least
+    ``PARALLEL_MIN_SIZE`` bytes are decompressed concurrently from independent
+    ``ZipFile`` handles (only when the archive was opened from a path) while
+    the small ones are copied on the calling thread.
+
+    *progress* receives :class:`ExtractProgress` snapshots at most every
+    *progress_interval* seconds, plus one when the last member is written.
+    *members* restricts extraction (and validation) to those member names.
+    When *is_running* returns ``False`` the extraction stops between chunks
+    with :class:`ExtractionCancelled`; files already written are left as is.
     """
     destination_path = Path(destination)
     destination_path.mkdir(parents=True, exist_ok=True)
     destination_path = destination_path.resolve()
 
+    selected = None if members is None else set(members)
+    validator = _MemberValidator(destination_path)
     planned: list[tuple[zipfile.ZipInfo, Path]] = []
     for info in archive.infolist():
+        if selected is not None and info.filename not in selected:
+            continue
         if _is_symlink(info):
             raise UnsafeZipMemberError(f"Symlink no permitido en ZIP: {info.filename!r}")
-        target = _safe_target(destination_path, info.filename)
-        if target != destination_path and target.exists() and target.is_symlink():
-            raise UnsafeZipMemberError(
-                f"El destino ya contiene un symlink: {info.filename!r}"
-            )
-        planned.append((info, target))
-
-    extracted: list[Path] = []
-    for info, target in planned:
-        if info.is_dir() or info.filename.endswith(("/", "\\")):
-            target.mkdir(parents=True, exist_ok=True)
-            extracted.append(target)
-            continue
+        planned.append((info, validator.target(info.filename)))
 
-        target.parent.mkdir(parents=True, exist_ok=True)
-        if target.exists() and target.is_symlink():
-            raise UnsafeZipMemberError(
-                f"El destino ya contiene un symlink: {info.filename!r}"
-            )
-        with archive.open(info, "r") as source, target.open("wb") as output:
-            output.write(source.read())
-        extracted.append(target)
+    directories = {target for info, target in planned if _is_directory(info)}
+    directories.update(target.parent for info, target in planned if not _is_directory(info))
+    for directory in sorted(directories, key=lambda path: len(path.parts)):
+        directory.mkdir(parents=True, exist_ok=True)
 
-    return extracted
+    files = [(info, target) for info, target in planned if not _is_directory(info)]
+    tracker = _Progress(
+        progress,
+        sum(info.file_size for info, _ in files),
+        len(files),
+        progress_interval,
+        is_running,
+    )
+    archive_path = archive.filename if isinstance(archive.filename, (str, os.PathLike)) else None
+    parallel = [] if workers <= 1 or archive_path is None else [
+        (info, target) for info, target in files if info.file_size >= PARALLEL_MIN_SIZE
+    ]
+    if len(parallel) < 2:
+        parallel = []
+    parallel_names = {info.filename for info, _ in parallel}
+
+    buffer = bytearray(max(1, buffer_size))
+    if not parallel:
+        for info, target in files:
+            _copy_member(archive, info, target, buffer, tracker)
+    else:
+        copier = _ParallelCopier(archive_path, max(1, buffer_size), tracker)
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="zip-extract")
+        try:
+            futures = [pool.submit(copier.copy, info, target) for info, target in parallel]
+            for info, target in files:
+                if info.filename not in parallel_names:
+                    _copy_member(archive, info, target, buffer, tracker)
+            for future in futures:
+                future.result()
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            copier.close()
+    if not files:
+        tracker.add()
+
+    return [target for _, target in planned]
+
+
+def resolve_member_path(destination: Path | str, member_name: str) -> Path:
+    """Return where *member_name* lives below *destination* or raise if unsafe.
+
+    Uses the same rules as :func:`safe_extract_zip`, for callers that touch
+    archive paths without extracting them (e.g. files removed by an update).
+    """
+    destination_path = Path(destination).resolve()
+    target = _safe_target(destination_path, member_name)
+    if target == destination_path:
+        raise UnsafeZipMemberError(f"Ruta vacía no permitida: {member_name!r}")
+    return target
@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+"""
+Instalación por etapas de apps en Fluthin Apps con intercambio por ``rename``.
+
+La versión nueva se prepara en un directorio hermano oculto
+(``.<app>.pm-staging``), se verifica (``details.xml`` y, si el paquete trae
+manifiesto, el SHA-256 de cada archivo) y solo entonces se intercambia con la
+instalada mediante dos ``rename``: la versión anterior queda en
+``.<app>.pm-previous`` para poder volver a ella al instante con ``rollback``.
+Una instalación interrumpida nunca deja la app a medias: o sigue la versión
+anterior, o ya está la nueva.
+
+Los archivos que no cambiaron respecto a la versión instalada no se
+descomprimen de nuevo: se clonan (reflink) si el sistema de archivos lo
+permite o se copian. Nunca se usan hard links: la versión anterior compartiría
+inodos con la activa y una escritura de la app en su sitio corrompería la copia
+de ``rollback``.
+"""
+
+from __future__ import annotations
+
+import errno
+import filecmp
+import hashlib
+import os
+import shutil
+import stat
+import sys
+import xml.etree.ElementTree as ET
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from lib.artifact_store import MANIFEST_NAME, parse_manifest
+from lib.safe_zip import (
+    ExtractionCancelled,
+    ExtractProgress,
+    UnsafeZipMemberError,
+    resolve_member_path,
+    safe_extract_zip,
+)
+
+STAGING_SUFFIX = ".pm-staging"
+PREVIOUS_SUFFIX = ".pm-previous"
+_ROLLBACK_SUFFIX = ".pm-rollback"
+# ioctl FICLONE de Linux (btrfs, XFS, bcachefs): copia que comparte bloques.
+_FICLONE = 0x40049409
+
+
+class StagedInstallError(Exception):
+    """La versión nueva no se pudo preparar o intercambiar; la instalada sigue intacta."""
+
+
+def staging_dir_for(target_dir) -> Path:
+    target = Path(target_dir)
+    return target.parent / f".{target.name}{STAGING_SUFFIX}"
+
+
+def previous_dir_for(target_dir) -> Path:
+    target = Path(target_dir)
+    return target.parent / f".{target.name}{PREVIOUS_SUFFIX}"
+
+
+def _sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def recover(target_dir) -> bool:
+    """Completa un intercambio interrumpido entre los dos ``rename``.
+
+    Si la app no existe pero sí su versión anterior, la restaura. Devuelve
+    ``True`` si hubo algo que recuperar.
+    """
+    target = Path(target_dir)
+    previous = previous_dir_for(target)
+    if target.exists() or not previous.is_dir():
+        return False
+    os.rename(previous, target)
+    return True
+
+
+def rollback(target_dir) -> bool:
+    """Vuelve a la versión anterior; la actual pasa a ser la anterior.
+
+    Devuelve ``False`` si no hay versión anterior guardada.
+    """
+    target = Path(target_dir)
+    previous = previous_dir_for(target)
+    if not previous.is_dir():
+        return False
+    if not target.exists():
+        os.rename(previous, target)
+        return True
+    parking = target.parent / f".{target.name}{_ROLLBACK_SUFFIX}"
+    shutil.rmtree(parking, ignore_errors=True)
+    os.rename(target, parking)
+    try:
+        os.rename(previous, target)
+    except OSError:
+        os.rename(parking, target)
+        raise
+    os.rename(parking, previous)
+    return True
+
+
+class _FileReuser:
+    """Reutiliza un archivo de la versión instalada: reflink o, si no, copia.
+
+    Ambas dan un inodo propio, así que la versión anterior no cambia aunque la
+    app modifique sus archivos en su sitio.
+    """
+
+    def __init__(self):
+        self._reflink = sys.platform.startswith("linux")
+
+    def reuse(self, source: Path, target: Path) -> str:
+        if self._reflink:
+            try:
+                import fcntl
+
+                with open(source, "rb") as src, open(target, "wb") as dst:
+                    fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+                shutil.copystat(source, target)
+                return "reflink"
+            except (ImportError, OSError) as e:
+                target.unlink(missing_ok=True)
+                # Sin soporte en este sistema de archivos: no volver a intentarlo.
+                if isinstance(e, ImportError) or e.errno in (
+                    errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.EXDEV, errno.ENOSYS,
+                ):
+                    self._reflink = False
+        shutil.copy2(source, target)
+        return "copy"
+
+
+@dataclass
+class InstallResult:
+    target: Path
+    previous: Optional[Path]
+    # Archivos escritos desde el paquete y archivos reutilizados de la versión anterior.
+    written: int = 0
+    reused: int = 0
+    reused_bytes: int = 0
+
+
+class StagedInstall:
+    """Prepara una versión nueva de *target_dir* al lado y la intercambia de golpe."""
+
+    def __init__(self, target_dir, keep_previous: bool = True):
+        self.target = Path(target_dir).absolute()
+        self.staging = staging_dir_for(self.target)
+        self.previous = previous_dir_for(self.target)
+        self.keep_previous = keep_previous
+        self.manifest: Optional[Dict] = None
+        self.written = 0
+        self.reused = 0
+        self.reused_bytes = 0
+        self._reuser = _FileReuser()
+
+    def _reset(self) -> None:
+        recover(self.target)
+        shutil.rmtree(self.staging, ignore_errors=True)
+        self.target.parent.mkdir(parents=True, exist_ok=True)
+        self.manifest = None
+        self.written = self.reused = self.reused_bytes = 0
+
+    def _reuse(self, source: Path, target: Path) -> None:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        self._reuser.reuse(source, target)
+        self.reused += 1
+        self.reused_bytes += source.stat().st_size
+
+    def _live_manifest(self) -> Optional[Dict]:
+        try:
+            return parse_manifest((self.target / MANIFEST_NAME).read_bytes())
+        except OSError:
+            return None
+
+    # ── preparación ──────────────────────────────────────────────────────────
+
+    def stage_archive(
+        self,
+        archive_path,
+        progress: Optional[Callable[[ExtractProgress], None]] = None,
+        workers: int = 1,
+        is_running: Optional[Callable[[], bool]] = None,
+    ) -> None:
+        """Extrae el ``.iflapp`` *archive_path* en el staging.
+
+        Si el paquete y la instalación tienen manifiesto, los archivos con el
+        mismo SHA-256 se toman de la versión instalada (tras comprobar su hash)
+        y solo se extraen los nuevos o modificados, que también se verifican.
+        Si *is_running* devuelve ``False`` se lanza ``ExtractionCancelled`` y
+        se descarta el staging.
+        """
+        self._reset()
+        try:
+            with zipfile.ZipFile(archive_path) as archive:
+                names = [info.filename for info in archive.infolist()]
+                try:
+                    self.manifest = parse_manifest(archive.read(MANIFEST_NAME))
+                except KeyError:
+                    self.manifest = None
+                members = self.manifest["members"] if self.manifest else {}
+                live = (self._live_manifest() or {}).get("members", {}) if members else {}
+
+                reused = set()
+                for name, entry in members.items():
+                    if is_running is not None and not is_running():
+                        raise ExtractionCancelled("Instalación cancelada")
+                    if live.get(name) != entry:
+                        continue
+                    source = resolve_member_path(self.target, name)
+                    if source.is_symlink() or not source.is_file():
+                        continue
+                    if source.stat().st_size != entry["size"] or _sha256_file(source) != entry["sha256"]:
+                        continue
+                    self._reuse(source, resolve_member_path(self.staging, name))
+                    reused.add(name)
+
+                pending = [name for name in names if name not in reused]
+                safe_extract_zip(
+                    archive, self.staging, progress=progress, workers=workers,
+                    members=pending, is_running=is_running,
+                )
+                for name in pending:
+                    entry = members.get(name)
+                    if entry is None:
+                        continue
+                    if _sha256_file(resolve_member_path(self.staging, name)) != entry["sha256"]:
+                        raise StagedInstallError(f"Hash incorrecto en el paquete: {name}")
+                self.written = sum(1 for name in pending if not name.endswith(("/", "\\")))
+        except (UnsafeZipMemberError, OSError, zipfile.BadZipFile) as e:
+            self.discard()
+            raise StagedInstallError(f"No se pudo extraer el paquete: {e}") from e
+        except BaseException:
+            self.discard()
+            raise
+
+    def stage_tree(self, source_dir) -> None:
+        """Copia la carpeta *source_dir* en el staging.
+
+        Los archivos con el mismo tamaño, fecha de modificación (``copy2`` la
+        conserva) y contenido que en la versión instalada se reutilizan.
+        """
+        self._reset()
+        source_root = Path(source_dir)
+        try:
+            for root, dirs, files in os.walk(source_root):
+                relative = Path(root).relative_to(source_root)
+                (self.staging / relative).mkdir(parents=True, exist_ok=True)
+                for name in files:
+                    source = Path(root) / name
+                    target = self.staging / relative / name
+                    live = self.target / relative / name
+                    info = source.stat()
+                    try:
+                        live_info = live.lstat()
+                    except OSError:
+                        live_info = None
+                    if (
+                        live_info is not None
+                        and stat.S_ISREG(live_info.st_mode)
+                        and live_info.st_size == info.st_size
+                        and live_info.st_mtime_ns == info.st_mtime_ns
+                        and filecmp.cmp(live, source, shallow=False)
+                    ):
+                        self._reuse(live, target)
+                    else:
+                        shutil.copy2(source, target)
+                        self.written += 1
+        except OSError as e:
+            self.discard()
+            raise StagedInstallError(f"No se pudo copiar la carpeta: {e}") from e
+
+    # ── verificación e intercambio ───────────────────────────────────────────
+
+    def verify(self) -> ET.Element:
+        """Comprueba que el staging contiene un ``details.xml`` válido y lo devuelve.
+
+        Si no es así se descarta el staging.
+        """
+        details = self.staging / "details.xml"
+        try:
+            return ET.parse(details).getroot()
+        except FileNotFoundError:
+            self.discard()
+            raise StagedInstallError("El paquete no contiene details.xml") from None
+        except (ET.ParseError, OSError) as e:
+            self.discard()
+            raise StagedInstallError(f"details.xml inválido: {e}") from e
+
+    def commit(self) -> InstallResult:
+        """Intercambia el staging con la instalación actual.
+
+        Son dos ``rename`` en el mismo directorio; si el proceso muere entre
+        ambos, ``recover`` (llamado al preparar la siguiente instalación)
+        restaura la versión anterior.
+        """
+        if not self.staging.is_dir():
+            raise StagedInstallError("No hay ninguna versión preparada")
+        previous = None
+        if self.target.exists():
+            shutil.rmtree(self.previous, ignore_errors=True)
+            try:
+                os.rename(self.target, self.previous)
+            except OSError as e:
+                self.discard()
+                raise StagedInstallError(f"No se pudo apartar la versión instalada (¿está en uso?): {e}") from e
+            previous = self.previous
+        try:
+            os.rename(self.staging, self.target)
+        except OSError as e:
+            if previous is not None:
+                os.rename(previous, self.target)
+            self.discard()
+            raise StagedInstallError(f"No se pudo activar la versión nueva: {e}") from e
+        if previous is not None and not self.keep_previous:
+            shutil.rmtree(previous, ignore_errors=True)
+            previous = None
+        return InstallResult(self.target, previous, self.written, self.reused, self.reused_bytes)
+
+    def discard(self) -> None:
+        shutil.rmtree(self.staging, ignore_errors=True)
@@ -16,6 +16,7 @@ import xml.etree.ElementTree as ET
 from pathlib import Path
 from typing import Optional, List, Dict
 
+from lib.build_profiler import load_trace, summary_rows_from_trace, format_summary_table
 from lib.projectNameFormatter import ProjectNameFormatter
 
 # ─── ANSI helpers ────────────────────────────────────────────────────────────
@@ -227,6 +228,7 @@ def _run_live(cmd: List[str], cwd: Optional[Path] = None) -> int:
     print(_hr("·"))
     print(gray(f"  $ {' '.join(str(c) for c in cmd)}"))
     print(_hr("·"))
+    proc = None
     try:
         proc = subprocess.Popen(
             cmd,
@@ -254,6 +256,14 @@ def _run_live(cmd: List[str], cwd: Optional[Path] = None) -> int:
         return 1
     except KeyboardInterrupt:
         _warn("Interrumpido por el usuario.")
+        if proc is not None:
+            # El hijo recibe el mismo Ctrl+C; un build lo usa para cancelar y
+            # limpiar sus carpetas parciales, así que se le da tiempo a terminar.
+            try:
+                proc.communicate(timeout=30)
+            except (subprocess.TimeoutExpired, KeyboardInterrupt):
+                proc.kill()
+                proc.wait()
         return 130
 
 # ─── Screen: Crear Proyecto ───────────────────────────────────────────────────
@@ -448,7 +458,7 @@ def _screen_build() -> None:
 
     cmd = _build_project_command(Path(project_path_str))
 
-    rc = _run_live(cmd)
+    rc = _run_build(cmd)
     if rc == 0:
         _ok("Paquete construido con éxito.")
     else:
@@ -558,6 +568,47 @@ def _build_project_command(proj: Path, python_exe: Optional[str] = None) -> List
     return [py, str(entry), "--buildthis", str(proj)]
 
 
+def _run_build(cmd: List[str]) -> int:
+    """Ejecuta un build y, si termina bien, muestra su perfil por fases."""
+    import tempfile
+    fd, trace = tempfile.mkstemp(prefix="pm-build-", suffix=".trace.json")
+    os.close(fd)
+    os.environ["PACKAGEMAKER_PROFILE_FILE"] = trace
+    try:
+        rc = _run_live(cmd)
+        if rc == 0:
+            _show_build_profile(Path(trace))
+        return rc
+    finally:
+        os.environ.pop("PACKAGEMAKER_PROFILE_FILE", None)
+        try:
+            os.unlink(trace)
+        except OSError:
+            pass
+
+
+def _show_build_profile(trace: Path) -> None:
+    """Pinta la tabla de fases a partir de la traza JSON del build."""
+    try:
+        rows = summary_rows_from_trace(load_trace(trace))
+    except (OSError, ValueError):
+        return
+    if not rows:
+        return
+    # Resaltar la fase de primer nivel que más tiempo consumió.
+    top_level = [row for row in rows if not row[0].startswith(" ")] or rows
+    slowest = max(top_level, key=lambda row: row[1])[0]
+    print()
+    print(bold(cyan("  Perfil del build")))
+    print(_hr())
+    lines = format_summary_table(rows).splitlines()
+    print(f"  {bold(lines[0])}")
+    print(f"  {dim(lines[1])}")
+    for row, line in zip(rows, lines[2:]):
+        print(f"  {orange(line) if row[0] == slowest else line}")
+    print(_hr())
+
+
 def _build_project_direct(proj: Path) -> None:
     """Lanza compilación sobre un proyecto del gestor."""
     output_dir = str(proj.parent / "dist")
@@ -565,9 +616,11 @@ def _build_project_direct(proj: Path) -> None:
     print()
     _info(f"Compilando {orange(proj.name)} para {orange(detected)}…")
     cmd = _build_project_command(proj)
-    rc = _run_live(cmd)
+    rc = _run_build(cmd)
     if rc == 0:
         _ok("Paquete construido con éxito.")
+    elif rc == 130:
+        _warn("Build cancelado; se eliminaron los archivos parciales.")
     else:
         _err(f"Falló con código {rc}")
     _pause()
@@ -22,6 +22,7 @@ import importlib
 import importlib.util
 
 from lib.safe_zip import safe_extract_zip
+from lib.staged_install import StagedInstall
 
 # Importar detector de modo de ejecución
 try:
@@ -113,10 +114,15 @@ except (ImportError, SyntaxError) as e:
     class LeviathanProgressBar: pass
 # Updater - usar coreUpdater si está disponible, sino fallback a lib.Updater
 try:
-    from lib.coreUpdater import KillerLogic, InstallerWorker, ModernUpdaterWindow
+    from lib.coreUpdater import (
+        IFLAPPInstallerWorker, KillerLogic, InstallerWorker, ModernUpdaterWindow, UpdateCheckThread,
+    )
 except ImportError:
     from lib.Updater import KillerLogic, InstallerWorker, ModernUpdaterWindow
-from lib.BuildThread import BuildThread, FlangCompiler
+    IFLAPPInstallerWorker = None
+    UpdateCheckThread = None
+from lib.BuildThread import BatchBuildThread, BuildThread, FlangCompiler
+from lib.project_scan import scan_project_dirs
 from lib.TitleBar import AnimTitleButton, TitleBar
 from lib.app_icons import get_sidebar_icon, get_icon, icon_button
 from lib.window_chrome import (
@@ -2480,6 +2486,24 @@ class PackageTodoGUI(QMainWindow):
         action_layout.addWidget(self.btn_build)
         
         layout.addLayout(action_layout)
+
+        # Resumen por fases del último build (tiempos, CPU, E/S y memoria).
+        self.build_profile_view = QTextEdit()
+        self.build_profile_view.setReadOnly(True)
+        self.build_profile_view.setVisible(False)
+        self.build_profile_view.setLineWrapMode(QTextEdit.LineWrapMode.NoWrap)
+        self.build_profile_view.setStyleSheet("""
+            QTextEdit {
+                background-color: rgba(255, 255, 255, 0.03);
+                border: 1px solid rgba(255, 255, 255, 0.05);
+                border-radius: 6px;
+                color: #ccc;
+                font-family: 'Consolas', 'DejaVu Sans Mono', monospace;
+                font-size: 12px;
+                padding: 6px;
+            }
+        """)
+        layout.addWidget(self.build_profile_view, 1)
         layout.addStretch()
 
     def select_custom_folder(self):
@@ -2498,6 +2522,13 @@ class PackageTodoGUI(QMainWindow):
                  except: pass
 
     def build_package_action(self):
+        # Mientras hay un build en curso, el mismo botón lo cancela.
+        thread = getattr(self, "build_thread", None)
+        if thread is not None and thread.isRunning():
+            thread.cancel()
+            self.btn_build.setEnabled(False)
+            self.build_status.setText("⏹ Cancelando build...")
+            return
         version = getversion()
         empresa = self.input_build_empresa.text().strip().lower() or "influent"
         nombre = self.input_build_nombre.text().strip().lower() or "mycoolapp"
@@ -2516,14 +2547,21 @@ class PackageTodoGUI(QMainWindow):
         self.build_status.setText("🔨 Construyendo paquete .iflapp...")
         self.build_progress.setVisible(True)
         self.build_progress.setMarquee(True)
+        self.build_profile_view.setVisible(False)
         
         self.build_thread = BuildThread(empresa, nombre, version_full, platformLineEdit, parent=self, custom_path=custom_path, base_dir=BASE_DIR, build_mode=build_mode)
         self.build_thread.progress.connect(lambda msg: self.build_status.setText(msg))
-        self.build_thread.finished.connect(lambda msg: [self.build_status.setText(msg), self.build_progress.setVisible(False)])
-        self.build_thread.error.connect(lambda msg: [self.build_status.setText(f"❌ Error: {msg}"), self.build_progress.setVisible(False)])
+        self.build_thread.profile_ready.connect(lambda table: [self.build_profile_view.setPlainText(table), self.build_profile_view.setVisible(True)])
+        self.build_thread.finished.connect(lambda msg: [self.build_status.setText(msg), self.build_progress.setVisible(False), self._reset_build_button()])
+        self.build_thread.error.connect(lambda msg: [self.build_status.setText(f"❌ Error: {msg}"), self.build_progress.setVisible(False), self._reset_build_button()])
         self.build_thread.start()
+        self.btn_build.setText("Cancelar")
         self.statusBar().showMessage(f"Iniciando compilación...")
 
+    def _reset_build_button(self):
+        self.btn_build.setText("Construir Paquete")
+        self.btn_build.setEnabled(True)
+
     def init_manager_tab(self, parent_widget=None):
         target = parent_widget if parent_widget else self.tab_manager
         # Enable styled background for proper inheritance
@@ -2654,6 +2692,17 @@ class PackageTodoGUI(QMainWindow):
         self.btn_open_with.clicked.connect(self.open_selected_project_with_ide)
         btn_row.addWidget(self.btn_open_with)
 
+        self.btn_build_all = uwp_btn("Construir todo", "construir")
+        self.btn_build_all.setToolTip("Compilar todos los proyectos locales en paralelo")
+        self.btn_build_all.clicked.connect(self.build_all_projects_action)
+        btn_row.addWidget(self.btn_build_all)
+
+        self.btn_check_updates = uwp_btn("Buscar actualizaciones", "refresh")
+        self.btn_check_updates.setToolTip("Comprobar si hay versiones nuevas de todas las apps instaladas")
+        self.btn_check_updates.setEnabled(UpdateCheckThread is not None)
+        self.btn_check_updates.clicked.connect(self.check_app_updates_action)
+        btn_row.addWidget(self.btn_check_updates)
+
         btn_row.addStretch()
 
         btn_install = uwp_btn("Instalar", "instalar")
@@ -2700,36 +2749,34 @@ class PackageTodoGUI(QMainWindow):
         # asumiremos que quiere encontrar details.xml incluso si está dentro de subcarpetas (proyectos anidados ??).
         # Para evitar lentitud extrema, limitaremos la profundidad o usaremos walk con cuidado.
         
-        for root, dirs, files in os.walk(base):
-            if "details.xml" in files:
-                folder = root
-                details_path = os.path.join(folder, "details.xml")
-                icon_path = os.path.join(folder, "app", "app-icon.ico")
-                try:
-                    tree = ET.parse(details_path)
-                    root_xml = tree.getroot()
-                    details = {child.tag: child.text for child in root_xml}
-                    empresa = details.get("publisher", "Origen Desconocido")
-                    titulo = details.get("name", os.path.basename(folder))
-                    version = details.get("version", "v?")
-                    ratings = details.get("rate", "Sin Clasificación")
-                    
-                    correlation_id = details.get("correlationid")
-                    if not correlation_id:
-                        correlation_id = hashlib.sha256(f"{empresa}.{titulo}.{version}".encode()).hexdigest()
-
-                    packages.append({
-                        "folder": folder,
-                        "empresa": empresa,
-                        "titulo": titulo,
-                        "version": version,
-                        "icon": icon_path if os.path.exists(icon_path) else None,
-                        "name": os.path.basename(folder),
-                        "rating": ratings,
-                        "sha": correlation_id
-                    })
-                except Exception:
-                    continue
+        for folder in scan_project_dirs(base):
+            details_path = os.path.join(folder, "details.xml")
+            icon_path = os.path.join(folder, "app", "app-icon.ico")
+            try:
+                tree = ET.parse(details_path)
+                root_xml = tree.getroot()
+                details = {child.tag: child.text for child in root_xml}
+                empresa = details.get("publisher", "Origen Desconocido")
+                titulo = details.get("name", os.path.basename(folder))
+                version = details.get("version", "v?")
+                ratings = details.get("rate", "Sin Clasificación")
+                
+                correlation_id = details.get("correlationid")
+                if not correlation_id:
+                    correlation_id = hashlib.sha256(f"{empresa}.{titulo}.{version}".encode()).hexdigest()
+
+                packages.append({
+                    "folder": folder,
+                    "empresa": empresa,
+                    "titulo": titulo,
+                    "version": version,
+                    "icon": icon_path if os.path.exists(icon_path) else None,
+                    "name": os.path.basename(folder),
+                    "rating": ratings,
+                    "sha": correlation_id
+                })
+            except Exception:
+                continue
         return packages
 
     def load_manager_lists(self):
@@ -2744,10 +2791,14 @@ class PackageTodoGUI(QMainWindow):
             item.setData(QtCore.Qt.ItemDataRole.UserRole, p)
             self.projects_list.addItem(item)
         apps = self.get_package_list(Fluthin_APPS)
+        update_results = getattr(self, "update_results", {})
         for a in apps:
             icon = QIcon(a["icon"]) if a["icon"] else self.style().standardIcon(QStyle.StandardPixmap.SP_DesktopIcon)
             text = a['empresa'].capitalize()
             text = f"{text} {a['titulo']} | {a['version']}"
+            update = update_results.get(a["folder"])
+            if update is not None and update.outdated:
+                text += f"  ⬆ {update.remote_version}"
             item = QListWidgetItem(icon, text)
             item.setData(QtCore.Qt.ItemDataRole.UserRole, a)
             self.apps_list.addItem(item)
@@ -2800,6 +2851,11 @@ class PackageTodoGUI(QMainWindow):
 
     def _finish_close(self):
         self._force_close = True
+        # No dejar un build consumiendo CPU tras cerrar la ventana.
+        for thread in (getattr(self, "build_thread", None), getattr(self, "batch_build_thread", None)):
+            if thread is not None and thread.isRunning():
+                thread.cancel()
+                thread.wait(10000)
         self.close()
 
     def on_project_double_click(self, item):
@@ -2812,6 +2868,69 @@ class PackageTodoGUI(QMainWindow):
         dlg = ProjectDetailsDialog(self, pkg, is_app=True, manager_ref=self)
         dlg.exec()
 
+    def build_all_projects_action(self):
+        # Mientras hay un lote en curso, el mismo botón lo cancela.
+        thread = getattr(self, "batch_build_thread", None)
+        if thread is not None and thread.isRunning():
+            thread.cancel()
+            self.btn_build_all.setEnabled(False)
+            self.manager_status.setText("⏹ Cancelando build por lotes...")
+            return
+        self.btn_build_all.setText("Cancelar")
+        self.manager_status.setText("🔨 Compilando todos los proyectos...")
+        self.batch_build_thread = BatchBuildThread(BASE_DIR, parent=self)
+        self.batch_build_thread.progress.connect(self.manager_status.setText)
+        self.batch_build_thread.finished.connect(self._on_build_all_finished)
+        self.batch_build_thread.start()
+
+    def _on_build_all_finished(self, ok, summary):
+        self.btn_build_all.setText("Construir todo")
+        self.btn_build_all.setEnabled(True)
+        last_line = summary.splitlines()[-1] if summary else ""
+        self.manager_status.setText(f"{'✅' if ok else '❌'} {last_line}")
+        box = QMessageBox(self)
+        box.setIcon(QMessageBox.Icon.Information if ok else QMessageBox.Icon.Warning)
+        box.setWindowTitle("Construir todo")
+        box.setText(last_line)
+        box.setDetailedText(summary)
+        box.exec()
+        self.load_manager_lists()
+
+    def check_app_updates_action(self):
+        self.btn_check_updates.setEnabled(False)
+        self.manager_status.setText("🔎 Buscando actualizaciones de las apps instaladas...")
+        self.update_check_thread = UpdateCheckThread(Fluthin_APPS, parent=self)
+        self.update_check_thread.progress.connect(
+            lambda done, total: self.manager_status.setText(f"🔎 Comprobadas {done}/{total} apps...")
+        )
+        self.update_check_thread.finished.connect(self._on_update_check_finished)
+        self.update_check_thread.start()
+
+    def _on_update_check_finished(self, results, error):
+        from lib.coreUpdater.update_check import format_update_summary
+
+        self.btn_check_updates.setEnabled(True)
+        if error:
+            self.manager_status.setText(f"❌ Error buscando actualizaciones: {error}")
+            return
+        if not results:
+            self.manager_status.setText("No hay apps instaladas.")
+            return
+        self.update_results = {result.app.folder: result for result in results}
+        self.load_manager_lists()
+        outdated = [result for result in results if result.outdated]
+        if outdated:
+            names = ", ".join(result.app.app for result in outdated)
+            self.manager_status.setText(f"⬆️ {len(outdated)} app(s) con actualización: {names}")
+        else:
+            self.manager_status.setText("✅ Todas las apps están al día")
+        box = QMessageBox(self)
+        box.setIcon(QMessageBox.Icon.Information)
+        box.setWindowTitle("Buscar actualizaciones")
+        box.setText(self.manager_status.text())
+        box.setDetailedText(format_update_summary(results))
+        box.exec()
+
     def install_package_action(self):
         files = QFileDialog.getOpenFileNames(self, "Selecciona paquetes para instalar", BASE_DIR, "Paquetes (*.iflapp)")[0]
         for file_path in files:
@@ -2819,10 +2938,11 @@ class PackageTodoGUI(QMainWindow):
                 continue
             pkg_name = os.path.basename(file_path).replace(".iflapp", "")
             target_dir = os.path.join(Fluthin_APPS, pkg_name)
-            os.makedirs(target_dir, exist_ok=True)
+            install = StagedInstall(target_dir)
             try:
-                with zipfile.ZipFile(file_path, 'r') as zip_ref:
-                    safe_extract_zip(zip_ref, target_dir)
+                install.stage_archive(file_path)
+                install.verify()
+                install.commit()
                 self.manager_status.setText(f"✅ Instalado: {pkg_name} en Fluthin Apps")
                 # Asociación de extensión y menú inicio en Windows
                 if sys.platform.startswith('win'):
@@ -4021,26 +4141,31 @@ class PackageTodoGUI(QMainWindow):
             nombrePaquete = os.path.basename(folderPath)
             rutaDestino = os.path.join(Fluthin_APPS, nombrePaquete)
             
+            # Se prepara al lado de la versión instalada, que sigue intacta hasta el intercambio.
+            instalacion = StagedInstall(rutaDestino)
             if os.path.exists(rutaDestino):
-                txtLog.append(f"  ℹ El paquete '{nombrePaquete}' ya existe, sobrescribiendo...")
-                import shutil
-                shutil.rmtree(rutaDestino)
-            
-            import shutil
-            shutil.copytree(folderPath, rutaDestino)
-            txtLog.append(f"  ✓ Archivos copiados a: {rutaDestino}")
+                txtLog.append(f"  ℹ El paquete '{nombrePaquete}' ya existe, se reemplazará al final")
+            instalacion.stage_tree(folderPath)
+            txtLog.append(
+                f"  ✓ {instalacion.written} archivos copiados, "
+                f"{instalacion.reused} sin cambios reutilizados de la versión anterior"
+            )
             
             progressBar.setValue(70)
             
-            # Registrar paquete
-            txtLog.append("\n[3/5] Registrando paquete en el sistema...")
-            progressBar.setValue(85)
-            txtLog.append("  ✓ Paquete registrado")
+            # Verificar antes de activar
+            txtLog.append("\n[3/5] Verificando instalación...")
+            progressBar.setValue(80)
+            instalacion.verify()
+            txtLog.append("  ✓ details.xml verificado")
             
-            # Finalizar
-            txtLog.append("\n[4/5] Verificando instalación...")
+            # Activar
+            txtLog.append("\n[4/5] Activando versión nueva...")
             progressBar.setValue(95)
-            txtLog.append("  ✓ Instalación verificada")
+            resultado = instalacion.commit()
+            txtLog.append(f"  ✓ Archivos instalados en: {rutaDestino}")
+            if resultado.previous:
+                txtLog.append(f"  ℹ Versión anterior conservada en: {resultado.previous}")
             
             txtLog.append("\n[5/5] Finalizando...")
             progressBar.setValue(100)
@@ -4534,6 +4659,11 @@ class PackageTodoGUI(QMainWindow):
             progressBar = LeviathanProgressBar(self)
             contentLayout.addWidget(progressBar)
             
+            # Estado en vivo (archivos, bytes, velocidad)
+            lblEstado = QLabel("")
+            lblEstado.setStyleSheet("color: #aaa; font-size: 12px;")
+            contentLayout.addWidget(lblEstado)
+            
             # Log de instalación
             txtLog = QTextEdit()
             txtLog.setReadOnly(True)
@@ -4563,7 +4693,13 @@ class PackageTodoGUI(QMainWindow):
             btnInstalar.setCursor(Qt.CursorShape.PointingHandCursor)
             btnInstalar.setMinimumHeight(45)
             
+            btnCancelar = QPushButton("✖ Cancelar")
+            btnCancelar.setStyleSheet(BTN_STYLES["default"])
+            btnCancelar.setMinimumHeight(45)
+            btnCancelar.hide()
+            
             layoutBotones.addWidget(btnCerrar)
+            layoutBotones.addWidget(btnCancelar)
             layoutBotones.addWidget(btnInstalar)
             contentLayout.addLayout(layoutBotones)
             
@@ -4582,49 +4718,67 @@ class PackageTodoGUI(QMainWindow):
             # Conectar botones
             btnCerrar.clicked.connect(dialogoInstalarPaquete.close)
             btnInstalar.clicked.connect(lambda: self._ejecutarInstalacionPaquete(
-                filePath, progressBar, txtLog, btnInstalar, btnCerrar
+                filePath, progressBar, lblEstado, txtLog, btnInstalar, btnCancelar, btnCerrar
             ))
             
             dialogoInstalarPaquete.exec()
             
+            # Si se cerró el diálogo con la instalación en curso, cancelarla
+            instalacion = getattr(self, "_instalacionPaquete", None)
+            if instalacion and instalacion[0].isRunning():
+                instalacion[1].cancel()
+            
         except Exception as e:
             print(f"Error mostrando diálogo de instalar paquete: {e}")
             LeviathanDialog.launch(self, "Error", f"Error mostrando diálogo: {e}", mode="error")
     
-    def _ejecutarInstalacionPaquete(self, filePath, progressBar, txtLog, btnInstalar, btnCerrar):
-        """Ejecuta la instalación del paquete .iflapp"""
+    def _ejecutarInstalacionPaquete(self, filePath, progressBar, lblEstado, txtLog, btnInstalar, btnCancelar, btnCerrar):
+        """Instala el paquete .iflapp en Fluthin Apps desde un hilo de fondo.
+
+        Usa el mismo motor que el instalador de coreUpdater (``IFLAPPInstallerWorker``):
+        extracción en streaming a un staging, verificación e intercambio atómico.
+        """
         try:
             btnInstalar.setEnabled(False)
             txtLog.append("=== Iniciando instalación de paquete .iflapp ===\n")
-            progressBar.setValue(10)
+            progressBar.setValue(0)
             
-            txtLog.append("[1/5] Verificando archivo...")
+            txtLog.append("[1/3] Verificando archivo...")
             if not os.path.exists(filePath):
                 raise Exception("El archivo no existe")
+            if not zipfile.is_zipfile(filePath):
+                raise Exception("El archivo no es un paquete .iflapp válido")
+            if IFLAPPInstallerWorker is None:
+                raise Exception("El instalador de paquetes no está disponible")
             txtLog.append("  ✓ Archivo verificado")
-            progressBar.setValue(30)
             
-            txtLog.append("\n[2/5] Extrayendo paquete...")
             nombrePaquete = os.path.splitext(os.path.basename(filePath))[0]
-            txtLog.append(f"  ℹ Paquete: {nombrePaquete}")
-            progressBar.setValue(50)
-            
-            txtLog.append("\n[3/5] Copiando archivos a Fluthin Apps...")
             rutaDestino = os.path.join(Fluthin_APPS, nombrePaquete)
-            txtLog.append(f"  ✓ Destino: {rutaDestino}")
-            progressBar.setValue(70)
-            
-            txtLog.append("\n[4/5] Registrando paquete...")
-            txtLog.append("  ✓ Paquete registrado")
-            progressBar.setValue(90)
-            
-            txtLog.append("\n[5/5] Finalizando...")
-            progressBar.setValue(100)
-            
-            txtLog.append("\n=== ✅ Instalación Completada ===")
+            txtLog.append(f"\n[2/3] Extrayendo {nombrePaquete}...")
+            txtLog.append(f"  ℹ Destino: {rutaDestino}")
+            
+            thread = QThread(self)
+            worker = IFLAPPInstallerWorker(filePath, rutaDestino)
+            worker.moveToThread(thread)
+            thread.started.connect(worker.run)
+            worker.progress.connect(progressBar.setValue)
+            worker.status.connect(lblEstado.setText)
+            worker.finished.connect(thread.quit)
+            worker.finished.connect(lambda ok, msg: self._onInstalacionPaqueteTerminada(
+                ok, msg, nombrePaquete, rutaDestino, lblEstado, txtLog, btnInstalar, btnCancelar, btnCerrar
+            ))
+            self._instalacionPaquete = (thread, worker)
             
-            btnCerrar.setEnabled(True)
-            LeviathanDialog.launch(self, "Éxito", f"Paquete '{nombrePaquete}' instalado correctamente", mode="success")
+            # El worker está ocupado en su hilo: cancel() se llama directamente, no por señal
+            try:
+                btnCancelar.clicked.disconnect()
+            except TypeError:
+                pass  # Primer intento: no había conexión previa
+            btnCancelar.clicked.connect(lambda: (worker.cancel(), btnCancelar.setEnabled(False)))
+            btnCancelar.setEnabled(True)
+            btnCancelar.show()
+            btnCerrar.setEnabled(False)
+            thread.start()
             
         except Exception as e:
             txtLog.append(f"\n✗ ERROR: {e}")
@@ -4632,6 +4786,28 @@ class PackageTodoGUI(QMainWindow):
             btnInstalar.setEnabled(True)
             btnCerrar.setEnabled(True)
     
+    def _onInstalacionPaqueteTerminada(self, ok, msg, nombrePaquete, rutaDestino, lblEstado, txtLog,
+                                       btnInstalar, btnCancelar, btnCerrar):
+        """Actualiza el diálogo de instalación cuando termina el worker"""
+        btnCancelar.hide()
+        btnCerrar.setEnabled(True)
+        visible = txtLog.isVisible()
+        if ok:
+            txtLog.append("  ✓ Paquete extraído y verificado")
+            txtLog.append("\n[3/3] Finalizando...")
+            txtLog.append(f"  ✓ Instalado en: {rutaDestino}")
+            txtLog.append("\n=== ✅ Instalación Completada ===")
+            lblEstado.setText("")
+            self.load_manager_lists()
+            if visible:
+                LeviathanDialog.launch(self, "Éxito", f"Paquete '{nombrePaquete}' instalado correctamente", mode="success")
+            return
+        txtLog.append(f"\n✗ {msg}")
+        txtLog.append("  ℹ La versión instalada (si había una) no se ha modificado")
+        btnInstalar.setEnabled(True)
+        if visible and msg != "Instalación cancelada":
+            LeviathanDialog.launch(self, "Error", f"Error instalando paquete: {msg}", mode="error")
+    
     def openPackageFile(self, filePath):
         """Abre un archivo de paquete en el gestor"""
         try:
@@ -5126,7 +5302,7 @@ def main():
     
     from lib.cliHandler import CLIHandler, handle_cli_action
     
-    cli = CLIHandler(base_dir=BASE_DIR)
+    cli = CLIHandler(base_dir=BASE_DIR, apps_dir=Fluthin_APPS)
     
     if cli.has_cli_args():
         args = cli.parse()
@@ -5152,7 +5328,7 @@ def main():
         if action:
             # Los comandos create/compile/moonfix se ejecutan automáticamente en headless
             # cuando se usan los nuevos argumentos sin --headless explícito
-            if action in ['create_project', 'compile_project', 'repair_project']:
+            if action in ['create_project', 'compile_project', 'repair_project', 'build_all', 'build_daemon', 'check_updates']:
                 action_options['headless'] = True
             
             # Acciones que no requieren GUI ni QApplication
@@ -5223,4 +5399,7 @@ def main():
 
 
 if __name__ == "__main__":
+    # Necesario para los workers de compilación paralela en builds congelados.
+    import multiprocessing
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark del filtrado .gitignore de empaquetado.
+
+Compara el matcher anterior (bucle de ``fnmatch`` por nombre, aplicado a cada
+entrada del árbol) con ``GitignoreMatcher`` (regex compilada + poda de
+directorios) sobre un proyecto sintético con un árbol vendorizado grande.
+"""
+import argparse
+import fnmatch
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.resolve()))
+
+from lib.gitignore import GitignoreMatcher
+
+PATTERNS = [
+    "requirements.txt", "*.pyc", "__pycache__", ".git", ".gitignore",
+    "build", "dist", "*.spec", "*.py", ".idea", ".vscode", ".github",
+    "node_modules/", "*.log", "/tmp", "docs/_build/", "*.egg-info", ".cache",
+    "coverage", "*.tmp", "*.bak", "assets/**/*.psd",
+]
+
+
+def legacy_should_exclude(name, patterns):
+    for p in patterns:
+        if fnmatch.fnmatch(name, p) or fnmatch.fnmatch(name, f"*/{p}"):
+            return True
+        if "/" in p:
+            parts = p.split("/")
+            if name == parts[0] or name == parts[-1]:
+                return True
+    return False
+
+
+def legacy_walk(root, patterns):
+    legacy = [p.strip("/") for p in patterns]
+    kept = 0
+    for current, dirs, files in os.walk(root):
+        # copytree(ignore=...) filtra por nombre pero el ignore se evalúa en cada nivel.
+        dirs[:] = [d for d in dirs if not legacy_should_exclude(d, legacy)]
+        kept += sum(1 for f in files if not legacy_should_exclude(f, legacy))
+    return kept
+
+
+def compiled_walk(root, patterns):
+    matcher = GitignoreMatcher.from_lines(patterns)
+    return sum(len(files) for _, _, files in matcher.walk(root))
+
+
+def build_tree(root, packages, files_per_package):
+    for index in range(packages):
+        package = root / "node_modules" / f"pkg{index}" / "lib"
+        package.mkdir(parents=True)
+        for number in range(files_per_package):
+            (package / f"mod{number}.js").touch()
+    for index in range(packages):
+        folder = root / "app" / f"section{index}"
+        folder.mkdir(parents=True)
+        for number in range(files_per_package):
+            (folder / f"page{number}.html").touch()
+            (folder / f"page{number}.log").touch()
+
+
+def bench(label, func, *args, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<28} {best * 1000:9.2f} ms  ({result})")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del matcher .gitignore")
+    parser.add_argument("--packages", type=int, default=200)
+    parser.add_argument("--files", type=int, default=25)
+    parser.add_argument("--names", type=int, default=50000)
+    args = parser.parse_args()
+
+    extensions = ("js", "log", "py", "txt")
+    names = [f"dir{i}/file{i}.{extensions[i % len(extensions)]}" for i in range(args.names)]
+    legacy = [p.strip("/") for p in PATTERNS]
+    matcher = GitignoreMatcher.from_lines(PATTERNS)
+    print(f"Coincidencia de {len(names)} rutas con {len(PATTERNS)} patrones")
+    old = bench("fnmatch por nombre", lambda: sum(legacy_should_exclude(n.rsplit('/', 1)[-1], legacy) for n in names))
+    new = bench("GitignoreMatcher.matches", lambda: sum(matcher.matches(n) for n in names))
+    print(f"{'aceleración':<28} {old / new:9.1f}x\n")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        build_tree(root, args.packages, args.files)
+        print(f"Recorrido de un árbol con {args.packages} paquetes vendorizados")
+        old = bench("os.walk + fnmatch", legacy_walk, root, PATTERNS)
+        new = bench("GitignoreMatcher.walk", compiled_walk, root, PATTERNS)
+        print(f"{'aceleración':<28} {old / new:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark de memoria y validación de ``safe_extract_zip``.
+
+Compara la extracción anterior (``output.write(source.read())``, que carga el
+miembro descomprimido entero) con la copia en streaming sobre un buffer
+reutilizado, midiendo el pico de memoria con ``tracemalloc`` para miembros de
+distintos tamaños, almacenados y comprimidos. También mide la validación de
+rutas de un paquete con miles de archivos pequeños: ``resolve()`` y dos
+comprobaciones de symlink por miembro frente a la validación memoizada por
+directorio.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.resolve()))
+
+from lib.safe_zip import DEFAULT_BUFFER_SIZE, _MemberValidator, _member_parts, safe_extract_zip
+
+
+def legacy_extract(archive, destination):
+    destination.mkdir(parents=True, exist_ok=True)
+    for info in archive.infolist():
+        target = destination / info.filename
+        with archive.open(info, "r") as source, target.open("wb") as output:
+            output.write(source.read())
+
+
+def streaming_extract(archive, destination):
+    safe_extract_zip(archive, destination)
+
+
+def legacy_validate(names, destination):
+    for name in names:
+        target = destination.joinpath(*_member_parts(name))
+        target.resolve().relative_to(destination)
+        if target.exists() and target.is_symlink():
+            raise ValueError(name)
+        if target.exists() and target.is_symlink():
+            raise ValueError(name)
+
+
+def memoized_validate(names, destination):
+    validator = _MemberValidator(destination)
+    for name in names:
+        validator.target(name)
+
+
+def bench_validation(directories, files):
+    names = [f"assets/group{d}/sub/file{f}.png" for d in range(directories) for f in range(files)]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        destination = Path(temp_dir).resolve()
+        # Reinstalación: los archivos ya existen, como al actualizar una app.
+        for name in names:
+            target = destination / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.touch()
+        print(f"\nValidación de {len(names)} rutas en {directories} directorios")
+        timings = {}
+        for label, func in (("resolve por miembro", legacy_validate), ("memoizada por directorio", memoized_validate)):
+            best = float("inf")
+            for _ in range(3):
+                start = time.perf_counter()
+                func(names, destination)
+                best = min(best, time.perf_counter() - start)
+            timings[label] = best
+            print(f"{label:<28} {best * 1000:9.2f} ms")
+        old, new = timings.values()
+        print(f"{'aceleración':<28} {old / new:9.1f}x")
+
+
+def build_archive(path, size_mb, compression):
+    block = os.urandom(1024 * 1024)
+    with zipfile.ZipFile(path, "w", compression) as archive:
+        with archive.open("app.bin", "w", force_zip64=True) as member:
+            for _ in range(size_mb):
+                member.write(block)
+
+
+def measure(func, archive_path, destination):
+    with zipfile.ZipFile(archive_path) as archive:
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            func(archive, destination)
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de safe_extract_zip")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 64, 256],
+                        help="Tamaños del miembro en MiB")
+    parser.add_argument("--directories", type=int, default=50)
+    parser.add_argument("--files", type=int, default=100, help="Archivos por directorio")
+    args = parser.parse_args()
+
+    print(f"Buffer de streaming: {DEFAULT_BUFFER_SIZE // 1024} KiB")
+    print(f"{'miembro':<18} {'read() pico':>12} {'stream pico':>12} {'read() s':>9} {'stream s':>9}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        for compression, label in ((zipfile.ZIP_STORED, "stored"), (zipfile.ZIP_DEFLATED, "deflated")):
+            for size_mb in args.sizes:
+                archive_path = root / f"{label}-{size_mb}.zip"
+                build_archive(archive_path, size_mb, compression)
+                old_peak, old_time = measure(legacy_extract, archive_path, root / "old")
+                new_peak, new_time = measure(streaming_extract, archive_path, root / "new")
+                print(f"{f'{size_mb} MiB {label}':<18} {old_peak / 2**20:9.1f} MiB {new_peak / 2**20:9.1f} MiB"
+                      f" {old_time:9.2f} {new_time:9.2f}")
+                archive_path.unlink()
+
+    bench_validation(args.directories, args.files)
+
+
+if __name__ == "__main__":
+    main()
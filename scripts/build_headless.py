@@ -9,6 +9,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.resolve()))
 
 from lib.BuildThread import FlangCompiler
+from lib.cancellation import BuildCancelled, cancel_on_sigint
 from lib.projectNameFormatter import ProjectNameFormatter
 
 def main():
@@ -16,6 +17,13 @@ def main():
     parser.add_argument('--project', type=str, default='.', help='Ruta del proyecto')
     parser.add_argument('--output', type=str, default='./dist', help='Carpeta de salida')
     parser.add_argument('--platform', type=str, choices=['Windows', 'Linux'], help='Plataforma objetivo')
+    parser.add_argument('--no-cache', action='store_true', help='Recompilar sin usar la caché de ejecutables')
+    parser.add_argument('--no-artifact-store', action='store_true', help='No reutilizar ni guardar miembros comprimidos del .iflapp entre builds')
+    parser.add_argument('--no-auto-excludes', action='store_true', help='No excluir paquetes pesados sin usar')
+    parser.add_argument('--bundle-mode', choices=['onefile', 'shared'], default='onefile', help='Un ejecutable por script o runtime onedir compartido')
+    parser.add_argument('--compression-level', type=int, choices=range(0, 10), default=6, help='Nivel DEFLATE del .iflapp (0-9)')
+    parser.add_argument('--direct-archive', action='store_true', help='Escribir el .iflapp sin carpeta intermedia')
+    parser.add_argument('--jobs', type=int, default=1, help='Número de scripts a compilar en paralelo')
     
     args = parser.parse_args()
     
@@ -27,8 +35,16 @@ def main():
     print(f"📂 Proyecto: {project_path}")
     print(f"📦 Salida: {output_path}")
     print(f"💻 Plataforma objetivo: {target_platform}")
+    print(f"🧵 Procesos de compilación: {max(1, args.jobs)}")
     
     compiler = FlangCompiler(project_path, output_path, log_callback=print)
+    compiler.jobs = max(1, args.jobs)
+    compiler.use_build_cache = not args.no_cache
+    compiler.use_artifact_store = not args.no_artifact_store
+    compiler.bundle_mode = args.bundle_mode
+    compiler.auto_excludes = not args.no_auto_excludes
+    compiler.compression_level = args.compression_level
+    compiler.direct_archive = args.direct_archive
     
     if not compiler.parse_details_xml():
         print("❌ Error al parsear details.xml")
@@ -38,35 +54,53 @@ def main():
         print("❌ No se encontraron scripts para compilar")
         sys.exit(1)
         
-    print("🔨 Compilando binarios...")
-    if not compiler.compile_binaries(target_platform):
-        print(f"❌ Error en la compilación: {compiler.last_error}")
-        sys.exit(1)
-        
-    print("📦 Creando paquete...")
-    if not compiler.create_package(target_platform):
-        print("❌ Error al crear el paquete")
-        sys.exit(1)
+    try:
+        with cancel_on_sigint(compiler.cancel_token):
+            print("🔨 Compilando binarios...")
+            if not compiler.compile_binaries(target_platform):
+                print(f"❌ Error en la compilación: {compiler.last_error}")
+                sys.exit(1)
         
-    # Usar ProjectNameFormatter para formato consistente
-    publisher = compiler.metadata['publisher']
-    app = compiler.metadata['app']
-    version = compiler.metadata['version']
-    platform_suffix = "Knosthalij" if target_platform == "Windows" else "Danenone"
+            # Usar ProjectNameFormatter para formato consistente
+            publisher = compiler.metadata['publisher']
+            app = compiler.metadata['app']
+            version = compiler.metadata['version']
+            platform_suffix = "Knosthalij" if target_platform == "Windows" else "Danenone"
     
-    package_dir_name = ProjectNameFormatter.format_package_folder(publisher, app, version, platform_suffix)
-    package_path = output_path / package_dir_name
+            package_dir_name = ProjectNameFormatter.format_package_folder(publisher, app, version, platform_suffix)
+            package_path = output_path / package_dir_name
     
-    iflapp_file = output_path / ProjectNameFormatter.format_iflapp_filename(publisher, app, version, platform_suffix)
+            iflapp_file = output_path / ProjectNameFormatter.format_iflapp_filename(publisher, app, version, platform_suffix)
     
-    print(f"🗜️ Comprimiendo a .iflapp: {iflapp_file}")
-    if not compiler.compress_to_iflapp(package_path, iflapp_file):
-        print("❌ Error al comprimir el paquete")
-        sys.exit(1)
+            if compiler.direct_archive:
+                print(f"🗜️ Empaquetando directamente en .iflapp: {iflapp_file}")
+                if not compiler.package_to_iflapp(target_platform, iflapp_file):
+                    print(f"❌ Error al crear el paquete: {compiler.last_error}")
+                    sys.exit(1)
+                compiler.cleanup_processed_project(iflapp_file)
+                compiler.write_profile(iflapp_file)
+                print(f"✨ Proceso completado con éxito: {iflapp_file}")
+                return
+
+            print("📦 Creando paquete...")
+            if not compiler.create_package(target_platform):
+                print("❌ Error al crear el paquete")
+                sys.exit(1)
+        
+            print(f"🗜️ Comprimiendo a .iflapp: {iflapp_file}")
+            if not compiler.compress_to_iflapp(package_path, iflapp_file):
+                print("❌ Error al comprimir el paquete")
+                sys.exit(1)
         
-    compiler._cleanup_package_folder(package_path, iflapp_file)
-    compiler.cleanup_processed_project(iflapp_file)
-    print(f"✨ Proceso completado con éxito: {iflapp_file}")
+            compiler._cleanup_package_folder(package_path, iflapp_file)
+            compiler.cleanup_processed_project(iflapp_file)
+            compiler.write_profile(iflapp_file)
+            print(f"✨ Proceso completado con éxito: {iflapp_file}")
+    except BuildCancelled:
+        # Ctrl+C: el build se detuvo en un punto seguro; 130 = 128 + SIGINT.
+        compiler.handle_cancelled(target_platform)
+        compiler._cleanup_build_artifacts()
+        sys.exit(130)
 
 if __name__ == "__main__":
     main()
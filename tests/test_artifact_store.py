@@ -0,0 +1,94 @@
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+from lib.artifact_store import (
+    MANIFEST_NAME, ArtifactStore, apply_delta, read_manifest, write_delta_package, write_manifest,
+)
+from lib.iflapp_writer import IflappWriter
+
+
+def _write_package(path: Path, files, store=None, version="1.0"):
+    source = path.parent / f"{path.stem}-src"
+    members = []
+    for name, content in files.items():
+        target = source / name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(content)
+        members.append((target, name))
+    with IflappWriter(path, workers=2, store=store) as writer:
+        writer.write_files(members)
+        write_manifest(writer, {"app": "demo", "version": version})
+    return path
+
+
+class ArtifactStoreTests(unittest.TestCase):
+    def test_unchanged_members_come_from_store(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            store = ArtifactStore(root / "cache")
+            docs = b"documentacion " * 2000
+            _write_package(root / "v1.iflapp", {"details.xml": b"<app>1</app>", "docs/readme.txt": docs}, store)
+            self.assertEqual(len(store._objects()), 2)
+
+            hits = []
+            original_get = store.get
+
+            def tracking_get(digest, level):
+                hit = original_get(digest, level)
+                hits.append(hit is not None)
+                return hit
+
+            store.get = tracking_get
+            _write_package(root / "v2.iflapp", {"details.xml": b"<app>2</app>", "docs/readme.txt": docs}, store)
+            # details.xml cambió; la documentación se reutiliza sin recomprimir.
+            self.assertEqual(sorted(hits), [False, True])
+            self.assertEqual(len(store._objects()), 3)
+            with zipfile.ZipFile(root / "v2.iflapp") as archive:
+                self.assertEqual(archive.read("docs/readme.txt"), docs)
+                self.assertIsNone(archive.testzip())
+
+    def test_delta_contains_only_changes_and_rebuilds_full_package(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            lib_blob = bytes(range(256)) * 400
+            base = _write_package(root / "v1.iflapp", {
+                "details.xml": b"<app><version>1</version></app>",
+                "lib/core.bin": lib_blob,
+                "assets/logo.png": b"\x89PNG logo",
+                "old.txt": b"obsoleto",
+            })
+            full = _write_package(root / "v2.iflapp", {
+                "details.xml": b"<app><version>2</version></app>",
+                "lib/core.bin": lib_blob,
+                "assets/logo.png": b"\x89PNG logo nuevo",
+                "new.txt": b"nuevo",
+            }, version="2.0")
+
+            stats = write_delta_package(full, base, root / "v2.delta.iflapp")
+            self.assertEqual(sorted(stats.changed), ["assets/logo.png", "details.xml", "new.txt"])
+            self.assertEqual(stats.removed, ["old.txt"])
+            self.assertLess(stats.delta_bytes, stats.full_bytes)
+            with zipfile.ZipFile(root / "v2.delta.iflapp") as delta:
+                self.assertNotIn("lib/core.bin", delta.namelist())
+            delta_manifest = read_manifest(root / "v2.delta.iflapp")
+            self.assertEqual(delta_manifest["delta"]["base"]["file"], "v1.iflapp")
+            self.assertEqual(delta_manifest["delta"]["base"]["version"], "1.0")
+
+            apply_delta(base, root / "v2.delta.iflapp", root / "rebuilt.iflapp")
+            with zipfile.ZipFile(full) as expected, zipfile.ZipFile(root / "rebuilt.iflapp") as rebuilt:
+                self.assertEqual(sorted(expected.namelist()), sorted(rebuilt.namelist()))
+                for name in expected.namelist():
+                    self.assertEqual(expected.read(name), rebuilt.read(name), name)
+            self.assertEqual(read_manifest(root / "rebuilt.iflapp"), read_manifest(full))
+
+            with self.assertRaises(ValueError):
+                apply_delta(full, root / "v2.delta.iflapp", root / "wrong.iflapp")
+            self.assertFalse((root / "wrong.iflapp").exists())
+            with zipfile.ZipFile(full) as archive:
+                self.assertIn(MANIFEST_NAME, archive.namelist())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from lib.coreUpdater.probe import AssetProber
+
+
+class _ReleaseServer(ThreadingHTTPServer):
+    """Stand-in de GitHub Releases: ``HEAD`` lento, keep-alive y redirecciones."""
+
+    def __init__(self, assets, delays=None, delay=0.3):
+        super().__init__(("127.0.0.1", 0), _ReleaseHandler)
+        self.assets = set(assets)
+        self.delays = delays or {}
+        self.delay = delay
+        self.requests = []
+        self.connections = set()
+        self.lock = threading.Lock()
+
+
+class _ReleaseHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(self.path)
+            server.connections.add(self.client_address)
+        time.sleep(server.delays.get(self.path, server.delay))
+        if self.path.startswith("/redirect/"):
+            self.send_response(302)
+            self.send_header("Location", "/storage/" + self.path.rsplit("/", 1)[-1])
+        elif self.path in server.assets or self.path.startswith("/storage/"):
+            self.send_response(200)
+        else:
+            self.send_response(404)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class AssetProberTests(unittest.TestCase):
+    def _serve(self, assets, delays=None, delay=0.3):
+        server = _ReleaseServer(assets, delays, delay)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server, f"http://127.0.0.1:{server.server_port}"
+
+    def _prober(self, **kwargs):
+        prober = AssetProber(timeout=5, **kwargs)
+        self.addCleanup(prober.shutdown)
+        return prober
+
+    def test_candidates_are_probed_concurrently(self):
+        server, base = self._serve({"/c5.exe"})
+        urls = [f"{base}/c{i}.exe" for i in range(7)]
+        started = time.monotonic()
+        self.assertEqual(self._prober().first_existing(urls), f"{base}/c5.exe")
+        # Siete HEAD de 0.3 s en serie serían más de 2 s.
+        self.assertLess(time.monotonic() - started, 1.5)
+
+    def test_first_hit_follows_priority_not_speed(self):
+        _, base = self._serve({"/slow.exe", "/fast.exe"}, {"/slow.exe": 0.6, "/fast.exe": 0.0})
+        urls = [f"{base}/missing.exe", f"{base}/slow.exe", f"{base}/fast.exe"]
+        self.assertEqual(self._prober().first_existing(urls), f"{base}/slow.exe")
+
+    def test_results_are_cached_with_ttl(self):
+        server, base = self._serve({"/app.iflapp"})
+        prober = self._prober(ttl=60, negative_ttl=0)
+        self.assertTrue(prober.exists(f"{base}/app.iflapp"))
+        self.assertFalse(prober.exists(f"{base}/missing.iflapp"))
+        self.assertTrue(prober.exists(f"{base}/app.iflapp"))
+        self.assertFalse(prober.exists(f"{base}/missing.iflapp"))
+        # El acierto sale de caché; el fallo caducó (TTL 0) y se vuelve a consultar.
+        self.assertEqual(server.requests.count("/app.iflapp"), 1)
+        self.assertEqual(server.requests.count("/missing.iflapp"), 2)
+
+    def test_prefetch_is_shared_with_later_lookup(self):
+        server, base = self._serve({"/app.iflapp"})
+        prober = self._prober()
+        self.assertIsNone(prober.first_existing([f"{base}/a.exe"], prefetch=[f"{base}/app.iflapp"]))
+        self.assertTrue(prober.exists(f"{base}/app.iflapp"))
+        self.assertEqual(server.requests.count("/app.iflapp"), 1)
+
+    def test_connections_are_reused_and_redirects_followed(self):
+        server, base = self._serve(set(), delay=0)
+        prober = self._prober(max_workers=1)
+        for name in ("a.exe", "b.exe", "c.exe"):
+            self.assertTrue(prober.exists(f"{base}/redirect/{name}"))
+        self.assertEqual(len(server.requests), 6)
+        self.assertEqual(len(server.connections), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
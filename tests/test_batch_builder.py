@@ -0,0 +1,159 @@
+import multiprocessing.dummy
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from lib import batch_builder
+from lib.BuildThread import FlangCompiler
+from lib.batch_builder import BatchBuilder, BatchState, format_batch_summary
+from lib.cancellation import BuildCancelled
+
+
+class BatchBuilderTests(unittest.TestCase):
+    def _projects(self, base: Path, names):
+        for name in names:
+            project = base / name
+            project.mkdir(parents=True)
+            (project / "details.xml").write_text("<app />", encoding="utf-8")
+            (project / "main.py").write_text("print('ok')\n", encoding="utf-8")
+        return [base / name for name in names]
+
+    def test_changed_projects_are_scheduled_first_then_longest(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            fast, slow, edited = self._projects(root / "base", ["fast", "slow", "edited"])
+            state = BatchState(root / "state.json")
+            builder = BatchBuilder(root / "base", root / "out", state=state)
+            _, fingerprints = builder.plan([fast, slow, edited])
+            for project, duration in ((fast, 5.0), (slow, 90.0), (edited, 1.0)):
+                state.record(batch_builder.BatchResult(project, True, duration), fingerprints[project])
+            (edited / "main.py").write_text("print('nuevo')\n", encoding="utf-8")
+
+            heap, _ = builder.plan(builder.discover())
+            order = [Path(batch_builder.heapq.heappop(heap)[1]).name for _ in range(3)]
+            self.assertEqual(order, ["edited", "slow", "fast"])
+
+            builder.only_changed = True
+            heap, _ = builder.plan(builder.discover())
+            self.assertEqual([Path(item[1]).name for item in heap], ["edited"])
+
+    def test_build_generated_files_do_not_mark_project_changed(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            (project,) = self._projects(root / "base", ["demo"])
+            (project / "app").mkdir()
+            (project / "app" / "app-icon.ico").write_bytes(b"ico")
+            state = BatchState(root / "state.json")
+            builder = BatchBuilder(root / "base", root / "out", state=state, only_changed=True)
+            _, fingerprints = builder.plan(builder.discover())
+            state.record(batch_builder.BatchResult(project, True, 1.0), fingerprints[project])
+
+            # Lo que escribe un build en el proyecto: marcadores, icono PNG y .spec.
+            compiler = FlangCompiler(project, root / "out")
+            compiler._prepare_pyinstaller_data_dirs()
+            (project / "app" / "app-icon.png").write_bytes(b"png")
+            (project / "main.spec").write_text("# spec", encoding="utf-8")
+
+            heap, _ = builder.plan(builder.discover())
+            self.assertEqual(heap, [])
+
+            (project / "main.py").write_text("print('editado')\n", encoding="utf-8")
+            heap, _ = builder.plan(builder.discover())
+            self.assertEqual([Path(item[1]).name for item in heap], ["demo"])
+
+    def test_parallel_batch_reports_every_project(self):
+        def fake_run(compiler, build_mode="portable"):
+            if compiler.repo_path.name == "broken":
+                compiler.last_error = "details.xml inválido"
+                return None
+            artifact = compiler.output_path / f"{compiler.repo_path.name}.iflapp"
+            artifact.write_bytes(b"PK")
+            return artifact
+
+        logs = []
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            self._projects(root / "base", ["alpha", "beta", "broken"])
+            builder = BatchBuilder(
+                root / "base", root / "out", jobs=2,
+                state=BatchState(root / "state.json"), log_callback=logs.append,
+            )
+            with patch.object(batch_builder._CTX, "Pool", multiprocessing.dummy.Pool):
+                with patch.object(FlangCompiler, "run", fake_run):
+                    results = builder.run()
+            state = BatchState(root / "state.json")
+
+        by_name = {result.project.name: result for result in results}
+        self.assertEqual(set(by_name), {"alpha", "beta", "broken"})
+        self.assertTrue(by_name["alpha"].ok)
+        self.assertFalse(by_name["broken"].ok)
+        self.assertEqual(by_name["broken"].error, "details.xml inválido")
+        self.assertEqual(len(state.entries), 3)
+
+        summary = format_batch_summary(results)
+        self.assertIn("alpha.iflapp", summary)
+        self.assertIn("details.xml inválido", summary)
+        self.assertTrue(summary.endswith("s de compilación acumulada"))
+        self.assertIn("2 correctos, 1 fallidos", summary)
+
+    def test_cancelling_parallel_batch_terminates_pool(self):
+        started = threading.Event()
+        builders = []
+
+        def hanging_run(compiler, build_mode="portable"):
+            # Lo que deja un build a medias: PyInstaller y el paquete sin terminar.
+            compiler.parse_details_xml()
+            (compiler.repo_path / "build").mkdir()
+            (compiler.repo_path / "dist").mkdir()
+            partial = compiler.output_path / "acme.{0}.v1.0-26.01-10.00-Danenone".format(compiler.metadata["app"])
+            partial.mkdir(parents=True)
+            partial.with_name(partial.name + ".iflapp.part").write_bytes(b"PK")
+            # Los hilos del pool de prueba no se pueden matar: salen al cancelar.
+            started.set()
+            builders[0].cancel_token.wait(10)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            for project in self._projects(root / "base", ["alpha", "beta", "gamma"]):
+                (project / "details.xml").write_text(
+                    f"<app><publisher>acme</publisher><app>{project.name}</app>"
+                    "<version>v1.0-26.01-10.00</version></app>", encoding="utf-8")
+            builder = BatchBuilder(
+                root / "base", root / "out", jobs=2,
+                state=BatchState(root / "state.json"), log_callback=lambda msg: None,
+            )
+            builders.append(builder)
+            threading.Thread(target=lambda: started.wait(10) and builder.cancel_token.cancel(), daemon=True).start()
+            with patch.object(batch_builder._CTX, "Pool", multiprocessing.dummy.Pool):
+                with patch.object(FlangCompiler, "run", hanging_run):
+                    with self.assertRaises(BuildCancelled):
+                        builder.run()
+            self.assertEqual(BatchState(root / "state.json").entries, {})
+            # Los proyectos en curso quedan limpios aunque el worker no llegara a su finally.
+            leftovers = [p.name for p in (root / "base").rglob("*") if p.name in ("build", "dist")]
+            self.assertEqual(leftovers, [])
+            self.assertEqual(list((root / "out").iterdir()), [])
+
+    def test_cancelled_sequential_batch_stops_before_next_project(self):
+        calls = []
+
+        def cancelling_run(compiler, build_mode="portable"):
+            calls.append(compiler.repo_path.name)
+            compiler.cancel_token.cancel()
+            return None
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            self._projects(root / "base", ["alpha", "beta"])
+            builder = BatchBuilder(root / "base", root / "out", state=BatchState(root / "state.json"),
+                                   log_callback=lambda msg: None)
+            with patch.object(FlangCompiler, "run", cancelling_run):
+                with self.assertRaises(BuildCancelled):
+                    builder.run()
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from lib.BuildThread import FlangCompiler
+from lib.build_cache import BuildCache, ProjectWorkpath
+from lib.import_graph import ImportGraph
+
+
+class BuildCacheTests(unittest.TestCase):
+    def test_key_follows_local_imports(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            (root / "lib").mkdir()
+            (root / "lib" / "__init__.py").write_text("", encoding="utf-8")
+            (root / "lib" / "helper.py").write_text("VALUE = 1\n", encoding="utf-8")
+            script = root / "main.py"
+            script.write_text("import os\nfrom lib import helper\n", encoding="utf-8")
+            cache = BuildCache(root / "cache")
+
+            imports = ImportGraph([root, root / "lib"]).analyze(script).local_modules
+            self.assertIn((root / "lib" / "helper.py").resolve(), imports)
+            first = cache.compute_key(script, local_imports=imports)
+            self.assertEqual(first, cache.compute_key(script, local_imports=imports))
+
+            (root / "lib" / "helper.py").write_text("VALUE = 2\n", encoding="utf-8")
+            self.assertNotEqual(first, cache.compute_key(script, local_imports=imports))
+
+    def test_eviction_removes_least_recently_used_entries(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            cache = BuildCache(root / "cache", max_bytes=150)
+            for index, key in enumerate(("aa" * 32, "bb" * 32)):
+                exe = root / f"app{index}"
+                exe.write_bytes(b"x" * 100)
+                cache.put(key, exe)
+                marker = cache._entry_dir(key) / ".last-used"
+                stamp = time.time() - 100 + index
+                os.utime(marker, (stamp, stamp))
+
+            self.assertIsNone(cache.get("aa" * 32, "app0"))
+            self.assertIsNotNone(cache.get("bb" * 32, "app1"))
+            self.assertLessEqual(cache.size(), 150)
+
+    def test_compile_binary_reuses_cached_executable(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            source = root / "project"
+            source.mkdir()
+            (source / "details.xml").write_text("<app />", encoding="utf-8")
+            (source / "main.py").write_text("print('hola')\n", encoding="utf-8")
+            compiler = FlangCompiler(source, root / "output")
+            compiler.metadata = {"app": "main"}
+            compiler._build_cache = BuildCache(root / "cache")
+            script = {"name": "main", "path": source / "main.py", "icon": None, "is_main": True}
+
+            def fake_compile_to_exe(**kwargs):
+                exe = Path(kwargs["output_dir"]) / "main"
+                exe.write_bytes(b"binary")
+                return str(exe)
+
+            pyi = MagicMock()
+            pyi.is_available.return_value = True
+            pyi.get_version.return_value = "6.0"
+            pyi.compile_to_exe.side_effect = fake_compile_to_exe
+            with patch("lib.BuildThread.get_pyinstaller", return_value=pyi), \
+                    patch("lib.BuildThread.sys.platform", "linux"), \
+                    patch.dict(os.environ, {"PACKAGEMAKER_CACHE_DIR": str(root / "cache")}):
+                self.assertTrue(compiler._compile_binary(script, windowed=False))
+                (source / "dist" / "main").unlink()
+                self.assertTrue(compiler._compile_binary(script, windowed=False))
+                self.assertEqual(pyi.compile_to_exe.call_count, 1)
+                self.assertEqual((source / "dist" / "main").read_bytes(), b"binary")
+
+                compiler.use_build_cache = False
+                self.assertTrue(compiler._compile_binary(script, windowed=False))
+                self.assertEqual(pyi.compile_to_exe.call_count, 2)
+
+    def test_cache_key_uses_version_of_the_backend_that_builds(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            source = root / "project"
+            source.mkdir()
+            (source / "main.py").write_text("print('hola')\n", encoding="utf-8")
+            script = {"name": "main", "path": source / "main.py", "icon": None, "is_main": True}
+            backends = {"embedded": MagicMock(), "subprocess": MagicMock()}
+            backends["embedded"].get_version.return_value = "5.0"
+            backends["subprocess"].get_version.return_value = "6.0"
+
+            def fingerprint(compiler):
+                compiler._build_cache = MagicMock()
+                with patch("lib.BuildThread.get_pyinstaller", side_effect=lambda backend="embedded": backends[backend]):
+                    compiler._build_cache_key(script, [], [], windowed=False)
+                    environment = compiler._get_environment_fingerprint()
+                return compiler._build_cache.compute_key.call_args.kwargs["pyinstaller_version"], environment
+
+            compiler = FlangCompiler(source, root / "output")
+            compiler.pyinstaller_backend = "subprocess"
+            version, environment = fingerprint(compiler)
+            self.assertEqual(version, "6.0")
+
+            embedded = FlangCompiler(source, root / "output")
+            embedded.pyinstaller_backend = "embedded"
+            self.assertNotEqual(fingerprint(embedded), (version, environment))
+
+    def test_workpath_is_reused_until_fingerprint_changes(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            workpath = ProjectWorkpath(root / "project", root=root / "cache")
+
+            self.assertFalse(workpath.prepare("main", "deps-1"))
+            (workpath.script_dir("main") / "Analysis-00.toc").parent.mkdir(parents=True)
+            (workpath.script_dir("main") / "Analysis-00.toc").write_text("toc", encoding="utf-8")
+            self.assertIsNone(workpath.commit("main", "deps-1", 40.0, warm=False))
+
+            self.assertTrue(workpath.prepare("main", "deps-1"))
+            self.assertAlmostEqual(workpath.commit("main", "deps-1", 10.0, warm=True), 30.0)
+
+            self.assertFalse(workpath.prepare("main", "deps-2"))
+            self.assertFalse((workpath.script_dir("main") / "Analysis-00.toc").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from lib.BuildThread import FlangCompiler
+from lib.cancellation import BuildCancelled, CancellationToken
+from lib.iflapp_writer import IflappWriter
+
+
+class CancellationTokenTests(unittest.TestCase):
+    def test_callbacks_run_once_and_only_while_registered(self):
+        token = CancellationToken()
+        calls = []
+        with token.on_cancel(lambda: calls.append("pyinstaller")):
+            pass
+        with token.on_cancel(lambda: calls.append("pool")):
+            token.cancel()
+            token.cancel()
+        self.assertEqual(calls, ["pool"])
+        with token.on_cancel(lambda: calls.append("tarde")):
+            pass
+        self.assertEqual(calls, ["pool", "tarde"])
+        with self.assertRaises(BuildCancelled):
+            token.raise_if_cancelled()
+
+    def test_writer_discards_partial_archive_when_cancelled(self):
+        token = CancellationToken()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            members = []
+            for index in range(20):
+                path = root / f"file{index}.txt"
+                path.write_text("contenido\n" * 100, encoding="utf-8")
+                members.append((path, path.name))
+
+            def progress(name, size):
+                if name == "file3.txt":
+                    token.cancel()
+
+            output = root / "app.iflapp"
+            with self.assertRaises(BuildCancelled):
+                with IflappWriter(output, workers=2, progress=progress, cancel_token=token) as writer:
+                    writer.write_files(members)
+            self.assertFalse(output.exists())
+            self.assertFalse(output.with_name("app.iflapp.part").exists())
+
+
+class CancelledBuildTests(unittest.TestCase):
+    def test_run_stops_between_scripts_and_cleans_up(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            source = root / "project"
+            source.mkdir()
+            (source / "details.xml").write_text(
+                "<app><publisher>Acme</publisher><app>demo</app>"
+                "<version>v1.0-26.08-15.38</version><platform>Danenone</platform></app>",
+                encoding="utf-8",
+            )
+            (source / "demo.py").write_text("print('ok')\n", encoding="utf-8")
+            (source / "helper.py").write_text("print('helper')\n", encoding="utf-8")
+            logs = []
+            compiler = FlangCompiler(source, root / "output", log_callback=logs.append)
+            compiler.current_platform = "Linux"
+            compiler.use_build_cache = False
+
+            def fake_compile_to_exe(**kwargs):
+                exe = Path(kwargs["output_dir"]) / kwargs["output_name"]
+                exe.write_bytes(b"\x7fELF")
+                # El usuario cancela mientras se compila el primer script.
+                compiler.cancel()
+                return str(exe)
+
+            pyi = MagicMock()
+            pyi.is_available.return_value = True
+            pyi.get_version.return_value = "6.0"
+            pyi.compile_to_exe.side_effect = fake_compile_to_exe
+            with patch("lib.BuildThread.get_pyinstaller", return_value=pyi), \
+                    patch("lib.BuildThread.sys.platform", "linux"), \
+                    patch.dict(os.environ, {"PACKAGEMAKER_CACHE_DIR": str(root / "cache")}):
+                result = compiler.run()
+
+            self.assertIsNone(result)
+            self.assertEqual(pyi.compile_to_exe.call_count, 1)
+            pyi.cancel.assert_called_once()
+            self.assertEqual(compiler.last_error, "Build cancelado por el usuario.")
+            self.assertFalse((source / "dist").exists())
+            self.assertEqual(list((root / "output").glob("*.iflapp*")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
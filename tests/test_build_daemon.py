@@ -0,0 +1,61 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from lib.build_daemon import BuildDaemon, DaemonClient, daemon_info_path
+
+
+class BuildDaemonTests(unittest.TestCase):
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        env = patch.dict(os.environ, {"PACKAGEMAKER_CACHE_DIR": cache_dir.name})
+        env.start()
+        self.addCleanup(env.stop)
+
+    def _start(self) -> DaemonClient:
+        daemon = BuildDaemon(workers=1, log_callback=lambda message: None)
+        thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join, 10)
+        self.addCleanup(daemon.stop)
+        deadline = time.time() + 60
+        while time.time() < deadline:
+            client = DaemonClient.connect()
+            if client:
+                return client
+            time.sleep(0.1)
+        self.fail("El daemon no arrancó a tiempo")
+
+    def test_build_streams_logs_and_result_from_warm_worker(self):
+        client = self._start()
+        self.assertEqual(client.status()["workers"], 1)
+
+        logs = []
+        with tempfile.TemporaryDirectory() as temp_dir:
+            project = Path(temp_dir) / "project"
+            project.mkdir()
+            result = client.build(project, Path(temp_dir) / "out", log_callback=logs.append)
+            # El mismo worker atiende el siguiente trabajo.
+            second = client.build(project, Path(temp_dir) / "out")
+
+        self.assertFalse(result["ok"])
+        self.assertFalse(second["ok"])
+        self.assertTrue(any("No details.xml found" in line for line in logs))
+
+        client.shutdown()
+        deadline = time.time() + 10
+        while daemon_info_path().exists() and time.time() < deadline:
+            time.sleep(0.05)
+        self.assertIsNone(DaemonClient.connect())
+
+    def test_connect_returns_none_without_daemon(self):
+        self.assertIsNone(DaemonClient.connect())
+
+
+if __name__ == "__main__":
+    unittest.main()
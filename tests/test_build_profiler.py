@@ -0,0 +1,76 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from lib.BuildThread import FlangCompiler
+from lib.build_profiler import BuildProfiler, summary_rows_from_trace, trace_path_for
+
+
+class BuildProfilerTests(unittest.TestCase):
+    def test_nested_phases_export_as_chrome_trace(self):
+        profiler = BuildProfiler()
+        with profiler.phase("compile_binaries"):
+            with profiler.phase("compile_binary", script="main") as args:
+                args["ok"] = True
+                bytearray(1024 * 1024)
+
+        trace = profiler.to_chrome_trace({"project": "demo"})
+        self.assertEqual([event["name"] for event in trace["traceEvents"]], ["compile_binaries", "compile_binary"])
+        inner = trace["traceEvents"][1]
+        self.assertEqual(inner["ph"], "X")
+        self.assertEqual(inner["args"]["script"], "main")
+        self.assertTrue(inner["args"]["ok"])
+        self.assertEqual(trace["otherData"]["project"], "demo")
+
+        rows = summary_rows_from_trace(trace)
+        self.assertEqual(rows[1][0], "  compile_binary [main]")
+        table = profiler.format_table().splitlines()
+        self.assertTrue(table[0].startswith("Fase"))
+        self.assertEqual(len(table), 4)
+
+    def test_merge_keeps_worker_phases_under_parent(self):
+        worker = BuildProfiler()
+        with worker.phase("compile_binary", script="updater"):
+            pass
+        parent = BuildProfiler()
+        with parent.phase("compile_binaries"):
+            origin, records = worker.export_records()
+            parent.merge(json.loads(json.dumps(records)), origin=origin, depth=parent.depth)
+
+        merged = next(record for record in parent.records if record.name == "compile_binary")
+        self.assertEqual(merged.depth, 1)
+        self.assertEqual(merged.args["script"], "updater")
+
+    def test_build_writes_trace_next_to_iflapp(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            source = root / "project"
+            source.mkdir()
+            (source / "details.xml").write_text(
+                "<app><publisher>Acme</publisher><app>main</app>"
+                "<version>v1.0-26.08-15.38</version><platform>Danenone</platform></app>",
+                encoding="utf-8",
+            )
+            (source / "main.py").write_text("print('ok')\n", encoding="utf-8")
+            (source / "dist").mkdir()
+            (source / "dist" / "main").write_bytes(b"\x7fELF")
+            logs = []
+            compiler = FlangCompiler(source, root / "output", log_callback=logs.append)
+            self.assertTrue(compiler.parse_details_xml())
+            self.assertTrue(compiler.find_scripts())
+            iflapp = root / "output" / "demo.iflapp"
+            self.assertTrue(compiler.package_to_iflapp("Linux", iflapp))
+
+            trace_path = compiler.write_profile(iflapp)
+            self.assertEqual(trace_path, trace_path_for(iflapp))
+            trace = json.loads(trace_path.read_text(encoding="utf-8"))
+
+        names = [event["name"] for event in trace["traceEvents"]]
+        self.assertEqual(names, ["parse_details_xml", "find_scripts", "package_to_iflapp"])
+        self.assertEqual(trace["otherData"]["artifact"], "demo.iflapp")
+        self.assertTrue(any(line.strip().startswith("package_to_iflapp") for line in logs))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+import functools
+import os
+import tempfile
+import threading
+import unittest
+import zipfile
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+from lib.artifact_store import MANIFEST_NAME, read_manifest, write_delta_package, write_manifest
+from lib.coreUpdater.delta import DeltaUpdateError, delta_url_for, fetch_delta
+from lib.iflapp_writer import IflappWriter
+from lib.safe_zip import safe_extract_zip
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def _write_package(path: Path, files, version):
+    source = path.parent / f"{path.stem}-src"
+    members = []
+    for name, content in files.items():
+        target = source / name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(content)
+        members.append((target, name))
+    with IflappWriter(path, workers=2) as writer:
+        writer.write_files(members)
+        write_manifest(writer, {"app": "demo", "version": version})
+    return path
+
+
+V1 = {
+    "details.xml": b"<app><version>1.0</version></app>",
+    "demo.bin": bytes(range(256)) * 200,
+    "assets/logo.png": b"\x89PNG logo",
+    "old.txt": b"obsoleto",
+}
+V2 = {
+    "details.xml": b"<app><version>2.0</version></app>",
+    "demo.bin": bytes(range(256)) * 200,
+    "assets/logo.png": b"\x89PNG logo nuevo",
+    "new.txt": b"nuevo",
+}
+
+
+class DeltaUpdateTests(unittest.TestCase):
+    def setUp(self):
+        self._temp = tempfile.TemporaryDirectory()
+        self.root = Path(self._temp.name)
+        # Releases publicadas: paquete completo v2 y su delta frente a v1.
+        self.releases = self.root / "releases"
+        self.releases.mkdir()
+        base = _write_package(self.root / "Demo-1.0.iflapp", V1, "1.0")
+        full = _write_package(self.releases / "Demo-2.0.iflapp", V2, "2.0")
+        write_delta_package(full, base, self.releases / "Demo-2.0.delta.iflapp")
+
+        self.install = self.root / "install"
+        with zipfile.ZipFile(base) as archive:
+            safe_extract_zip(archive, self.install)
+
+        handler = functools.partial(_QuietHandler, directory=str(self.releases))
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/Demo-2.0.iflapp"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self._temp.cleanup()
+
+    def _installed(self):
+        return {
+            path.relative_to(self.install).as_posix(): path.read_bytes()
+            for path in self.install.rglob("*") if path.is_file()
+        }
+
+    def test_delta_patches_install_in_place(self):
+        self.assertTrue(delta_url_for(self.url).endswith("/Demo-2.0.delta.iflapp"))
+        plan = fetch_delta(self.url, self.install)
+        self.assertEqual(sorted(plan.files), ["assets/logo.png", "details.xml", "new.txt"])
+        self.assertEqual(plan.removed, ["old.txt"])
+        delta_section = read_manifest(self.releases / "Demo-2.0.delta.iflapp")["delta"]
+        self.assertEqual(delta_section["added"], ["new.txt"])
+        self.assertEqual(delta_section["changed"], ["assets/logo.png", "details.xml"])
+        # Verificar no toca la instalación.
+        self.assertEqual(self._installed()["assets/logo.png"], V1["assets/logo.png"])
+
+        plan.apply()
+        installed = self._installed()
+        manifest = installed.pop(MANIFEST_NAME)
+        self.assertEqual(installed, V2)
+        self.assertNotIn(b'"delta"', manifest)
+        with zipfile.ZipFile(self.releases / "Demo-2.0.iflapp") as full:
+            self.assertEqual(manifest, full.read(MANIFEST_NAME))
+
+    def test_running_binary_is_moved_aside_and_replaced(self):
+        plan = fetch_delta(self.url, self.install)
+        running = self.install / "assets" / "logo.png"
+        with mock.patch("sys.argv", [str(running)]):
+            plan.apply()
+        self.assertEqual(running.read_bytes(), V2["assets/logo.png"])
+        aside = [path for path in running.parent.iterdir() if path.name.startswith("logo.png.old.")]
+        self.assertEqual([path.read_bytes() for path in aside], [V1["assets/logo.png"]])
+
+    def test_failed_apply_keeps_base_manifest(self):
+        old_manifest = (self.install / MANIFEST_NAME).read_bytes()
+        plan = fetch_delta(self.url, self.install)
+        real_replace = os.replace
+
+        def locked(src, dst):
+            if Path(dst).name == "logo.png":
+                raise PermissionError("en uso")
+            return real_replace(src, dst)
+
+        with mock.patch("os.replace", side_effect=locked), mock.patch("os.rename", side_effect=OSError("en uso")):
+            with self.assertRaises(DeltaUpdateError):
+                plan.apply()
+        # Sin todos los archivos aplicados no se registra la versión nueva.
+        self.assertEqual((self.install / MANIFEST_NAME).read_bytes(), old_manifest)
+        self.assertFalse(plan.staging_dir.exists())
+
+    def test_locally_modified_file_forces_full_package(self):
+        (self.install / "demo.bin").write_bytes(b"parcheado a mano")
+        before = self._installed()
+        with self.assertRaises(DeltaUpdateError):
+            fetch_delta(self.url, self.install)
+        self.assertEqual(self._installed(), before)
+
+    def test_tampered_delta_is_rejected(self):
+        delta = self.releases / "Demo-2.0.delta.iflapp"
+        with zipfile.ZipFile(delta) as archive:
+            contents = {name: archive.read(name) for name in archive.namelist()}
+        contents["new.txt"] = b"manipulado"
+        with zipfile.ZipFile(delta, "w") as archive:
+            for name, data in contents.items():
+                archive.writestr(name, data)
+
+        before = self._installed()
+        with self.assertRaises(DeltaUpdateError):
+            fetch_delta(self.url, self.install)
+        self.assertEqual(self._installed(), before)
+
+    def test_missing_delta_is_reported(self):
+        (self.releases / "Demo-2.0.delta.iflapp").unlink()
+        with self.assertRaises(DeltaUpdateError):
+            fetch_delta(self.url, self.install)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import shutil
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest.mock import patch
+
+from lib.BuildThread import FlangCompiler
+
+
+class DirectArchiveTests(unittest.TestCase):
+    def _compiler(self, root: Path) -> FlangCompiler:
+        source = root / "project"
+        (source / "app").mkdir(parents=True)
+        (source / "assets" / "icons").mkdir(parents=True)
+        (source / "config").mkdir()
+        (source / "logs").mkdir()
+        (source / "details.xml").write_text(
+            "<app><publisher>Acme</publisher><app>main</app>"
+            "<version>v1.0-26.08-15.38</version><platform>AlphaCube</platform></app>",
+            encoding="utf-8",
+        )
+        (source / ".gitignore").write_text("logs\n*.log\nconfig\n", encoding="utf-8")
+        (source / "main.py").write_text("print('ok')\n", encoding="utf-8")
+        (source / "app" / "app-icon.ico").write_bytes(b"ico")
+        (source / "app" / "debug.log").write_text("x", encoding="utf-8")
+        (source / "assets" / "icons" / "a.png").write_bytes(b"png")
+        (source / "config" / "settings.json").write_text("{}", encoding="utf-8")
+        (source / "config" / "local.json").write_text("{}", encoding="utf-8")
+        (source / "logs" / "run.txt").write_text("x", encoding="utf-8")
+        (source / "dist").mkdir()
+        (source / "dist" / "main").write_bytes(b"\x7fELF binary")
+        (source / "dist" / "app").write_bytes(b"\x7fELF binary")
+
+        compiler = FlangCompiler(source, root / "output")
+        compiler.parse_details_xml()
+        compiler.find_scripts()
+        return compiler
+
+    def test_archive_matches_folder_based_package(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            compiler = self._compiler(root)
+            self.assertTrue(compiler.create_package("Linux"))
+            package = next(p for p in (root / "output").iterdir() if p.is_dir())
+            self.assertTrue(compiler.compress_to_iflapp(package, root / "folder.iflapp"))
+            shutil.rmtree(package)
+
+            self.assertTrue(compiler.package_to_iflapp("Linux", root / "direct.iflapp"))
+            self.assertEqual([p for p in (root / "output").iterdir() if p.is_dir()], [])
+
+            with zipfile.ZipFile(root / "folder.iflapp") as folder, \
+                    zipfile.ZipFile(root / "direct.iflapp") as direct:
+                self.assertEqual(sorted(folder.namelist()), sorted(direct.namelist()))
+                for name in folder.namelist():
+                    self.assertEqual(folder.read(name), direct.read(name), name)
+                names = set(direct.namelist())
+                self.assertIn("<platform>Danenone</platform>", direct.read("details.xml").decode())
+                mode = direct.getinfo("main").external_attr >> 16
+                self.assertTrue(mode & 0o111)
+
+        self.assertIn("config/settings.json", names)
+        self.assertIn("bin/app", names)
+        self.assertIn("app/app-icon.ico", names)
+        self.assertNotIn("config/local.json", names)
+        self.assertNotIn("app/debug.log", names)
+        self.assertNotIn("logs/run.txt", names)
+        self.assertNotIn("main.py", names)
+
+    def test_artifact_store_can_be_disabled(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            compiler = self._compiler(root)
+            compiler.use_artifact_store = False
+            with patch("lib.BuildThread.ArtifactStore") as store:
+                self.assertTrue(compiler.package_to_iflapp("Linux", root / "direct.iflapp"))
+            store.assert_not_called()
+            with zipfile.ZipFile(root / "direct.iflapp") as archive:
+                self.assertIn("bin/app", archive.namelist())
+
+    def test_missing_binary_aborts_without_leaving_an_archive(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            compiler = self._compiler(root)
+            (compiler.repo_path / "dist" / "main").unlink()
+            output = root / "direct.iflapp"
+            self.assertFalse(compiler.package_to_iflapp("Linux", output))
+            self.assertFalse(output.exists())
+            self.assertIn("binarios", compiler.last_error)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from lib.coreUpdater.core import cache_clear, cache_get, cache_set, cache_staging_path
+from lib.download_cache import DownloadCache
+
+
+class DownloadCacheTests(unittest.TestCase):
+    def test_put_moves_file_without_copying(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = DownloadCache(Path(temp_dir))
+            staged = cache.staging_path("exe_download_https://x/App-Setup.exe", "App-Setup.exe")
+            staged.write_bytes(b"MZ" * 1000)
+            inode = staged.stat().st_ino
+
+            cached = cache.put("exe_download_https://x/App-Setup.exe", staged)
+            self.assertEqual(cached.name, "App-Setup.exe")
+            self.assertEqual(cached.stat().st_ino, inode)
+            self.assertFalse(staged.exists())
+            self.assertEqual(cache.get("exe_download_https://x/App-Setup.exe"), cached)
+            self.assertIsNone(cache.get("exe_download_https://x/otro.exe"))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = DownloadCache(Path(temp_dir), max_bytes=2500)
+            cache.put("a", b"a" * 1000)
+            cache.put("b", b"b" * 1000)
+            old = time.time() - 60
+            for key in ("a", "b"):
+                marker = cache.get(key).parent / ".last-used"
+                os.utime(marker, (old, old))
+            cache.get("a")  # "a" pasa a ser la más reciente.
+            cache.put("c", b"c" * 1000)
+
+            self.assertIsNotNone(cache.get("a"))
+            self.assertIsNone(cache.get("b"))
+            self.assertIsNotNone(cache.get("c"))
+            self.assertLessEqual(cache.size(), 2500)
+
+    def test_entry_larger_than_limit_is_kept_until_next_put(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = DownloadCache(Path(temp_dir), max_bytes=100)
+            path = cache.put("grande", b"x" * 1000)
+            self.assertTrue(path.is_file())
+
+    def test_updater_cache_functions_use_disk(self):
+        with tempfile.TemporaryDirectory() as temp_dir, \
+                patch.dict(os.environ, {"PACKAGEMAKER_CACHE_DIR": temp_dir}):
+            staged = cache_staging_path("clave", "setup.exe")
+            staged.write_bytes(b"MZ")
+            cached = cache_set("clave", staged)
+            self.assertTrue(str(cached).startswith(temp_dir))
+            self.assertEqual(cache_get("clave"), cached)
+            cache_clear()
+            self.assertIsNone(cache_get("clave"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+import hashlib
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from lib.downloader import (
+    ChecksumMismatch, DownloadCancelled, DownloadError, download_file, fetch_checksum, partial_path,
+)
+
+PAYLOAD = bytes(range(256)) * 4096  # 1 MiB
+
+
+class _FlakyServer(ThreadingHTTPServer):
+    """Sirve ``PAYLOAD`` y corta la conexión a mitad de las primeras respuestas."""
+
+    def __init__(self, disconnects=0, ranges=True):
+        super().__init__(("127.0.0.1", 0), _FlakyHandler)
+        self.disconnects = disconnects
+        self.ranges = ranges
+        self.requests = []
+        self.lock = threading.Lock()
+
+
+class _FlakyHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        range_header = self.headers.get("Range")
+        with server.lock:
+            server.requests.append(range_header)
+            cut = server.disconnects > 0
+            server.disconnects -= 1
+        if self.path == "/app.bin.sha256":
+            body = f"{hashlib.sha256(PAYLOAD).hexdigest()}  app.bin\n".encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if self.path != "/app.bin":
+            self.send_error(404)
+            return
+
+        start = 0
+        if range_header and server.ranges:
+            start = int(range_header.split("=")[1].rstrip("-"))
+            if start >= len(PAYLOAD):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(PAYLOAD)}")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(PAYLOAD) - 1}/{len(PAYLOAD)}")
+        else:
+            self.send_response(200)
+        body = PAYLOAD[start:]
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if cut:
+            # Desconexión inyectada: se envía un tercio y se cierra el socket.
+            self.wfile.write(body[: len(body) // 3])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+class DownloaderTests(unittest.TestCase):
+    def _serve(self, **kwargs):
+        server = _FlakyServer(**kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        temp = tempfile.TemporaryDirectory()
+        self.addCleanup(temp.cleanup)
+        return server, f"http://127.0.0.1:{server.server_port}", Path(temp.name)
+
+    def test_resumes_after_disconnects_with_range_requests(self):
+        server, base, root = self._serve(disconnects=2)
+        updates = []
+        target = download_file(
+            f"{base}/app.bin", root / "app.bin",
+            sha256=hashlib.sha256(PAYLOAD).hexdigest(),
+            progress=updates.append, backoff=0,
+        )
+        self.assertEqual(target.read_bytes(), PAYLOAD)
+        self.assertFalse(partial_path(target).exists())
+        self.assertEqual(len(server.requests), 3)
+        self.assertIsNone(server.requests[0])
+        first_cut = len(PAYLOAD) // 3
+        self.assertEqual(server.requests[1], f"bytes={first_cut}-")
+        self.assertEqual(updates[-1].downloaded, len(PAYLOAD))
+        self.assertEqual(updates[-1].percent, 100)
+
+    def test_server_without_ranges_restarts_from_zero(self):
+        server, base, root = self._serve(disconnects=1, ranges=False)
+        target = download_file(f"{base}/app.bin", root / "app.bin", backoff=0)
+        self.assertEqual(target.read_bytes(), PAYLOAD)
+        self.assertEqual(len(server.requests), 2)
+
+    def test_complete_part_file_is_not_downloaded_again(self):
+        server, base, root = self._serve()
+        partial_path(root / "app.bin").write_bytes(PAYLOAD)
+        target = download_file(f"{base}/app.bin", root / "app.bin",
+                               sha256=hashlib.sha256(PAYLOAD).hexdigest())
+        self.assertEqual(target.read_bytes(), PAYLOAD)
+        self.assertEqual(server.requests, [f"bytes={len(PAYLOAD)}-"])
+
+    def test_checksum_mismatch_discards_part(self):
+        _, base, root = self._serve()
+        with self.assertRaises(ChecksumMismatch):
+            download_file(f"{base}/app.bin", root / "app.bin", sha256="0" * 64)
+        self.assertFalse((root / "app.bin").exists())
+        self.assertFalse(partial_path(root / "app.bin").exists())
+
+    def test_missing_file_fails_without_retrying(self):
+        server, base, root = self._serve()
+        with self.assertRaises(DownloadError):
+            download_file(f"{base}/missing.bin", root / "missing.bin", backoff=0)
+        self.assertEqual(len(server.requests), 1)
+
+    def test_cancel_keeps_part_for_resume(self):
+        _, base, root = self._serve()
+        running = [True]
+
+        def progress(update):
+            running[0] = False
+
+        with self.assertRaises(DownloadCancelled):
+            download_file(f"{base}/app.bin", root / "app.bin", progress=progress,
+                          is_running=lambda: running[0], progress_interval=0)
+        self.assertTrue(0 < partial_path(root / "app.bin").stat().st_size < len(PAYLOAD))
+
+    def test_progress_is_rate_limited_and_reports_speed(self):
+        _, base, root = self._serve()
+        updates = []
+        download_file(f"{base}/app.bin", root / "app.bin", progress=updates.append,
+                      chunk_size=1024, progress_interval=60)
+        # 1024 bloques, pero solo la primera notificación y la final.
+        self.assertLessEqual(len(updates), 2)
+        self.assertEqual(updates[-1].downloaded, len(PAYLOAD))
+        self.assertIn("MB", updates[-1].describe())
+
+    def test_fetch_checksum_reads_sidecar(self):
+        _, base, _ = self._serve()
+        self.assertEqual(fetch_checksum(f"{base}/app.bin"), hashlib.sha256(PAYLOAD).hexdigest())
+        self.assertIsNone(fetch_checksum(f"{base}/missing.bin"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from lib.gitignore import GitignoreMatcher
+
+
+class GitignoreMatcherTests(unittest.TestCase):
+    def test_anchoring_directory_only_and_double_star(self):
+        matcher = GitignoreMatcher.from_lines([
+            "# comentario",
+            "*.log",
+            "/build",
+            "logs/",
+            "docs/tmp",
+            "**/cache",
+            "assets/**/*.psd",
+            "vendor/**",
+        ])
+        self.assertTrue(matcher.matches("a/b/debug.log"))
+        self.assertTrue(matcher.matches("build", is_dir=True))
+        self.assertFalse(matcher.matches("app/build", is_dir=True))
+        self.assertTrue(matcher.matches("app/logs", is_dir=True))
+        self.assertFalse(matcher.matches("app/logs"))
+        self.assertTrue(matcher.matches("docs/tmp"))
+        self.assertFalse(matcher.matches("app/docs/tmp"))
+        self.assertTrue(matcher.matches("cache", is_dir=True))
+        self.assertTrue(matcher.matches("x/y/cache", is_dir=True))
+        self.assertTrue(matcher.matches("assets/logo.psd"))
+        self.assertTrue(matcher.matches("assets/a/b/logo.psd"))
+        self.assertFalse(matcher.matches("other/logo.psd"))
+        self.assertTrue(matcher.matches("vendor/lib/mod.js"))
+        self.assertFalse(matcher.matches("vendor", is_dir=True))
+        self.assertFalse(matcher.matches("# comentario"))
+
+    def test_last_matching_rule_wins_with_negation(self):
+        matcher = GitignoreMatcher.from_lines(["*.log", "!keep.log", "keep.log.d/", "\\!literal"])
+        self.assertTrue(matcher.matches("debug.log"))
+        self.assertFalse(matcher.matches("app/keep.log"))
+        self.assertTrue(matcher.matches("!literal"))
+
+        matcher = GitignoreMatcher.from_lines(["!keep.log", "*.log"])
+        self.assertTrue(matcher.matches("keep.log"))
+
+    def test_walk_prunes_excluded_directories(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            (root / "node_modules" / "pkg").mkdir(parents=True)
+            (root / "node_modules" / "pkg" / "keep.txt").touch()
+            (root / "src").mkdir()
+            (root / "src" / "main.txt").touch()
+            (root / "src" / "run.log").touch()
+            matcher = GitignoreMatcher.from_lines(["node_modules/", "*.log", "!keep.txt"])
+            walked = list(matcher.walk(root))
+
+        self.assertEqual(walked[0][0], "")
+        self.assertEqual(walked[0][1], ["src"])
+        self.assertEqual(walked[1:], [("src", [], ["main.txt"])])
+        self.assertTrue(matcher.is_excluded("node_modules/pkg/keep.txt"))
+
+
+if __name__ == "__main__":
+    unittest.main()
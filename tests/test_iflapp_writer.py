@@ -0,0 +1,79 @@
+import os
+import stat
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+from lib.BuildThread import FlangCompiler
+from lib.iflapp_writer import IflappWriter
+
+
+class IflappWriterTests(unittest.TestCase):
+    def _package(self, root: Path) -> Path:
+        package = root / "package"
+        (package / "assets").mkdir(parents=True)
+        (package / "details.xml").write_text("<app>" + "x" * 500 + "</app>", encoding="utf-8")
+        (package / "assets" / "logo.png").write_bytes(b"\x89PNG" + os.urandom(256))
+        binary = package / "main"
+        binary.write_bytes(b"\x7fELF" + b"\0" * 4096)
+        binary.chmod(0o755)
+        for index in range(20):
+            (package / "assets" / f"doc{index}.txt").write_text("texto " * 200, encoding="utf-8")
+        return package
+
+    def test_round_trip_stores_compressed_content_and_keeps_modes(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            package = self._package(root)
+            output = root / "app.iflapp"
+            members = sorted(
+                (path, path.relative_to(package).as_posix()) for path in package.rglob("*") if path.is_file()
+            )
+            with IflappWriter(output, level=9, workers=4) as writer:
+                writer.write_files(members)
+
+            self.assertFalse(output.with_name("app.iflapp.part").exists())
+            with zipfile.ZipFile(output) as archive:
+                self.assertIsNone(archive.testzip())
+                self.assertEqual(archive.namelist(), [arcname for _, arcname in members])
+                self.assertEqual(archive.getinfo("main").compress_type, zipfile.ZIP_STORED)
+                self.assertEqual(archive.getinfo("assets/logo.png").compress_type, zipfile.ZIP_STORED)
+                self.assertEqual(archive.getinfo("details.xml").compress_type, zipfile.ZIP_DEFLATED)
+                self.assertEqual(archive.read("main"), (package / "main").read_bytes())
+                if os.name != "nt":
+                    mode = archive.getinfo("main").external_attr >> 16
+                    self.assertTrue(mode & stat.S_IXUSR)
+
+    def test_compress_to_iflapp_rejects_package_without_details_xml(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            source = root / "project"
+            source.mkdir()
+            package = self._package(root)
+            (package / "details.xml").unlink()
+            compiler = FlangCompiler(source, root / "output")
+            output = root / "output" / "app.iflapp"
+
+            self.assertFalse(compiler.compress_to_iflapp(package, output))
+            self.assertFalse(output.exists())
+            self.assertIn("details.xml", compiler.last_error)
+
+    def test_compress_to_iflapp_honours_compression_level(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            source = root / "project"
+            source.mkdir()
+            package = self._package(root)
+            compiler = FlangCompiler(source, root / "output")
+            compiler.compression_level = 0
+            output = root / "output" / "app.iflapp"
+
+            self.assertTrue(compiler.compress_to_iflapp(package, output))
+            with zipfile.ZipFile(output) as archive:
+                self.assertIsNone(archive.testzip())
+                self.assertTrue(all(info.compress_type == zipfile.ZIP_STORED for info in archive.infolist()))
+
+
+if __name__ == "__main__":
+    unittest.main()
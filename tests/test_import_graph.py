@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from lib import import_graph
+from lib.import_graph import ImportGraph, InstalledPackage, ParseCache, compute_auto_excludes
+
+
+class ImportGraphTests(unittest.TestCase):
+    def _project(self, root: Path) -> Path:
+        (root / "app").mkdir()
+        (root / "lib").mkdir()
+        (root / "lib" / "net.py").write_text("import requests\n", encoding="utf-8")
+        (root / "app" / "widgets.py").write_text(
+            "from PyQt6.QtWidgets import QWidget\nfrom . import theme\n",
+            encoding="utf-8",
+        )
+        (root / "app" / "theme.py").write_text("COLOR = 'red'\n", encoding="utf-8")
+        script = root / "main.py"
+        script.write_text(
+            "# import numpy\n"
+            "import os\n"
+            "import importlib\n"
+            "DOC = 'import pandas'\n"
+            "from lib import net\n"
+            "import widgets\n"
+            "plugin = importlib.import_module('yaml')\n",
+            encoding="utf-8",
+        )
+        return script
+
+    def test_walks_local_modules_and_ignores_comments_and_strings(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir).resolve()
+            script = self._project(root)
+            analysis = ImportGraph([root, root / "app", root / "lib"]).analyze(script)
+
+        self.assertEqual(
+            [path.name for path in analysis.local_modules],
+            ["theme.py", "widgets.py", "net.py"],
+        )
+        self.assertEqual(analysis.external, {"requests", "PyQt6", "yaml"})
+        self.assertEqual(analysis.dynamic, {"yaml"})
+        self.assertEqual(analysis.hidden_imports(), ["PyQt6", "requests", "yaml"])
+        self.assertEqual(analysis.excludes(["numpy", "pandas", "requests"]), ["numpy", "pandas"])
+
+    def test_parse_cache_reuses_entries_until_content_changes(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            module = root / "mod.py"
+            module.write_text("import json\n", encoding="utf-8")
+            cache = ParseCache(root / "imports.json")
+            self.assertEqual(cache.parse(module).imports, [("json", 0, False)])
+            cache.save()
+
+            reloaded = ParseCache(root / "imports.json")
+            with patch.object(import_graph, "_parse_imports") as mock_parse:
+                reloaded.parse(module)
+                # Mismo contenido con otro mtime: se valida por hash sin reparsear.
+                stamp = module.stat().st_mtime + 10
+                os.utime(module, (stamp, stamp))
+                reloaded.parse(module)
+                mock_parse.assert_not_called()
+
+            module.write_text("import csv\n", encoding="utf-8")
+            self.assertEqual(reloaded.parse(module).imports, [("csv", 0, False)])
+
+    def test_auto_excludes_skip_reached_packages_and_their_dependencies(self):
+        mb = 1024 * 1024
+        packages = {
+            "requests": InstalledPackage("requests", "requests", 1 * mb, 20, ("urllib3", "idna")),
+            "urllib3": InstalledPackage("urllib3", "urllib3", 3 * mb, 40),
+            "idna": InstalledPackage("idna", "idna", 1 * mb, 8),
+            "numpy": InstalledPackage("numpy", "numpy", 60 * mb, 500),
+            "pandas": InstalledPackage("pandas", "pandas", 90 * mb, 900, ("numpy",)),
+            "wcwidth": InstalledPackage("wcwidth", "wcwidth", 10, 2),
+            "setuptools": InstalledPackage("setuptools", "setuptools", 8 * mb, 300),
+        }
+
+        excluded = compute_auto_excludes({"requests"}, min_size=2 * mb, packages=packages)
+        self.assertEqual([package.name for package in excluded], ["pandas", "numpy"])
+
+        excluded = compute_auto_excludes({"pandas.io"}, min_size=2 * mb, packages=packages)
+        self.assertEqual([package.name for package in excluded], ["urllib3"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import multiprocessing.dummy
+import tempfile
+import unittest
+from contextlib import ExitStack
+from pathlib import Path
+from unittest.mock import DEFAULT, patch
+
+from lib import BuildThread
+from lib.BuildThread import FlangCompiler
+
+
+class ParallelCompileTests(unittest.TestCase):
+    def _compiler(self, root: Path, names, jobs=2):
+        source = root / "project"
+        source.mkdir()
+        (source / "details.xml").write_text("<app />", encoding="utf-8")
+        compiler = FlangCompiler(source, root / "output")
+        compiler.metadata = {"app": names[0], "platform": "Danenone"}
+        compiler.platform_type = "Danenone"
+        compiler.current_platform = "Linux"
+        compiler.jobs = jobs
+        compiler.scripts = [
+            {"name": name, "path": source / f"{name}.py", "icon": None, "is_main": index == 0}
+            for index, name in enumerate(names)
+        ]
+        return compiler
+
+    @staticmethod
+    def _patch_build(stack, fake_compile, pool=multiprocessing.dummy.Pool):
+        """Sustituye el pool de procesos y la compilación real; devuelve el pool."""
+        pool = stack.enter_context(patch.object(BuildThread._CTX, "Pool", pool))
+        stack.enter_context(patch.object(FlangCompiler, "_ensure_pyinstaller", return_value=True))
+        stack.enter_context(patch.object(FlangCompiler, "_compile_binary", fake_compile))
+        return pool
+
+    def test_parallel_mode_merges_worker_logs(self):
+        def fake_compile(compiler, script, windowed):
+            compiler.log(f"compilado {script['name']}")
+            return True
+
+        logs = []
+        with tempfile.TemporaryDirectory() as temp_dir:
+            compiler = self._compiler(Path(temp_dir), ["main", "updater", "helper"])
+            compiler.log_callback = logs.append
+            with ExitStack() as stack:
+                self._patch_build(stack, fake_compile)
+                self.assertTrue(compiler.compile_binaries("Linux"))
+
+        for name in ("main", "updater", "helper"):
+            self.assertIn(f"[{name}] compilado {name}", logs)
+
+    def test_parallel_mode_fails_whole_build_on_first_error(self):
+        def fake_compile(compiler, script, windowed):
+            if script["name"] == "updater":
+                compiler.last_error = "updater roto"
+                return False
+            return True
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            compiler = self._compiler(Path(temp_dir), ["main", "updater"])
+            with ExitStack() as stack:
+                self._patch_build(stack, fake_compile)
+                self.assertFalse(compiler.compile_binaries("Linux"))
+            self.assertEqual(compiler.last_error, "updater roto")
+
+    def test_single_job_keeps_sequential_path(self):
+        calls = []
+
+        def fake_compile(compiler, script, windowed):
+            calls.append(script["name"])
+            return True
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            compiler = self._compiler(Path(temp_dir), ["main", "updater"], jobs=1)
+            with ExitStack() as stack:
+                mock_pool = self._patch_build(stack, fake_compile, pool=DEFAULT)
+                self.assertTrue(compiler.compile_binaries("Linux"))
+            mock_pool.assert_not_called()
+        self.assertEqual(calls, ["main", "updater"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,6 +4,7 @@ import zipfile
 from pathlib import Path
 
 from lib.BuildThread import FlangCompiler
+from lib.artifact_store import MANIFEST_NAME
 
 
 class ProcessedProjectCleanupTests(unittest.TestCase):
@@ -84,7 +85,7 @@ class ProcessedProjectCleanupTests(unittest.TestCase):
             self.assertTrue(compiler.compress_to_iflapp(valid_package, valid_artifact))
             self.assertTrue(valid_artifact.exists())
             with zipfile.ZipFile(valid_artifact) as archive:
-                self.assertEqual(archive.namelist(), ["details.xml"])
+                self.assertEqual(archive.namelist(), ["details.xml", MANIFEST_NAME])
 
     def test_gui_compiler_runner_preserves_source_after_packaging(self):
         with tempfile.TemporaryDirectory() as temp_dir:
@@ -0,0 +1,132 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from lib import pyinstaller_embedded
+from lib.pyinstaller_embedded import SubprocessPyInstaller
+
+
+class _ScriptedPyInstaller(SubprocessPyInstaller):
+    """Sustituye ``python -m PyInstaller`` por un script de prueba."""
+
+    def __init__(self, code: str, **kwargs):
+        super().__init__(**kwargs)
+        self.available = True
+        self.code = code
+        self.seen_args = None
+
+    def _command(self, args):
+        self.seen_args = args
+        return [sys.executable, "-c", self.code] + args
+
+
+class SubprocessPyInstallerTests(unittest.TestCase):
+    def test_compile_returns_exe_and_captures_stderr(self):
+        code = (
+            "import os, sys\n"
+            "args = sys.argv[1:]\n"
+            "dist = args[args.index('--distpath') + 1]\n"
+            "name = args[args.index('--name') + 1]\n"
+            "sys.stderr.write('INFO: building ' + name + ' in ' + os.getcwd() + '\\n')\n"
+            "open(os.path.join(dist, name + ('.exe' if os.name == 'nt' else '')), 'wb').write(b'bin')\n"
+        )
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            script = root / "main.py"
+            script.write_text("print('ok')\n", encoding="utf-8")
+            cwd_before = os.getcwd()
+            argv_before = sys.argv[:]
+            pyi = _ScriptedPyInstaller(code)
+            exe = pyi.compile_to_exe(str(script), "main", output_dir=str(root / "dist"),
+                                     windowed=False, cwd=str(root))
+            pyi.cleanup()
+
+            self.assertIsNotNone(exe)
+            self.assertTrue(os.path.isfile(exe))
+            self.assertIn("INFO: building main in", pyi.get_last_stderr())
+            self.assertEqual(os.getcwd(), cwd_before)
+            self.assertEqual(sys.argv, argv_before)
+
+    def test_failure_reports_exit_code_and_stderr_tail(self):
+        pyi = _ScriptedPyInstaller("import sys; sys.stderr.write('ERROR: hook roto\\n'); sys.exit(3)")
+        self.assertFalse(pyi._run_pyinstaller(["x.py"]))
+        self.assertIn("código 3", pyi.get_last_error())
+        self.assertIn("ERROR: hook roto", pyi.get_last_error())
+
+    def test_timeout_kills_build(self):
+        pyi = _ScriptedPyInstaller("import time; time.sleep(30)", timeout=0.5)
+        started = time.monotonic()
+        self.assertFalse(pyi._run_pyinstaller([]))
+        self.assertLess(time.monotonic() - started, 10)
+        self.assertIn("tiempo límite", pyi.get_last_error())
+
+    def test_cancel_from_another_thread(self):
+        pyi = _ScriptedPyInstaller("import time; time.sleep(30)")
+        threading.Timer(0.5, pyi.cancel).start()
+        started = time.monotonic()
+        self.assertFalse(pyi._run_pyinstaller([]))
+        self.assertLess(time.monotonic() - started, 10)
+        self.assertEqual(pyi.get_last_error(), "Compilación cancelada")
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "la memoria del hijo se mide en /proc")
+    def test_memory_limit_kills_child_by_resident_memory(self):
+        # Reserva memoria real (no solo espacio de direcciones) de forma gradual.
+        code = (
+            "import time\n"
+            "blocks = []\n"
+            "for _ in range(128):\n"
+            "    blocks.append(b'x' * (8 * 1024 * 1024))\n"
+            "    time.sleep(0.05)\n"
+        )
+        pyi = _ScriptedPyInstaller(code, memory_limit_mb=128)
+        started = time.monotonic()
+        self.assertFalse(pyi._run_pyinstaller([]))
+        self.assertLess(time.monotonic() - started, 10)
+        self.assertIn("límite de memoria de 128 MB", pyi.get_last_error())
+
+    def test_memory_limit_is_disabled_by_default(self):
+        pyi = _ScriptedPyInstaller("bytearray(64 * 1024 * 1024)")
+        self.assertEqual(pyi.memory_limit_mb, 0)
+        self.assertTrue(pyi._run_pyinstaller([]))
+
+    def test_subprocess_backend_is_not_shared(self):
+        from lib.pyinstaller_embedded import get_pyinstaller
+
+        if getattr(sys, "frozen", False):
+            self.skipTest("el ejecutable congelado usa siempre el backend embebido")
+        self.assertIsNot(get_pyinstaller("subprocess"), get_pyinstaller("subprocess"))
+
+    def test_auto_install_makes_compiler_backend_available(self):
+        from lib.BuildThread import FlangCompiler
+
+        def fake_refresh():
+            pyinstaller_embedded.PYINSTALLER_AVAILABLE = True
+            pyinstaller_embedded.pyi_version = "6.0"
+            return True
+
+        installed = mock.Mock(returncode=0, stdout="", stderr="")
+        with tempfile.TemporaryDirectory() as temp_dir, \
+                mock.patch.object(pyinstaller_embedded, "PYINSTALLER_AVAILABLE", False), \
+                mock.patch.object(pyinstaller_embedded, "pyi_version", "No disponible"), \
+                mock.patch.object(pyinstaller_embedded, "_embedded_pyinstaller", None), \
+                mock.patch.object(pyinstaller_embedded, "_refresh_pyinstaller_availability", fake_refresh), \
+                mock.patch("subprocess.run", return_value=installed) as run:
+            logs = []
+            compiler = FlangCompiler(Path(temp_dir), Path(temp_dir) / "out", log_callback=logs.append)
+            compiler.pyinstaller_backend = "subprocess"
+            self.assertFalse(compiler._pyinstaller().is_available())
+
+            self.assertTrue(compiler._ensure_pyinstaller())
+            run.assert_called_once()
+            self.assertTrue(compiler._pyinstaller().is_available())
+            self.assertTrue(compiler._check_pyinstaller_installed())
+        self.assertIn("[OK] PyInstaller instalado: 6.0", logs)
+
+
+if __name__ == "__main__":
+    unittest.main()
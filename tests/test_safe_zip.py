@@ -1,10 +1,15 @@
 import os
 import tempfile
+import threading
+import time
+import tracemalloc
 import unittest
 import zipfile
 from pathlib import Path
+from unittest import mock
 
-from lib.safe_zip import UnsafeZipMemberError, safe_extract_zip
+from lib import safe_zip
+from lib.safe_zip import ExtractionCancelled, UnsafeZipMemberError, safe_extract_zip
 
 
 class SafeZipTests(unittest.TestCase):
@@ -32,13 +37,9 @@ class SafeZipTests(unittest.TestCase):
 
     def test_rejects_absolute_and_windows_traversal_names(self):
         for member_name in ("/tmp/outside.txt", "C:/outside.txt", r"..\\outside.txt"):
-            with (
-                self.subTest(member_name=member_name),
-                tempfile.TemporaryDirectory() as temp,
-                self._archive(member_name) as archive,
-                self.assertRaises(UnsafeZipMemberError),
-            ):
-                safe_extract_zip(archive, Path(temp) / "destination")
+            with self.subTest(member_name=member_name), tempfile.TemporaryDirectory() as temp:
+                with self._archive(member_name) as archive, self.assertRaises(UnsafeZipMemberError):
+                    safe_extract_zip(archive, Path(temp) / "destination")
 
     def test_rejects_symlink_members(self):
         with tempfile.TemporaryDirectory() as temp:
@@ -49,12 +50,145 @@ class SafeZipTests(unittest.TestCase):
             info.external_attr = (0o120777 << 16) | 0xA000
             with zipfile.ZipFile(archive_path, "w") as archive:
                 archive.writestr(info, "../../outside")
-            with (
-                zipfile.ZipFile(archive_path, "r") as archive,
-                self.assertRaises(UnsafeZipMemberError),
-            ):
+            with zipfile.ZipFile(archive_path, "r") as archive, self.assertRaises(UnsafeZipMemberError):
                 safe_extract_zip(archive, Path(temp) / "destination")
 
+    def test_streams_large_members_with_bounded_memory(self):
+        payload = os.urandom(256 * 1024) * 16  # 4 MiB
+        with tempfile.TemporaryDirectory() as temp:
+            archive_path = Path(temp) / "big.zip"
+            with zipfile.ZipFile(archive_path, "w") as archive:
+                archive.writestr("stored.bin", payload, compress_type=zipfile.ZIP_STORED)
+                archive.writestr("deflated.bin", payload, compress_type=zipfile.ZIP_DEFLATED)
+            destination = Path(temp) / "destination"
+            with zipfile.ZipFile(archive_path) as archive:
+                tracemalloc.start()
+                try:
+                    safe_extract_zip(archive, destination, buffer_size=64 * 1024)
+                    _, peak = tracemalloc.get_traced_memory()
+                finally:
+                    tracemalloc.stop()
+            self.assertEqual((destination / "stored.bin").read_bytes(), payload)
+            self.assertEqual((destination / "deflated.bin").read_bytes(), payload)
+            self.assertLess(peak, len(payload) // 4)
+
+    def test_parallel_extraction_reports_progress(self):
+        payloads = {f"bin/part{i}.bin": os.urandom(64 * 1024) * (i + 1) for i in range(4)}
+        payloads.update({f"assets/icon{i}.txt": b"x" * i for i in range(20)})
+        with tempfile.TemporaryDirectory() as temp:
+            archive_path = Path(temp) / "app.iflapp"
+            with zipfile.ZipFile(archive_path, "w", zipfile.ZIP_DEFLATED) as archive:
+                archive.writestr("assets/", b"")
+                for name, payload in payloads.items():
+                    archive.writestr(name, payload)
+            updates, threads = [], set()
+
+            def on_progress(update):
+                updates.append(update)
+                threads.add(threading.current_thread().name)
+
+            destination = Path(temp) / "destination"
+            with mock.patch.object(safe_zip, "PARALLEL_MIN_SIZE", 64 * 1024), zipfile.ZipFile(archive_path) as archive:
+                extracted = safe_extract_zip(
+                    archive, destination, buffer_size=16 * 1024,
+                    progress=on_progress, workers=3, progress_interval=0,
+                )
+            self.assertEqual(len(extracted), len(payloads) + 1)
+            for name, payload in payloads.items():
+                self.assertEqual((destination / name).read_bytes(), payload)
+            self.assertTrue(any(name.startswith("zip-extract") for name in threads))
+            done = [update.bytes_done for update in updates]
+            self.assertEqual(done, sorted(done))
+            final = updates[-1]
+            self.assertEqual(final.members_done, len(payloads))
+            self.assertEqual(final.bytes_done, sum(map(len, payloads.values())))
+            self.assertEqual(final.percent, 100)
+
+    def _many_members_archive(self, root: Path, directories: int, files: int) -> Path:
+        archive_path = root / "assets.zip"
+        with zipfile.ZipFile(archive_path, "w", zipfile.ZIP_STORED) as archive:
+            for d in range(directories):
+                for f in range(files):
+                    archive.writestr(f"assets/group{d}/file{f}.txt", b"")
+        return archive_path
+
+    @unittest.skipUnless(hasattr(os, "symlink"), "requiere symlinks")
+    def test_rejects_existing_symlinks_in_destination(self):
+        with tempfile.TemporaryDirectory() as temp:
+            root = Path(temp)
+            outside = root / "outside"
+            outside.mkdir()
+            cases = {
+                "escaping parent": ("lib", outside, "lib/module.py"),
+                "leaf inside destination": ("config.ini", root / "destination" / "real.ini", "config.ini"),
+                "dangling leaf": ("app.bin", root / "missing.bin", "app.bin"),
+            }
+            for label, (link, link_target, member) in cases.items():
+                with self.subTest(label):
+                    destination = root / "destination"
+                    destination.mkdir(exist_ok=True)
+                    (destination / link).symlink_to(link_target)
+                    try:
+                        with self._archive(member) as archive, self.assertRaises(UnsafeZipMemberError):
+                            safe_extract_zip(archive, destination)
+                    finally:
+                        (destination / link).unlink()
+            self.assertEqual(list(outside.iterdir()), [])
+            self.assertFalse((root / "missing.bin").exists())
+
+    def test_many_members_resolve_each_directory_once(self):
+        directories, files = 20, 150
+        with tempfile.TemporaryDirectory() as temp:
+            root = Path(temp)
+            archive_path = self._many_members_archive(root, directories, files)
+            destination = root / "destination"
+            real_resolve, real_scandir = Path.resolve, os.scandir
+            calls = {"resolve": 0, "scandir": 0}
+
+            def counting_resolve(path, *args, **kwargs):
+                calls["resolve"] += 1
+                return real_resolve(path, *args, **kwargs)
+
+            def counting_scandir(*args, **kwargs):
+                calls["scandir"] += 1
+                return real_scandir(*args, **kwargs)
+
+            # Segunda pasada sobre una instalación existente: el caso caro.
+            with zipfile.ZipFile(archive_path) as archive:
+                safe_extract_zip(archive, destination)
+                with mock.patch.object(Path, "resolve", counting_resolve), \
+                        mock.patch.object(os, "scandir", counting_scandir):
+                    started = time.perf_counter()
+                    extracted = safe_extract_zip(archive, destination)
+                    elapsed = time.perf_counter() - started
+            self.assertEqual(len(extracted), directories * files)
+            # destino + un resolve y un listado por directorio, nunca por archivo.
+            self.assertLessEqual(calls["resolve"], directories + 1)
+            self.assertLessEqual(calls["scandir"], directories)
+            self.assertLess(elapsed, 10)
+
+    def test_cancellation_stops_between_chunks(self):
+        with tempfile.TemporaryDirectory() as temp:
+            archive_path = Path(temp) / "big.zip"
+            with zipfile.ZipFile(archive_path, "w", zipfile.ZIP_DEFLATED) as archive:
+                for i in range(3):
+                    archive.writestr(f"part{i}.bin", os.urandom(512 * 1024))
+            for workers in (1, 3):
+                with self.subTest(workers=workers):
+                    chunks = []
+
+                    def is_running():
+                        chunks.append(None)
+                        return len(chunks) < 4
+
+                    destination = Path(temp) / f"destination-{workers}"
+                    with mock.patch.object(safe_zip, "PARALLEL_MIN_SIZE", 1024):
+                        with zipfile.ZipFile(archive_path) as archive, self.assertRaises(ExtractionCancelled):
+                            safe_extract_zip(archive, destination, buffer_size=64 * 1024,
+                                             workers=workers, is_running=is_running)
+                    written = sum(f.stat().st_size for f in destination.iterdir())
+                    self.assertLess(written, 3 * 512 * 1024)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from lib.BuildThread import FlangCompiler
+
+
+class SharedRuntimeBundleTests(unittest.TestCase):
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        env = patch.dict(os.environ, {"PACKAGEMAKER_CACHE_DIR": cache_dir.name})
+        env.start()
+        self.addCleanup(env.stop)
+
+    def _compiler(self, root: Path) -> FlangCompiler:
+        source = root / "project"
+        source.mkdir()
+        (source / "details.xml").write_text(
+            "<app><publisher>Acme</publisher><app>main</app>"
+            "<version>v1.0-26.08-15.38</version><platform>Danenone</platform></app>",
+            encoding="utf-8",
+        )
+        for name in ("main", "updater"):
+            (source / f"{name}.py").write_text("print('ok')\n", encoding="utf-8")
+        compiler = FlangCompiler(source, root / "output")
+        compiler.parse_details_xml()
+        compiler.find_scripts()
+        compiler.bundle_mode = "shared"
+        compiler.reuse_workpath = False
+        return compiler
+
+    def test_spec_collects_every_script_into_one_runtime(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            compiler = self._compiler(Path(temp_dir))
+            spec = Path(temp_dir) / "shared.spec"
+            compiler._write_shared_spec(spec, windowed=False)
+            content = spec.read_text(encoding="utf-8")
+
+        self.assertEqual(content.count("Analysis("), 2)
+        self.assertIn("exclude_binaries=True", content)
+        self.assertIn("COLLECT(exe0, a0.binaries, a0.datas, exe1, a1.binaries, a1.datas", content)
+
+    def test_shared_runtime_is_packaged_with_every_binary(self):
+        def fake_compile_spec(spec_path, output_dir, work_dir, cwd=None):
+            runtime = Path(output_dir) / "runtime"
+            (runtime / "_internal").mkdir(parents=True)
+            (runtime / "_internal" / "libpython.so").write_bytes(b"r" * 1000)
+            for name in ("main", "updater"):
+                (runtime / name).write_bytes(b"e" * 10)
+            return True
+
+        logs = []
+        with tempfile.TemporaryDirectory() as temp_dir:
+            compiler = self._compiler(Path(temp_dir))
+            compiler.log_callback = logs.append
+            compiler.current_platform = "Linux"
+            pyi = MagicMock()
+            pyi.is_available.return_value = True
+            pyi.compile_spec.side_effect = fake_compile_spec
+            with patch("lib.BuildThread.get_pyinstaller", return_value=pyi), \
+                    patch.object(FlangCompiler, "_ensure_pyinstaller", return_value=True):
+                self.assertTrue(compiler.compile_binaries("Linux"))
+                self.assertTrue(compiler.create_package("Linux"))
+
+            package = next(p for p in (Path(temp_dir) / "output").iterdir() if p.is_dir())
+            self.assertTrue((package / "main").is_file())
+            self.assertTrue((package / "updater").is_file())
+            self.assertTrue((package / "_internal" / "libpython.so").is_file())
+            self.assertEqual(compiler._onefile_baseline_bytes, 20 + 1000 * 2)
+        self.assertTrue(any("base onefile por script" in line for line in logs))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+import json
+import os
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+from lib.artifact_store import MANIFEST_NAME, write_manifest
+from lib.iflapp_writer import IflappWriter
+from lib.project_scan import scan_project_dirs
+from lib.safe_zip import ExtractionCancelled
+from lib.staged_install import StagedInstall, StagedInstallError, previous_dir_for, recover, rollback, staging_dir_for
+
+
+def _write_package(path: Path, files, version):
+    source = path.parent / f"{path.stem}-src"
+    members = []
+    for name, content in files.items():
+        target = source / name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(content)
+        members.append((target, name))
+    with IflappWriter(path, workers=2) as writer:
+        writer.write_files(members)
+        write_manifest(writer, {"app": "demo", "version": version})
+    return path
+
+
+V1 = {
+    "details.xml": b"<app><app>demo</app><version>1.0</version></app>",
+    "demo.bin": bytes(range(256)) * 200,
+    "assets/logo.png": b"\x89PNG logo",
+}
+V2 = dict(V1, **{
+    "details.xml": b"<app><app>demo</app><version>2.0</version></app>",
+    "assets/logo.png": b"\x89PNG logo nuevo",
+})
+
+
+class StagedInstallTests(unittest.TestCase):
+    def setUp(self):
+        temp = tempfile.TemporaryDirectory()
+        self.addCleanup(temp.cleanup)
+        self.root = Path(temp.name)
+        self.apps = self.root / "Fluthin Apps"
+        self.target = self.apps / "demo"
+
+    def _install(self, files, version):
+        package = _write_package(self.root / f"demo-{version}.iflapp", files, version)
+        install = StagedInstall(self.target)
+        install.stage_archive(package)
+        self.assertEqual(install.verify().findtext("version"), version)
+        return install.commit()
+
+    def test_upgrade_swaps_and_reuses_unchanged_files(self):
+        self._install(V1, "1.0")
+        result = self._install(V2, "2.0")
+
+        self.assertEqual(result.previous, previous_dir_for(self.target))
+        self.assertEqual((self.target / "assets/logo.png").read_bytes(), V2["assets/logo.png"])
+        self.assertEqual((result.previous / "assets/logo.png").read_bytes(), V1["assets/logo.png"])
+        # demo.bin no cambió: se reutiliza de la versión anterior sin reescribirlo.
+        self.assertEqual(result.reused, 1)
+        self.assertEqual(result.reused_bytes, len(V1["demo.bin"]))
+        self.assertEqual((self.target / "demo.bin").read_bytes(), V1["demo.bin"])
+        self.assertFalse(staging_dir_for(self.target).exists())
+        # Los directorios ocultos no aparecen como apps instaladas.
+        self.assertEqual(list(scan_project_dirs(self.apps)), [str(self.target)])
+
+        self.assertTrue(rollback(self.target))
+        self.assertEqual((self.target / "details.xml").read_bytes(), V1["details.xml"])
+        self.assertEqual((previous_dir_for(self.target) / "details.xml").read_bytes(), V2["details.xml"])
+
+    def test_hash_mismatch_leaves_installed_version_untouched(self):
+        self._install(V1, "1.0")
+        package = _write_package(self.root / "demo-2.0.iflapp", V2, "2.0")
+        # Reescribe el paquete con un miembro que no coincide con su manifiesto.
+        tampered = self.root / "tampered.iflapp"
+        with zipfile.ZipFile(package) as source, zipfile.ZipFile(tampered, "w") as output:
+            for info in source.infolist():
+                data = source.read(info)
+                if info.filename == "assets/logo.png":
+                    data = b"manipulado"
+                output.writestr(info.filename, data)
+
+        install = StagedInstall(self.target)
+        with self.assertRaises(StagedInstallError):
+            install.stage_archive(tampered)
+        self.assertEqual((self.target / "details.xml").read_bytes(), V1["details.xml"])
+        self.assertFalse(staging_dir_for(self.target).exists())
+
+    def test_package_without_details_is_rejected(self):
+        self._install(V1, "1.0")
+        package = _write_package(self.root / "broken.iflapp", {"demo.bin": b"x"}, "2.0")
+        install = StagedInstall(self.target)
+        install.stage_archive(package)
+        with self.assertRaises(StagedInstallError):
+            install.verify()
+        self.assertFalse(staging_dir_for(self.target).exists())
+        self.assertTrue((self.target / "details.xml").is_file())
+
+    def test_cancelled_install_discards_staging(self):
+        self._install(V1, "1.0")
+        package = _write_package(self.root / "demo-2.0.iflapp", V2, "2.0")
+        install = StagedInstall(self.target)
+        with self.assertRaises(ExtractionCancelled):
+            install.stage_archive(package, is_running=lambda: False)
+        self.assertFalse(staging_dir_for(self.target).exists())
+        self.assertEqual((self.target / "details.xml").read_bytes(), V1["details.xml"])
+
+    def test_interrupted_swap_is_recovered(self):
+        self._install(V1, "1.0")
+        # Proceso muerto entre los dos rename: solo queda la versión anterior.
+        os.rename(self.target, previous_dir_for(self.target))
+        self.assertTrue(recover(self.target))
+        manifest = json.loads((self.target / MANIFEST_NAME).read_text(encoding="utf-8"))
+        self.assertEqual(manifest["package"]["version"], "1.0")
+
+    def test_folder_install_reuses_files_with_same_size_and_mtime(self):
+        source = self.root / "project"
+        source.mkdir()
+        (source / "details.xml").write_bytes(V1["details.xml"])
+        (source / "app.py").write_text("print('hola')\n", encoding="utf-8")
+
+        first = StagedInstall(self.target)
+        first.stage_tree(source)
+        first.commit()
+        (source / "app.py").write_text("print('adiós')\n", encoding="utf-8")
+        os.utime(source / "app.py", ns=(0, 10**18))
+
+        second = StagedInstall(self.target)
+        second.stage_tree(source)
+        second.verify()
+        result = second.commit()
+        self.assertEqual((result.written, result.reused), (1, 1))
+        self.assertEqual((self.target / "app.py").read_text(encoding="utf-8"), "print('adiós')\n")
+
+    def test_folder_install_compares_content_before_reusing(self):
+        source = self.root / "project"
+        source.mkdir()
+        (source / "details.xml").write_bytes(V1["details.xml"])
+        (source / "app.py").write_bytes(b"print('hola')\n")
+        first = StagedInstall(self.target)
+        first.stage_tree(source)
+        first.commit()
+
+        # Mismo tamaño y misma fecha, contenido distinto: hay que copiarlo.
+        mtime_ns = (source / "app.py").stat().st_mtime_ns
+        (source / "app.py").write_bytes(b"print('chau')\n")
+        os.utime(source / "app.py", ns=(mtime_ns, mtime_ns))
+        os.utime(self.target / "app.py", ns=(mtime_ns, mtime_ns))
+
+        second = StagedInstall(self.target)
+        second.stage_tree(source)
+        result = second.commit()
+        self.assertEqual((result.written, result.reused), (1, 1))
+        self.assertEqual((self.target / "app.py").read_bytes(), b"print('chau')\n")
+
+    def test_reused_files_do_not_share_inodes_with_previous_version(self):
+        self._install(V1, "1.0")
+        result = self._install(V2, "2.0")
+        self.assertEqual(result.reused, 1)
+        self.assertFalse(os.path.samefile(self.target / "demo.bin", result.previous / "demo.bin"))
+        # Una escritura en su sitio de la app no altera la copia de rollback.
+        with open(self.target / "demo.bin", "r+b") as handle:
+            handle.write(b"corrupto")
+        self.assertEqual((result.previous / "demo.bin").read_bytes(), V1["demo.bin"])
+
+
+if __name__ == "__main__":
+    unittest.main()
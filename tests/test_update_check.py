@@ -0,0 +1,132 @@
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from lib.coreUpdater.core import is_newer_version
+from lib.coreUpdater.update_check import (
+    InstalledApp, UpdateChecker, UpdateStatus, format_update_summary, scan_installed_apps,
+)
+
+REMOTE_VERSIONS = {"alpha": "2.0", "beta": "1.0", "gamma": "3.1"}
+
+
+class _RawServer(ThreadingHTTPServer):
+    """Stand-in de raw.githubusercontent.com con ETag y 304."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _RawHandler)
+        self.requests = []
+        self.lock = threading.Lock()
+
+
+class _RawHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        _, author, app, branch, name = self.path.split("/")
+        version = REMOTE_VERSIONS.get(app)
+        etag = f'"{app}-{version}"'
+        with self.server.lock:
+            self.server.requests.append((app, self.headers.get("If-None-Match")))
+        if version is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        body = f"<app><app>{app}</app><version>{version}</version></app>".encode()
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _install(base: Path, app: str, version: str, author: str = "acme"):
+    folder = base / f"acme.{app}"
+    folder.mkdir(parents=True)
+    (folder / "details.xml").write_text(
+        f"<app><app>{app}</app><version>{version}</version><author>{author}</author>"
+        f"<publisher>acme</publisher><platform>Linux</platform></app>",
+        encoding="utf-8",
+    )
+
+
+class UpdateCheckTests(unittest.TestCase):
+    def setUp(self):
+        temp = tempfile.TemporaryDirectory()
+        self.addCleanup(temp.cleanup)
+        self.root = Path(temp.name)
+        self.apps_dir = self.root / "Fluthin Apps"
+        _install(self.apps_dir, "alpha", "1.0")
+        _install(self.apps_dir, "beta", "1.0")
+        _install(self.apps_dir, "gamma", "3.1")
+        _install(self.apps_dir, "missing", "1.0")
+        _install(self.apps_dir, "orphan", "1.0", author="")
+
+        self.server = _RawServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        base = f"http://127.0.0.1:{self.server.server_port}"
+        self.url_for = lambda author, app: f"{base}/{author}/{app}/main/details.xml"
+
+    def _checker(self, **kwargs):
+        return UpdateChecker(cache_path=self.root / "cache" / "update-checks.json",
+                             url_for=self.url_for, timeout=5, **kwargs)
+
+    def test_reports_outdated_apps_in_one_pass(self):
+        apps = scan_installed_apps(self.apps_dir)
+        results = {r.app.app: r for r in self._checker().check(apps)}
+        self.assertEqual(set(results), {"alpha", "beta", "gamma", "missing", "orphan"})
+        self.assertTrue(results["alpha"].outdated)
+        self.assertEqual(results["alpha"].remote_version, "2.0")
+        self.assertFalse(results["beta"].outdated)
+        self.assertFalse(results["gamma"].outdated)
+        self.assertEqual(results["missing"].error, "HTTP 404")
+        self.assertTrue(results["orphan"].error)
+        summary = format_update_summary(list(results.values()))
+        self.assertIn("1 con actualización, 2 al día, 2 sin comprobar", summary)
+
+    def test_disk_cache_and_conditional_requests(self):
+        apps = scan_installed_apps(self.apps_dir)
+        self._checker().check(apps)
+        self.assertEqual(len(self.server.requests), 4)
+
+        # Resultado reciente: ni siquiera se consulta la red. Los errores no se
+        # cachean, así que solo se repite la app sin details.xml remoto.
+        cached = self._checker().check(apps)
+        self.assertEqual([app for app, _ in self.server.requests[4:]], ["missing"])
+        self.assertEqual({r.source for r in cached if not r.error}, {"cache"})
+
+        # Forzado: petición condicional y 304 sin cuerpo.
+        refreshed = {r.app.app: r for r in self._checker().check(apps, force=True)}
+        conditional = self.server.requests[5:]
+        self.assertIn(("alpha", '"alpha-2.0"'), conditional)
+        self.assertEqual(refreshed["alpha"].source, "not-modified")
+        self.assertEqual(refreshed["alpha"].remote_version, "2.0")
+
+    def test_outdated_compares_versions_numerically(self):
+        def outdated(local, remote):
+            return UpdateStatus(InstalledApp("x", "x", local), remote_version=remote).outdated
+
+        self.assertTrue(outdated("1.9", "1.10"))
+        self.assertFalse(outdated("1.10", "1.9"))
+        self.assertFalse(outdated("1.0", "1.0.0"))
+        self.assertFalse(outdated("2.0", "1.5"))
+        self.assertFalse(outdated("1.0", ""))
+        self.assertTrue(outdated("v3.2-26.05-20.13", "v3.2-26.06-09.00"))
+        self.assertTrue(is_newer_version("v3.2.7-26.05-20.13", "v3.2-26.08-15.38"))
+
+
+if __name__ == "__main__":
+    unittest.main()
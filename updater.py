@@ -211,7 +211,7 @@ Modos de actualización:
     parser.add_argument("--check", action="store_true", help="Verificar si hay actualizaciones disponibles")
     parser.add_argument("--silent", action="store_true", help="Ejecutar sin interfaz gráfica")
     parser.add_argument("--accept-license", action="store_true", help="Aceptar términos de licencia automáticamente (requiere --silent)")
-    parser.add_argument("--no-cache", action="store_true", help="Deshabilitar caché en memoria")
+    parser.add_argument("--no-cache", action="store_true", help="Deshabilitar caché de descargas")
     parser.add_argument("--install", metavar="FILE", help="Instalar archivo .iflapp")
     parser.add_argument("--target", metavar="DIR", help="Directorio destino para instalación")
     parser.add_argument("--version", action="store_true", help="Mostrar versión del updater")